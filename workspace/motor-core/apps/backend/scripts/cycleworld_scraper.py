@@ -4,11 +4,25 @@ from urllib.parse import urljoin
 from datetime import datetime
 
 from scraper_base import BaseScraper, ScrapingConfig
+from spec_parser import SpecTable
+from link_classifier import LinkClassifier
+from keyword_matcher import find_brand, infer_category
+from quantity import parse_measure, parse_number
 from models import Motorcycle, EngineSpecs, Performance, Dimensions, PriceInfo, Rating, ReviewData
 
+# 链接分类规则（需要根据实际网站结构调整）
+CYCLEWORLD_LINKS = LinkClassifier(
+    domain='cycleworld.com',
+    detail=[r'^/(?:reviews?|motorcycle-reviews|motorcycles?|bikes?|story)/(?:[^/]+/)*[^/]*-[^/]*$'],
+    listing=[r'^/(?:reviews?|motorcycle-reviews|motorcycles?|bikes?)(?:/[a-z]+)?$'],
+)
+
 class CycleWorldScraper(BaseScraper):
     """CycleWorld网站爬虫"""
     
+    EXTRACTOR_VERSION = 4
+    LINK_CLASSIFIER = CYCLEWORLD_LINKS
+    
     def __init__(self, config: Optional[ScrapingConfig] = None):
         super().__init__(config)
         self.base_url = "https://www.cycleworld.com"
@@ -27,29 +41,27 @@ class CycleWorldScraper(BaseScraper):
             'cons': '.cons li, .disadvantages li'
         }
     
-    def scrape_page(self, url: str) -> Optional[Dict[str, Any]]:
-        """爬取单个摩托车页面"""
-        response = self.get(url)
-        if not response:
-            return None
-        
-        soup = self.parse_html(response.text)
+    def extract_page(self, soup, url: str) -> Optional[Dict[str, Any]]:
+        """从单个摩托车页面提取数据"""
+        # 优先使用页面内嵌的结构化数据，DOM提取只补充缺失字段
+        structured = self.extract_structured_data(soup)
         
         # 提取基本信息
-        basic_info = self._extract_basic_info(soup, url)
+        basic_info = self._extract_basic_info(soup, url, structured)
         if not basic_info:
             return None
         
-        # 提取详细规格
-        engine_specs = self._extract_engine_specs(soup)
-        performance = self._extract_performance(soup)
-        dimensions = self._extract_dimensions(soup)
-        price = self._extract_price(soup)
-        rating = self._extract_rating(soup)
+        # 提取详细规格（规格表只解析一次，字段提取为字典查找）
+        spec_table = self.parse_spec_table(soup)
+        engine_specs = self._extract_engine_specs(soup, spec_table)
+        performance = self._extract_performance(soup, spec_table)
+        dimensions = self._extract_dimensions(soup, spec_table)
+        price = self.price_from_structured(structured) or self._extract_price(soup)
+        rating = self.rating_from_structured(structured) or self._extract_rating(soup)
         
         # 提取附加信息
-        images = self._extract_images(soup, url)
-        description = self._extract_description(soup)
+        images = self.images_from_structured(structured, url) or self._extract_images(soup, url)
+        description = structured.get('description') or self._extract_description(soup)
         features = self._extract_features(soup)
         
         # 构建摩托车对象
@@ -69,20 +81,36 @@ class CycleWorldScraper(BaseScraper):
             features=features
         )
         
-        return motorcycle.__dict__
+        data = motorcycle.to_dict()
+        # 评测正文复用同一棵解析树提取
+        review = self.extract_review(soup, url, motorcycle, structured)
+        data['review'] = review.to_dict() if review else None
+        return data
     
-    def _extract_basic_info(self, soup, url: str) -> Optional[Dict[str, Any]]:
+    def _extract_basic_info(self, soup, url: str, structured: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """提取基本信息"""
-        title_elem = soup.select_one(self.selectors['title'])
-        if not title_elem:
+        structured = structured or {}
+        
+        title = structured.get('title')
+        if not title:
+            title_elem = soup.select_one(self.selectors['title'])
+            title = self.extract_text(title_elem) or structured.get('og_title')
+        if not title:
             self.logger.warning(f"未找到标题元素: {url}")
             return None
         
-        title = self.extract_text(title_elem)
-        
         # 解析标题获取品牌、型号、年份
         brand, model, year = self._parse_title(title)
         
+        # 结构化数据中的品牌、型号、年份更可靠
+        if structured.get('brand'):
+            brand_match = find_brand(structured['brand'])
+            brand = brand_match.label if brand_match else structured['brand']
+        if structured.get('model'):
+            model = structured['model']
+        if structured.get('year'):
+            year = structured['year']
+        
         # 尝试从URL或页面内容中提取更多信息
         category = self._extract_category(soup)
         
@@ -95,10 +123,6 @@ class CycleWorldScraper(BaseScraper):
     
     def _parse_title(self, title: str) -> tuple:
         """解析标题获取品牌、型号、年份"""
-        # 常见摩托车品牌
-        brands = ['Honda', 'Yamaha', 'Kawasaki', 'Suzuki', 'Ducati', 'BMW', 'KTM', 
-                 'Aprilia', 'Triumph', 'Harley-Davidson', 'Indian', 'MV Agusta']
-        
         brand = ""
         model = ""
         year = datetime.now().year
@@ -108,17 +132,14 @@ class CycleWorldScraper(BaseScraper):
         if year_match:
             year = int(year_match.group(1))
         
-        # 查找品牌
-        title_upper = title.upper()
-        for b in brands:
-            if b.upper() in title_upper:
-                brand = b
-                break
+        # 查找品牌（支持多词品牌和别名）
+        model_text = title
+        brand_match = find_brand(title)
+        if brand_match:
+            brand = brand_match.label
+            model_text = title[:brand_match.start] + title[brand_match.end:]
         
         # 提取型号（去除品牌和年份后的剩余部分）
-        model_text = title
-        if brand:
-            model_text = re.sub(rf'\b{re.escape(brand)}\b', '', model_text, flags=re.IGNORECASE)
         if year_match:
             model_text = re.sub(rf'\b{year_match.group(1)}\b', '', model_text)
         
@@ -128,27 +149,21 @@ class CycleWorldScraper(BaseScraper):
     
     def _extract_category(self, soup) -> Optional[str]:
         """提取车型类别"""
-        # 常见类别关键词
-        categories = {
-            'sport': ['sport', 'supersport', 'sportbike', 'racing'],
-            'cruiser': ['cruiser', 'touring', 'bagger'],
-            'naked': ['naked', 'streetfighter', 'standard'],
-            'adventure': ['adventure', 'adv', 'dual-sport', 'enduro'],
-            'dirt': ['dirt', 'motocross', 'mx', 'off-road'],
-            'scooter': ['scooter', 'automatic']
-        }
-        
-        # 在页面文本中查找类别关键词
-        page_text = soup.get_text().lower()
-        
-        for category, keywords in categories.items():
-            if any(keyword in page_text for keyword in keywords):
-                return category
-        
-        return None
+        # 在页面文本中按关键词命中数为各类别打分
+        page_text = soup.get_text()
+        return infer_category(page_text)
     
-    def _extract_engine_specs(self, soup) -> Optional[EngineSpecs]:
+    def _extract_engine_specs(self, soup, spec_table: Optional[SpecTable] = None) -> Optional[EngineSpecs]:
         """提取发动机规格"""
+        if spec_table is None:
+            spec_table = self.parse_spec_table(soup)
+        
+        # 优先从标签化的规格表中查找
+        values = spec_table.group_values('engine')
+        if values:
+            return EngineSpecs(**values)
+        
+        # 没有可识别的标签时，退回到对区域文本的模式匹配
         specs_section = soup.select_one(self.selectors['specifications'])
         if not specs_section:
             return None
@@ -177,8 +192,17 @@ class CycleWorldScraper(BaseScraper):
         
         return None
     
-    def _extract_performance(self, soup) -> Optional[Performance]:
+    def _extract_performance(self, soup, spec_table: Optional[SpecTable] = None) -> Optional[Performance]:
         """提取性能数据"""
+        if spec_table is None:
+            spec_table = self.parse_spec_table(soup)
+        
+        # 优先从标签化的规格表中查找
+        values = spec_table.group_values('performance')
+        if values:
+            return Performance(**values)
+        
+        # 没有可识别的标签时，退回到对区域文本的模式匹配
         perf_section = soup.select_one(self.selectors['performance'])
         if not perf_section:
             # 尝试在规格表中查找性能数据
@@ -211,8 +235,17 @@ class CycleWorldScraper(BaseScraper):
         
         return None
     
-    def _extract_dimensions(self, soup) -> Optional[Dimensions]:
+    def _extract_dimensions(self, soup, spec_table: Optional[SpecTable] = None) -> Optional[Dimensions]:
         """提取尺寸数据"""
+        if spec_table is None:
+            spec_table = self.parse_spec_table(soup)
+        
+        # 优先从标签化的规格表中查找
+        values = spec_table.group_values('dimensions')
+        if values:
+            return Dimensions(**values)
+        
+        # 没有可识别的标签时，退回到对区域文本的模式匹配
         specs_section = soup.select_one(self.selectors['specifications'])
         if not specs_section:
             return None
@@ -252,7 +285,7 @@ class CycleWorldScraper(BaseScraper):
             return None
         
         price_text = self.extract_text(price_elem)
-        price_value = self.extract_number(price_text.replace('$', '').replace(',', ''))
+        price_value = self.extract_number(price_text)
         
         if price_value:
             return PriceInfo(
@@ -269,13 +302,7 @@ class CycleWorldScraper(BaseScraper):
         if not rating_elem:
             return None
         
-        rating_text = rating_elem.get_text()
-        overall = self.extract_number(rating_text)
-        
-        if overall:
-            return Rating(overall=overall)
-        
-        return None
+        return self.rating_from_text(rating_elem.get_text())
     
     def _extract_images(self, soup, base_url: str) -> List[str]:
         """提取图片URL"""
@@ -312,12 +339,16 @@ class CycleWorldScraper(BaseScraper):
         return features[:10]  # 限制最多10个功能
     
     def _find_spec_value(self, text: str, keywords: List[str], unit: str = '') -> Optional[float]:
-        """在文本中查找规格数值"""
+        """在文本中查找规格数值，并换算到指定单位"""
         for keyword in keywords:
-            pattern = rf'{keyword}[:\s]*(\d+[\.\d]*)\s*{unit}'
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return float(match.group(1))
+            pattern = rf'{re.escape(keyword)}[:\s]*(\d[^\n\r]*)'
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                if unit:
+                    value = parse_measure(match.group(1), unit, allow_unitless=False)
+                else:
+                    value = parse_number(match.group(1))
+                if value is not None:
+                    return value
         return None
     
     def _find_spec_text(self, text: str, keywords: List[str]) -> Optional[str]:
@@ -347,33 +378,4 @@ class CycleWorldScraper(BaseScraper):
                 url = f"{self.base_url}{path}"
             urls.append(url)
         
-        return urls
-    
-    def extract_motorcycle_urls_from_listing(self, listing_url: str) -> List[str]:
-        """从列表页面提取摩托车详情页URL"""
-        response = self.get(listing_url)
-        if not response:
-            return []
-        
-        soup = self.parse_html(response.text)
-        urls = []
-        
-        # 查找摩托车链接（需要根据实际网站结构调整）
-        link_selectors = [
-            'a[href*="/review"]',
-            'a[href*="/motorcycle"]',
-            'a[href*="/bike"]',
-            '.motorcycle-card a',
-            '.bike-card a'
-        ]
-        
-        for selector in link_selectors:
-            links = soup.select(selector)
-            for link in links:
-                href = link.get('href')
-                if href:
-                    full_url = urljoin(listing_url, href)
-                    if self.is_valid_url(full_url) and full_url not in urls:
-                        urls.append(full_url)
-        
         return urls
\ No newline at end of file
@@ -3,13 +3,234 @@ import csv
 import sqlite3
 import os
 import hashlib
-from typing import Dict, Any, List, Optional, Set
-from datetime import datetime
+import re
+import textwrap
+import threading
+import zlib
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Union
+from datetime import datetime, timezone
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from dataclasses import asdict
+from dataclasses import dataclass, asdict
 
 from models import Motorcycle, EngineSpecs, Performance, Dimensions, PriceInfo, Rating
+from quantity import FIELD_CANONICAL_UNITS, parse_measure, parse_number
+from motorcycle_table import MotorcycleTable
+from raw_codec import RawDataCodec
+from unit_normalizer import (PAIRED_FIELDS, pair_name, reconcile_pairs, reconcile_values, rescue_unitless,
+                             rescue_unitless_value)
+
+# 文本中保留的字符之外的特殊字符
+TEXT_STRIP_PATTERN = re.compile(r'[^\w\s\-\(\)\.,;:!?\'"\/]')
+YEAR_PATTERN = re.compile(r'\b(19\d{2}|20\d{2})\b')
+
+# 标准化类别名称
+CATEGORY_MAP = {
+    'sportbike': 'sport',
+    'supersport': 'sport',
+    'superbike': 'sport',
+    'streetfighter': 'naked',
+    'standard': 'naked',
+    'dual-sport': 'adventure',
+    'dual sport': 'adventure',
+    'adv': 'adventure',
+    'motocross': 'dirt',
+    'mx': 'dirt',
+    'off-road': 'dirt',
+    'electric': 'electric',
+    'e-bike': 'electric'
+}
+
+# 各部分数值字段的 (单位, 最小值, 最大值)，逐条清理和批量清理共用
+NUMERIC_RANGES = {
+    'engine': {
+        'displacement': ('cc', 50, 2500),  # 合理的排量范围
+        'bore': ('mm', 20, 120),  # 合理的缸径/行程范围
+        'stroke': ('mm', 20, 120),
+    },
+    'performance': {
+        'power_hp': ('hp', 5, 300),  # 合理的功率范围
+        'power_kw': ('kw', 3, 250),
+        'torque_nm': ('nm', 5, 250),
+        'torque_lbft': ('lb-ft', 5, 200),
+        'top_speed_mph': ('mph', 30, 250),
+        'top_speed_kmh': ('km/h', 50, 400),
+        'acceleration_0_60': ('s', 1, 15),
+        'quarter_mile': ('s', 8, 20),
+    },
+    'dimensions': {
+        'length': (FIELD_CANONICAL_UNITS['length'], 1500, 3000),
+        'width': (FIELD_CANONICAL_UNITS['width'], 600, 1200),
+        'height': (FIELD_CANONICAL_UNITS['height'], 800, 1800),
+        'wheelbase': (FIELD_CANONICAL_UNITS['wheelbase'], 1200, 2000),
+        'ground_clearance': (FIELD_CANONICAL_UNITS['ground_clearance'], 100, 300),
+        'seat_height': (FIELD_CANONICAL_UNITS['seat_height'], 600, 900),
+        'dry_weight': (FIELD_CANONICAL_UNITS['dry_weight'], 80, 400),
+        'wet_weight': (FIELD_CANONICAL_UNITS['wet_weight'], 90, 450),
+        'fuel_capacity': (FIELD_CANONICAL_UNITS['fuel_capacity'], 5, 30),
+    },
+    'price': {
+        'msrp': ('usd', 1000, 100000),  # 合理的价格范围
+    },
+}
+
+# 子表 → (记录中的键, 列名)
+CHILD_TABLES = {
+    'engine_specs': ('engine', ('type', 'displacement', 'bore', 'stroke', 'compression_ratio', 'cooling', 'fuel_system')),
+    'performance': ('performance', ('power_hp', 'power_kw', 'torque_nm', 'torque_lbft', 'top_speed_mph',
+                                    'top_speed_kmh', 'acceleration_0_60', 'quarter_mile')),
+    'dimensions': ('dimensions', ('length', 'width', 'height', 'wheelbase', 'ground_clearance', 'seat_height',
+                                  'dry_weight', 'wet_weight', 'fuel_capacity')),
+}
+
+# 同一车型（品牌、型号、年份）已存在时的处理方式 → ON CONFLICT DO UPDATE 子句
+# overwrite：新记录整体覆盖；keep_newest：抓取时间不早于已有记录时才覆盖；
+# merge：新记录中非空的字段覆盖已有值，raw_data在Python中与已有记录合并后写入（见_merge_patch）
+CONFLICT_POLICIES = {
+    'overwrite': """
+        SET data_hash = excluded.data_hash, category = excluded.category, source_url = excluded.source_url,
+            scraped_at = excluded.scraped_at, updated_at = CURRENT_TIMESTAMP, raw_data = excluded.raw_data,
+            msrp = excluded.msrp, content_hash = excluded.content_hash, last_seen_at = CURRENT_TIMESTAMP
+    """,
+    'keep_newest': """
+        SET data_hash = excluded.data_hash, category = excluded.category, source_url = excluded.source_url,
+            scraped_at = excluded.scraped_at, updated_at = CURRENT_TIMESTAMP, raw_data = excluded.raw_data,
+            msrp = excluded.msrp, content_hash = excluded.content_hash, last_seen_at = CURRENT_TIMESTAMP
+        WHERE excluded.scraped_at >= COALESCE(motorcycles.scraped_at, '')
+    """,
+    'merge': """
+        SET data_hash = excluded.data_hash,
+            category = COALESCE(excluded.category, motorcycles.category),
+            source_url = COALESCE(NULLIF(excluded.source_url, ''), motorcycles.source_url),
+            scraped_at = COALESCE(excluded.scraped_at, motorcycles.scraped_at),
+            updated_at = CURRENT_TIMESTAMP,
+            raw_data = excluded.raw_data,
+            msrp = COALESCE(excluded.msrp, motorcycles.msrp),
+            content_hash = excluded.content_hash, last_seen_at = CURRENT_TIMESTAMP
+    """,
+}
+
+# 内容指纹不包含的字段：同一内容重新抓取时只有这些字段不同
+CONTENT_HASH_EXCLUDED = ('scraped_at', 'updated_at')
+# 批量查找已有记录时每条语句的车型数，每个车型3个参数，低于旧版SQLite的999个参数上限
+LOOKUP_CHUNK_SIZE = 300
+
+# 规格筛选字段 → (表, 列)；子表的字段都建有 (列, motorcycle_id) 覆盖索引，范围条件和排序走索引
+SPEC_FILTERS = {
+    'year': ('motorcycles', 'year'),
+    'msrp': ('motorcycles', 'msrp'),
+    'displacement': ('engine_specs', 'displacement'),
+    'power_hp': ('performance', 'power_hp'),
+    'torque_nm': ('performance', 'torque_nm'),
+    'top_speed_mph': ('performance', 'top_speed_mph'),
+    'seat_height': ('dimensions', 'seat_height'),
+    'dry_weight': ('dimensions', 'dry_weight'),
+    'wet_weight': ('dimensions', 'wet_weight'),
+    'fuel_capacity': ('dimensions', 'fuel_capacity'),
+}
+SPEC_TABLE_ALIASES = {'motorcycles': 'm', 'engine_specs': 'e', 'performance': 'p', 'dimensions': 'd'}
+
+# 计数统计表 → 分组列，由motorcycles上的触发器增量维护
+COUNT_TABLES = {
+    'stats_by_brand': ('brand',),
+    'stats_by_year': ('year',),
+    'stats_by_category': ('category',),
+    'stats_by_brand_year': ('brand', 'year'),
+}
+# 按类别汇总的数值字段 → (表, 列)，在spec_summary中维护数量、总和、最小值和最大值
+SUMMARY_METRICS = {
+    'power_hp': ('performance', 'power_hp'),
+    'msrp': ('motorcycles', 'msrp'),
+}
+
+# 全文索引的列 → (从motorcycles行取值的表达式, bm25权重)，{row}为new或old
+# 触发器只用内置函数，任何连接都能写入motorcycles；压缩的BLOB在SQL中读不出，
+# 取raw_data的列对BLOB行为NULL，由DataStorage._index_full_text在Python中写入
+RAW_TEXT = "CASE WHEN typeof({row}.raw_data) = 'text' THEN {row}.raw_data END"
+FULL_TEXT_COLUMNS = {
+    'brand': ('{row}.brand', 10.0),
+    'model': ('{row}.model', 10.0),
+    'category': ('{row}.category', 5.0),
+    'description': ("json_extract({raw}, '$.description')", 1.0),
+    'features': ("(SELECT group_concat(value, ' ') FROM json_each({raw}, '$.features'))", 2.0),
+}
+# 搜索词中的单词（字母、数字，允许中间有连字符和点，如MT-09、1.2）
+SEARCH_TERM_PATTERN = re.compile(r'\w+(?:[-.]\w+)*')
+
+ENGINE_TEXT_FIELDS = ('type', 'compression_ratio', 'cooling', 'fuel_system')
+RATING_FIELDS = ('overall', 'performance', 'comfort', 'build_quality', 'value')
+LIST_CLEANERS = {'images': '_clean_image_urls', 'features': '_clean_features', 'colors': '_clean_colors'}
+
+
+def _prune_empty(value: Any) -> Any:
+    """递归去掉None、空字符串和空容器，用作merge策略的补丁（补丁中的null会删除已有字段）"""
+    if isinstance(value, dict):
+        pruned = {key: _prune_empty(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, '', [], {})}
+    return value
+
+
+def _merge_patch(target: Any, patch: Any) -> Any:
+    """按JSON Merge Patch（与SQLite的json_patch相同）把patch合并到target"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _merge_patch(result.get(key), value)
+    return result
+
+
+def _full_text_value(expression: str, row: str) -> str:
+    """全文索引列在触发器中的取值表达式"""
+    return expression.format(row=row, raw=RAW_TEXT.format(row=row))
+
+def _count_sql(table: str, columns: tuple, row: str, delta: int) -> str:
+    """触发器语句：把row（new或old）计入或移出计数表，计数为0的分组删除"""
+    names = ', '.join(columns)
+    if delta > 0:
+        values = ', '.join(f"{row}.{column}" for column in columns)
+        not_null = ' AND '.join(f"{row}.{column} IS NOT NULL" for column in columns)
+        return (f"INSERT INTO {table} ({names}, count) SELECT {values}, 1 WHERE {not_null} "
+                f"ON CONFLICT ({names}) DO UPDATE SET count = count + 1;")
+    match = ' AND '.join(f"{column} = {row}.{column}" for column in columns)
+    return (f"UPDATE {table} SET count = count - 1 WHERE {match};\n"
+            f"DELETE FROM {table} WHERE {match} AND count <= 0;")
+
+
+def _metric_values_sql(metric: str) -> str:
+    """查询每条记录的 (category, value)"""
+    table, column = SUMMARY_METRICS[metric]
+    if table == 'motorcycles':
+        return f"SELECT category, {column} AS value FROM motorcycles"
+    return (f"SELECT m.category, x.{column} AS value FROM {table} x "
+            f"JOIN motorcycles m ON m.id = x.motorcycle_id")
+
+
+def _summary_add_sql(metric: str, category: str, value: str) -> str:
+    """触发器语句：把一个值计入类别汇总"""
+    return f"""INSERT INTO spec_summary (category, metric, count, total, min_value, max_value)
+        SELECT c, '{metric}', 1, v, v, v FROM (SELECT {category} AS c, {value} AS v)
+        WHERE c IS NOT NULL AND v IS NOT NULL
+        ON CONFLICT (category, metric) DO UPDATE SET
+            count = count + 1, total = total + excluded.total,
+            min_value = MIN(min_value, excluded.min_value), max_value = MAX(max_value, excluded.max_value);"""
+
+
+def _summary_remove_sql(metric: str, category: str, value: str) -> str:
+    """触发器语句：把一个值移出类别汇总
+
+    数量和总和直接相减；移出的值恰好是最小或最大值时只标记为过期，读取统计时再对该类别重新查询
+    """
+    return f"""UPDATE spec_summary SET
+            count = count - 1, total = total - {value},
+            stale = stale OR {value} <= min_value OR {value} >= max_value
+        WHERE category = {category} AND metric = '{metric}' AND {value} IS NOT NULL;
+        DELETE FROM spec_summary WHERE count <= 0;"""
+
 
 class DataCleaner:
     """数据清理器"""
@@ -41,17 +262,186 @@ class DataCleaner:
         if data.get('rating'):
             cleaned['rating'] = DataCleaner._clean_rating(data['rating'])
         
+        # hp/kW等成对字段互相补全，不一致的字段对记录下来
+        cleaned['unit_flags'] = DataCleaner._reconcile_performance(cleaned.get('performance'))
+        
         # 清理附加信息
         cleaned['source_url'] = data.get('source_url', '')
         cleaned['scraped_at'] = data.get('scraped_at')
         cleaned['updated_at'] = data.get('updated_at')
-        cleaned['images'] = DataCleaner._clean_image_urls(data.get('images', []))
-        cleaned['description'] = DataCleaner._clean_text(data.get('description', ''))
-        cleaned['features'] = DataCleaner._clean_features(data.get('features', []))
-        cleaned['colors'] = DataCleaner._clean_colors(data.get('colors', []))
+        cleaned['images'] = DataCleaner._clean_image_urls(data.get('images') or [])
+        cleaned['description'] = DataCleaner._clean_text(data.get('description') or '')
+        cleaned['features'] = DataCleaner._clean_features(data.get('features') or [])
+        cleaned['colors'] = DataCleaner._clean_colors(data.get('colors') or [])
+        
+        if data.get('review'):
+            review = DataCleaner._clean_review(data['review'])
+            if review:
+                cleaned['review'] = review
+        
+        return cleaned
+    
+    @staticmethod
+    def clean_batch(data: Union[pd.DataFrame, List[Dict[str, Any]], Dict[str, Any]]) -> pd.DataFrame:
+        """批量清理，结果与逐条调用clean_motorcycle_data一致
+        
+        输入为记录列表、列数组字典或DataFrame，嵌套字段按pd.json_normalize的方式展开为
+        'engine.displacement' 这样的列名；数值列在整列上做单位换算和范围校验，
+        字符串（数值、文本、年份、类别）只对不重复的取值调用单条清理函数再按编码展开，列表字段同理。
+        输出列中被丢弃的数值为NaN、文本为None，评测字段原样保留
+        """
+        if isinstance(data, list):
+            frame = pd.json_normalize(data)
+        else:
+            frame = pd.DataFrame(data)
+        count = len(frame)
+        
+        def column(name: str) -> pd.Series:
+            if name in frame:
+                return frame[name]
+            return pd.Series([None] * count, index=frame.index, dtype=object)
+        
+        cleaned = pd.DataFrame(index=frame.index)
+        cleaned['brand'] = DataCleaner._clean_text_column(column('brand'))
+        cleaned['model'] = DataCleaner._clean_text_column(column('model'))
+        cleaned['year'] = DataCleaner._clean_year_column(column('year'))
+        cleaned['category'] = DataCleaner._clean_category_column(column('category'))
+        
+        for section, ranges in NUMERIC_RANGES.items():
+            for field, (unit, min_val, max_val) in ranges.items():
+                name = f"{section}.{field}"
+                cleaned[name] = DataCleaner._clean_number_column(column(name), unit, min_val, max_val, field)
+        
+        # 成对性能字段在整列上互相补全并核对
+        performance = {field: cleaned[f"performance.{field}"].to_numpy() for pair in PAIRED_FIELDS for field in pair}
+        flags = reconcile_pairs(performance, NUMERIC_RANGES['performance'])
+        for field, values in performance.items():
+            cleaned[f"performance.{field}"] = values
+        unit_flags = [[] for _ in range(count)]
+        for first, second in PAIRED_FIELDS:
+            name = pair_name(first, second)
+            for row in np.flatnonzero(flags[name]):
+                unit_flags[row].append(name)
+        cleaned['unit_flags'] = unit_flags
+        
+        # 和逐条清理一样，只有取值为真时才清理，数字按str()转为文本
+        for name in [f"engine.{field}" for field in ENGINE_TEXT_FIELDS] + ['price.currency']:
+            cleaned[name] = DataCleaner._clean_text_column(column(name), coerce=True)
+        
+        price_year = column('price.year')
+        cleaned['price.year'] = DataCleaner._clean_year_column(price_year).where(
+            DataCleaner._truthy(price_year))
+        
+        DataCleaner._clean_rating_columns(frame, cleaned, column)
+        
+        cleaned['source_url'] = column('source_url').where(column('source_url').notna(), '')
+        cleaned['scraped_at'] = column('scraped_at')
+        cleaned['updated_at'] = column('updated_at')
+        cleaned['description'] = DataCleaner._clean_text_column(column('description'))
+        
+        # 列表字段无法向量化，逐行复用单条清理函数，相同的列表只清理一次
+        for name, cleaner in LIST_CLEANERS.items():
+            clean = getattr(DataCleaner, cleaner)
+            results = {}
+            values = []
+            for value in column(name):
+                key = tuple(value) if isinstance(value, list) else ()
+                if key not in results:
+                    results[key] = clean(list(key))
+                values.append(list(results[key]))
+            cleaned[name] = values
+        
+        for name in frame.columns:
+            if name == 'review' or name.startswith('review.'):
+                cleaned[name] = frame[name]
         
         return cleaned
     
+    @staticmethod
+    def _truthy(series: pd.Series) -> pd.Series:
+        """取值为真（非空、非零、非空字符串）的掩码"""
+        return series.notna() & series.astype(bool)
+    
+    @staticmethod
+    def _map_unique(series: pd.Series, func, default: Any) -> pd.Series:
+        """只对不重复的取值调用func，再按编码展开到整列，空值取default"""
+        codes, uniques = pd.factorize(series)
+        mapped = np.empty(len(uniques) + 1, dtype=object)
+        mapped[:-1] = [func(value) for value in uniques]
+        mapped[-1] = default  # 编码-1（空值）取最后一个元素
+        return pd.Series(mapped[codes], index=series.index, dtype=object)
+    
+    @staticmethod
+    def _clean_text_column(series: pd.Series, coerce: bool = False) -> pd.Series:
+        """整列清理文本；coerce为True时真值转为字符串后清理、假值为None，否则非字符串为空字符串"""
+        if coerce:
+            return DataCleaner._map_unique(
+                series, lambda value: DataCleaner._clean_text(str(value)) if value else None, None)
+        return DataCleaner._map_unique(series, DataCleaner._clean_text, '')
+    
+    @staticmethod
+    def _clean_year_column(series: pd.Series) -> pd.Series:
+        """整列清理年份，无法识别或超出范围时为当前年份"""
+        current_year = datetime.now().year
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return DataCleaner._map_unique(series, DataCleaner._clean_year, current_year).astype(np.int64)
+        
+        # 数字列：截断取整后做范围校验
+        years = np.trunc(series.to_numpy(np.float64, na_value=np.nan))
+        valid = (years >= 1900) & (years <= current_year + 2)
+        return pd.Series(np.where(valid, years, current_year).astype(np.int64), index=series.index)
+    
+    @staticmethod
+    def _clean_category_column(series: pd.Series) -> pd.Series:
+        """整列标准化类别"""
+        return DataCleaner._map_unique(series, DataCleaner._clean_category, None)
+    
+    @staticmethod
+    def _clean_number_column(series: pd.Series, unit: Optional[str], min_val: float, max_val: float,
+                             field: Optional[str] = None) -> np.ndarray:
+        """整列解析数值并做范围校验，返回float64数组（丢弃的值为NaN）"""
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy(np.float64, na_value=np.nan)
+        else:
+            # 字符串只解析不重复的取值
+            codes, uniques = pd.factorize(series)
+            parsed = np.array([DataCleaner._clean_number(value, unit) for value in uniques], dtype=np.float64)
+            values = parsed[codes] if len(parsed) else np.full(len(series), np.nan)
+            values[codes < 0] = np.nan
+        
+        if field:
+            values = rescue_unitless(values, field, min_val, max_val)
+        
+        # 0视为缺失，与逐条清理的真值判断一致
+        valid = (values != 0) & (values >= min_val) & (values <= max_val)
+        return np.where(valid, values, np.nan)
+    
+    @staticmethod
+    def _clean_rating_columns(frame: pd.DataFrame, cleaned: pd.DataFrame, column):
+        """整列清理评分，每行的满分可以不同"""
+        names = [f"rating.{field}" for field in RATING_FIELDS + ('scale',)]
+        has_rating = frame[[name for name in names if name in frame]].notna().any(axis=1) \
+            if any(name in frame for name in names) else pd.Series(False, index=frame.index)
+        
+        scale = column('rating.scale')
+        if pd.api.types.is_numeric_dtype(scale):
+            scale_values = scale.to_numpy(np.float64, na_value=np.nan)
+        else:
+            # 与逐条清理一样只接受数字类型的满分
+            scale_values = DataCleaner._map_unique(
+                scale, lambda value: float(value) if isinstance(value, (int, float)) else np.nan, np.nan
+            ).to_numpy(np.float64)
+        # 没有给出满分时按10分制
+        scale_values = np.where(np.isnan(scale_values) & scale.isna().to_numpy(), 10, scale_values)
+        valid_scale = scale_values > 0
+        effective = np.where(valid_scale, scale_values, 10)
+        
+        cleaned['rating.scale'] = pd.Series(np.trunc(scale_values), index=frame.index).where(
+            has_rating & valid_scale)
+        for field in RATING_FIELDS:
+            values = DataCleaner._clean_number_column(column(f"rating.{field}"), None, 0, np.inf)
+            cleaned[f"rating.{field}"] = np.where(has_rating & (values <= effective), values, np.nan)
+    
     @staticmethod
     def _clean_text(text: str) -> str:
         """清理文本数据"""
@@ -62,8 +452,7 @@ class DataCleaner:
         text = ' '.join(text.split())
         
         # 移除特殊字符（保留基本标点）
-        import re
-        text = re.sub(r'[^\w\s\-\(\)\.,;:!?\'"\/]', '', text)
+        text = TEXT_STRIP_PATTERN.sub('', text)
         
         return text.strip()
     
@@ -78,8 +467,7 @@ class DataCleaner:
                 return year_int
         
         if isinstance(year, str):
-            import re
-            year_match = re.search(r'\b(19\d{2}|20\d{2})\b', year)
+            year_match = YEAR_PATTERN.search(year)
             if year_match:
                 year_int = int(year_match.group(1))
                 if 1900 <= year_int <= current_year + 2:
@@ -95,48 +483,17 @@ class DataCleaner:
         
         if isinstance(category, str):
             category = category.lower().strip()
-            
-            # 标准化类别名称
-            category_map = {
-                'sportbike': 'sport',
-                'supersport': 'sport',
-                'superbike': 'sport',
-                'streetfighter': 'naked',
-                'standard': 'naked',
-                'dual-sport': 'adventure',
-                'dual sport': 'adventure',
-                'adv': 'adventure',
-                'motocross': 'dirt',
-                'mx': 'dirt',
-                'off-road': 'dirt',
-                'electric': 'electric',
-                'e-bike': 'electric'
-            }
-            
-            return category_map.get(category, category)
+            return CATEGORY_MAP.get(category, category)
         
         return None
     
     @staticmethod
     def _clean_engine_specs(engine_data: Dict[str, Any]) -> Dict[str, Any]:
         """清理发动机规格数据"""
-        cleaned = {}
-        
-        # 清理排量
-        if engine_data.get('displacement'):
-            displacement = DataCleaner._clean_number(engine_data['displacement'])
-            if displacement and 50 <= displacement <= 2500:  # 合理的排量范围
-                cleaned['displacement'] = displacement
-        
-        # 清理缸径和行程
-        for field in ['bore', 'stroke']:
-            if engine_data.get(field):
-                value = DataCleaner._clean_number(engine_data[field])
-                if value and 20 <= value <= 120:  # 合理的缸径/行程范围
-                    cleaned[field] = value
+        cleaned = DataCleaner._clean_ranged(engine_data, NUMERIC_RANGES['engine'])
         
         # 清理文本字段
-        for field in ['type', 'compression_ratio', 'cooling', 'fuel_system']:
+        for field in ENGINE_TEXT_FIELDS:
             if engine_data.get(field):
                 cleaned[field] = DataCleaner._clean_text(str(engine_data[field]))
         
@@ -145,89 +502,17 @@ class DataCleaner:
     @staticmethod
     def _clean_performance(perf_data: Dict[str, Any]) -> Dict[str, Any]:
         """清理性能数据"""
-        cleaned = {}
-        
-        # 功率数据
-        if perf_data.get('power_hp'):
-            hp = DataCleaner._clean_number(perf_data['power_hp'])
-            if hp and 5 <= hp <= 300:  # 合理的功率范围
-                cleaned['power_hp'] = hp
-        
-        if perf_data.get('power_kw'):
-            kw = DataCleaner._clean_number(perf_data['power_kw'])
-            if kw and 3 <= kw <= 250:
-                cleaned['power_kw'] = kw
-        
-        # 扭矩数据
-        if perf_data.get('torque_nm'):
-            nm = DataCleaner._clean_number(perf_data['torque_nm'])
-            if nm and 5 <= nm <= 250:
-                cleaned['torque_nm'] = nm
-        
-        if perf_data.get('torque_lbft'):
-            lbft = DataCleaner._clean_number(perf_data['torque_lbft'])
-            if lbft and 5 <= lbft <= 200:
-                cleaned['torque_lbft'] = lbft
-        
-        # 速度数据
-        if perf_data.get('top_speed_mph'):
-            speed = DataCleaner._clean_number(perf_data['top_speed_mph'])
-            if speed and 30 <= speed <= 250:
-                cleaned['top_speed_mph'] = speed
-        
-        if perf_data.get('top_speed_kmh'):
-            speed = DataCleaner._clean_number(perf_data['top_speed_kmh'])
-            if speed and 50 <= speed <= 400:
-                cleaned['top_speed_kmh'] = speed
-        
-        # 加速数据
-        if perf_data.get('acceleration_0_60'):
-            accel = DataCleaner._clean_number(perf_data['acceleration_0_60'])
-            if accel and 1 <= accel <= 15:
-                cleaned['acceleration_0_60'] = accel
-        
-        if perf_data.get('quarter_mile'):
-            qm = DataCleaner._clean_number(perf_data['quarter_mile'])
-            if qm and 8 <= qm <= 20:
-                cleaned['quarter_mile'] = qm
-        
-        return cleaned
+        return DataCleaner._clean_ranged(perf_data, NUMERIC_RANGES['performance'])
     
     @staticmethod
     def _clean_dimensions(dim_data: Dict[str, Any]) -> Dict[str, Any]:
         """清理尺寸数据"""
-        cleaned = {}
-        
-        # 尺寸范围验证
-        ranges = {
-            'length': (1500, 3000),      # mm
-            'width': (600, 1200),        # mm
-            'height': (800, 1800),       # mm
-            'wheelbase': (1200, 2000),   # mm
-            'ground_clearance': (100, 300), # mm
-            'seat_height': (600, 900),   # mm
-            'dry_weight': (80, 400),     # kg
-            'wet_weight': (90, 450),     # kg
-            'fuel_capacity': (5, 30)     # L
-        }
-        
-        for field, (min_val, max_val) in ranges.items():
-            if dim_data.get(field):
-                value = DataCleaner._clean_number(dim_data[field])
-                if value and min_val <= value <= max_val:
-                    cleaned[field] = value
-        
-        return cleaned
+        return DataCleaner._clean_ranged(dim_data, NUMERIC_RANGES['dimensions'])
     
     @staticmethod
     def _clean_price(price_data: Dict[str, Any]) -> Dict[str, Any]:
         """清理价格数据"""
-        cleaned = {}
-        
-        if price_data.get('msrp'):
-            price = DataCleaner._clean_number(price_data['msrp'])
-            if price and 1000 <= price <= 100000:  # 合理的价格范围
-                cleaned['msrp'] = price
+        cleaned = DataCleaner._clean_ranged(price_data, NUMERIC_RANGES['price'])
         
         if price_data.get('currency'):
             cleaned['currency'] = DataCleaner._clean_text(str(price_data['currency']))
@@ -248,7 +533,7 @@ class DataCleaner:
         else:
             scale = 10  # 默认满分
         
-        for field in ['overall', 'performance', 'comfort', 'build_quality', 'value']:
+        for field in RATING_FIELDS:
             if rating_data.get(field):
                 rating = DataCleaner._clean_number(rating_data[field])
                 if rating and 0 <= rating <= scale:
@@ -257,8 +542,30 @@ class DataCleaner:
         return cleaned
     
     @staticmethod
-    def _clean_number(value: Any) -> Optional[float]:
-        """清理数字数据"""
+    def _clean_ranged(data: Dict[str, Any], ranges: Dict[str, tuple]) -> Dict[str, Any]:
+        """按范围表清理数值字段，超出合理范围的值丢弃"""
+        cleaned = {}
+        
+        for field, (unit, min_val, max_val) in ranges.items():
+            if data.get(field):
+                value = DataCleaner._clean_number(data[field], unit)
+                if value:
+                    value = rescue_unitless_value(value, field, min_val, max_val)
+                if value and min_val <= value <= max_val:
+                    cleaned[field] = value
+        
+        return cleaned
+    
+    @staticmethod
+    def _reconcile_performance(performance: Optional[Dict[str, Any]]) -> List[str]:
+        """补全单条记录的成对性能字段（就地更新），返回不一致的字段对"""
+        if not performance:
+            return []
+        return reconcile_values(performance, NUMERIC_RANGES['performance'])
+    
+    @staticmethod
+    def _clean_number(value: Any, unit: Optional[str] = None) -> Optional[float]:
+        """清理数字数据，指定单位时换算到该单位"""
         if value is None:
             return None
         
@@ -266,20 +573,37 @@ class DataCleaner:
             return float(value)
         
         if isinstance(value, str):
-            import re
-            # 移除货币符号和逗号
-            value = re.sub(r'[$,\s]', '', value)
-            
-            # 查找数字
-            number_match = re.search(r'(\d+(?:\.\d+)?)', value)
-            if number_match:
-                try:
-                    return float(number_match.group(1))
-                except ValueError:
-                    pass
+            if unit:
+                return parse_measure(value, unit)
+            return parse_number(value)
         
         return None
     
+    @staticmethod
+    def _clean_review(review_data: Dict[str, Any]) -> Dict[str, Any]:
+        """清理评测数据"""
+        content = review_data.get('content')
+        if not content or not isinstance(content, str):
+            return {}
+        
+        cleaned = {
+            # 正文保留段落换行，只合并行内空白
+            'content': '\n'.join(' '.join(line.split()) for line in content.splitlines() if line.strip()),
+            'reviewer': DataCleaner._clean_text(review_data.get('reviewer') or ''),
+            'title': DataCleaner._clean_text(review_data.get('title') or ''),
+            'verdict': DataCleaner._clean_text(review_data.get('verdict') or ''),
+            'pros': DataCleaner._clean_features(review_data.get('pros') or []),
+            'cons': DataCleaner._clean_features(review_data.get('cons') or []),
+            'source_url': review_data.get('source_url'),
+        }
+        
+        review_date = review_data.get('review_date')
+        if isinstance(review_date, datetime):
+            review_date = review_date.isoformat()
+        cleaned['review_date'] = review_date
+        
+        return cleaned
+    
     @staticmethod
     def _clean_image_urls(urls: List[str]) -> List[str]:
         """清理图片URL列表"""
@@ -293,7 +617,7 @@ class DataCleaner:
                     any(ext in cleaned_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp'])):
                     cleaned_urls.append(cleaned_url)
         
-        return list(set(cleaned_urls))  # 去重
+        return list(dict.fromkeys(cleaned_urls))  # 按首次出现的顺序去重，结果与哈希种子无关
     
     @staticmethod
     def _clean_features(features: List[str]) -> List[str]:
@@ -306,7 +630,7 @@ class DataCleaner:
                 if 5 <= len(cleaned_feature) <= 200:  # 合理的功能描述长度
                     cleaned_features.append(cleaned_feature)
         
-        return list(set(cleaned_features))  # 去重
+        return list(dict.fromkeys(cleaned_features))  # 按首次出现的顺序去重
     
     @staticmethod
     def _clean_colors(colors: List[str]) -> List[str]:
@@ -319,12 +643,38 @@ class DataCleaner:
                 if 2 <= len(cleaned_color) <= 50:  # 合理的颜色名称长度
                     cleaned_colors.append(cleaned_color)
         
-        return list(set(cleaned_colors))  # 去重
+        return list(dict.fromkeys(cleaned_colors))  # 按首次出现的顺序去重
+
+@dataclass
+class SQLiteProfile:
+    """SQLite连接参数"""
+    journal_mode: str = 'WAL'  # WAL模式下读写互不阻塞
+    synchronous: str = 'NORMAL'  # WAL下NORMAL只在检查点时fsync，断电最多丢失最近的事务
+    mmap_size: int = 256 * 1024 * 1024  # 内存映射读取的字节数
+    cache_size: int = -64 * 1024  # 页缓存大小，负数表示KiB
+    temp_store: str = 'MEMORY'  # 临时表和排序放在内存中
+    busy_timeout: float = 30.0  # 等待写锁的秒数
+    cached_statements: int = 256  # 每个连接缓存的预编译语句数
+    
+    def apply(self, conn: sqlite3.Connection):
+        """在新连接上设置PRAGMA"""
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        conn.execute(f"PRAGMA temp_store = {self.temp_store}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+
+
+# 每次提交都fsync、使用回滚日志，用于不允许丢失任何事务的场景
+DURABLE_PROFILE = SQLiteProfile(journal_mode='DELETE', synchronous='FULL')
 
 class DataStorage:
     """数据存储管理器"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", profile: Optional[SQLiteProfile] = None,
+                 conflict_policy: str = 'overwrite', compress_raw_data: bool = False,
+                 touch_batch_size: int = 500):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
@@ -334,11 +684,63 @@ class DataStorage:
         (self.data_dir / "sqlite").mkdir(exist_ok=True)
         
         self.db_path = self.data_dir / "sqlite" / "motorcycles.db"
+        self.profile = profile or SQLiteProfile()
+        if conflict_policy not in CONFLICT_POLICIES:
+            raise ValueError(f"未知的冲突处理方式: {conflict_policy}")
+        self.conflict_policy = conflict_policy  # 同一车型已存在时的处理方式，见CONFLICT_POLICIES
+        # 是否压缩写入raw_data；读取时总是按值的类型透明解码，压缩与未压缩的行可以混存
+        self.compress_raw_data = compress_raw_data
+        self.codec = RawDataCodec(loader=self._load_dictionary)
+        # 内容未变化的记录只更新last_seen_at，攒够touch_batch_size条再一起写入
+        self.touch_batch_size = max(1, touch_batch_size)
+        self._pending_touches: Dict[int, str] = {}  # 摩托车id → 最后一次见到的时间
+        self._touches_lock = threading.Lock()
+        
+        # sqlite3连接不能跨线程共享，每个线程复用自己的连接
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """返回当前线程的数据库连接，首次调用时创建
+
+        连接长期保持，语句文本固定，sqlite3按文本复用预编译语句
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # 连接只在创建它的线程中使用；关闭可能发生在其他线程，因此关闭同线程检查
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.profile.busy_timeout,
+                check_same_thread=False,
+                cached_statements=self.profile.cached_statements
+            )
+            self.profile.apply(conn)
+            # 查询中读取raw_data（如MotorcycleTable）时经raw_json解码；触发器不依赖它
+            conn.create_function('raw_json', 1, self.codec.decode_json, deterministic=True)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """写入尚未写入的last_seen_at，关闭所有线程的数据库连接"""
+        self.flush_touches()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
+    def read_sql(self, query: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+        """在当前线程的连接上执行只读查询，返回DataFrame（SQL中可使用raw_json解码raw_data）"""
+        return pd.read_sql_query(query, self._connect(), params=params)
+    
     def init_database(self):
         """初始化SQLite数据库"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # 创建主表
@@ -354,6 +756,9 @@ class DataStorage:
                     scraped_at TIMESTAMP,
                     updated_at TIMESTAMP,
                     raw_data TEXT,
+                    msrp REAL,
+                    content_hash TEXT,
+                    last_seen_at TIMESTAMP,
                     UNIQUE(brand, model, year)
                 )
             """)
@@ -406,13 +811,324 @@ class DataStorage:
                 )
             """)
             
+            # 创建评测表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reviews (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    motorcycle_id INTEGER NOT NULL,
+                    reviewer TEXT,
+                    review_date TIMESTAMP,
+                    title TEXT,
+                    content TEXT,
+                    pros TEXT,
+                    cons TEXT,
+                    verdict TEXT,
+                    source_url TEXT,
+                    FOREIGN KEY (motorcycle_id) REFERENCES motorcycles (id),
+                    UNIQUE(motorcycle_id, source_url)
+                )
+            """)
+            
+            # 创建爬取产出统计表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_yield (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    site TEXT NOT NULL,
+                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    pages INTEGER,
+                    record_rate REAL,
+                    title_rate REAL,
+                    specs_rate REAL,
+                    price_rate REAL,
+                    rating_rate REAL,
+                    images_rate REAL,
+                    paused INTEGER DEFAULT 0
+                )
+            """)
+            
             # 创建索引
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_brand_model ON motorcycles (brand, model)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_year ON motorcycles (year)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_category ON motorcycles (category)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawl_yield_site ON crawl_yield (site, recorded_at)")
+            # 早期版本的数据库没有msrp列，从raw_data回填
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(motorcycles)")}
+            if 'msrp' not in columns:
+                cursor.execute("ALTER TABLE motorcycles ADD COLUMN msrp REAL")
+                cursor.execute(f"UPDATE motorcycles SET msrp = json_extract("
+                               f"{RAW_TEXT.format(row='motorcycles')}, '$.price.msrp')")
+            # 没有内容指纹的记录下次保存时照常写入并补上指纹
+            for column, definition in (('content_hash', 'TEXT'), ('last_seen_at', 'TIMESTAMP')):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE motorcycles ADD COLUMN {column} {definition}")
+            
+            # 子表按摩托车id删除和关联
+            for table in CHILD_TABLES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_motorcycle ON {table} (motorcycle_id)")
+            # 规格筛选：子表为 (列, motorcycle_id) 覆盖索引，范围查找不必回表
+            for name, (table, column) in SPEC_FILTERS.items():
+                if table == 'motorcycles':
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{column} ON motorcycles ({column})")
+                else:
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column}, motorcycle_id)")
+            
+            # raw_data压缩字典，编码结果的头部记录所用字典的id
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS raw_dictionaries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    compression TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            for dictionary_id, compression, data in cursor.execute(
+                    "SELECT id, compression, data FROM raw_dictionaries ORDER BY id"):
+                self.codec.add_dictionary(dictionary_id, compression.encode('ascii'), data)
+            
+            self.full_text_enabled = self._init_full_text(cursor)
+            self._init_statistics(cursor)
             
             conn.commit()
     
+    def _load_dictionary(self, dictionary_id: int) -> Optional[tuple]:
+        """读取其他进程新训练的压缩字典（解码时遇到未知字典id调用）
+
+        可能在SQL函数raw_json中被调用，因此使用单独的连接
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.profile.busy_timeout)
+        try:
+            row = conn.execute("SELECT compression, data FROM raw_dictionaries WHERE id = ?",
+                               (dictionary_id,)).fetchone()
+        finally:
+            conn.close()
+        return (row[0].encode('ascii'), row[1]) if row else None
+    
+    def _encode_raw(self, record: Dict[str, Any]) -> Union[bytes, str]:
+        """按设置把记录编码为写入raw_data的值"""
+        if self.compress_raw_data:
+            return self.codec.encode(record)
+        return json.dumps(record)
+    
+    def _decode_raw(self, value: Union[bytes, str, None]) -> Optional[Dict[str, Any]]:
+        """解码raw_data，无法解码时返回None"""
+        try:
+            return self.codec.decode(value)
+        except (TypeError, ValueError, RuntimeError, zlib.error):
+            return None
+    
+    def _index_full_text(self, cursor, items: List[tuple]):
+        """写入压缩记录的描述和特性索引，items为 (摩托车id, 记录) 列表；触发器在SQL中读不出BLOB"""
+        if not self.full_text_enabled or not items:
+            return
+        cursor.executemany("UPDATE motorcycles_fts SET description = ?, features = ? WHERE rowid = ?", [
+            (data.get('description'), ' '.join(map(str, data.get('features') or [])) or None, motorcycle_id)
+            for motorcycle_id, data in items
+        ])
+    
+    @staticmethod
+    def _init_full_text(cursor) -> bool:
+        """创建FTS5全文索引和同步触发器，索引新建时从已有数据填充；SQLite未编译FTS5时返回False"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'motorcycles_fts'").fetchone()
+        try:
+            # 为前两三个字符的前缀建立索引，前缀查询不必扫描整个词表
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS motorcycles_fts USING fts5(
+                    {', '.join(FULL_TEXT_COLUMNS)},
+                    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False
+        
+        columns = ', '.join(FULL_TEXT_COLUMNS)
+        new_values = ', '.join(_full_text_value(expression, 'new') for expression, _ in FULL_TEXT_COLUMNS.values())
+        # raw_data为BLOB时保留索引中已有的描述和特性（由Python写入），其余列按新值更新
+        assignments = ', '.join(
+            f"{name} = CASE WHEN typeof(new.raw_data) = 'blob' THEN {name} ELSE {_full_text_value(expression, 'new')} END"
+            if '{raw}' in expression else f"{name} = {_full_text_value(expression, 'new')}"
+            for name, (expression, _) in FULL_TEXT_COLUMNS.items()
+        )
+        # 取值表达式可能随版本变化，每次打开时重建触发器
+        for trigger in ('insert', 'delete', 'update'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS motorcycles_fts_{trigger}")
+        cursor.execute(f"""
+            CREATE TRIGGER motorcycles_fts_insert AFTER INSERT ON motorcycles BEGIN
+                INSERT INTO motorcycles_fts (rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER motorcycles_fts_delete AFTER DELETE ON motorcycles BEGIN
+                DELETE FROM motorcycles_fts WHERE rowid = old.id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER motorcycles_fts_update
+            AFTER UPDATE OF brand, model, category, raw_data ON motorcycles BEGIN
+                UPDATE motorcycles_fts SET {assignments} WHERE rowid = new.id;
+            END
+        """)
+        
+        if not exists:
+            row_values = ', '.join(_full_text_value(expression, 'motorcycles') for expression, _ in FULL_TEXT_COLUMNS.values())
+            cursor.execute(f"INSERT INTO motorcycles_fts (rowid, {columns}) SELECT id, {row_values} FROM motorcycles")
+        return True
+    
+    def _init_statistics(self, cursor):
+        """创建统计表和维护它们的触发器，统计表新建时从已有数据计算"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spec_summary'").fetchone()
+        
+        for table, columns in COUNT_TABLES.items():
+            definitions = ', '.join(f"{column} {'INTEGER' if column == 'year' else 'TEXT'}" for column in columns)
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {definitions}, count INTEGER NOT NULL, PRIMARY KEY ({', '.join(columns)})
+                ) WITHOUT ROWID
+            """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spec_summary (
+                category TEXT, metric TEXT, count INTEGER NOT NULL, total REAL NOT NULL,
+                min_value REAL, max_value REAL,
+                stale INTEGER NOT NULL DEFAULT 0,  -- 最小或最大值已移出，需要重新查询
+                PRIMARY KEY (category, metric)
+            ) WITHOUT ROWID
+        """)
+        
+        power_category = "(SELECT category FROM motorcycles WHERE id = {row}.motorcycle_id)"
+        power_of = "(SELECT power_hp FROM performance WHERE motorcycle_id = {row}.id)"
+        triggers = {
+            # 删除摩托车时先删除子表数据，子表触发器此时仍能查到所属类别
+            'motorcycles_children_delete': ('BEFORE DELETE ON motorcycles', [
+                f"DELETE FROM {table} WHERE motorcycle_id = old.id;" for table in CHILD_TABLES
+            ]),
+            'motorcycles_stats_insert': ('AFTER INSERT ON motorcycles', [
+                *(_count_sql(table, columns, 'new', 1) for table, columns in COUNT_TABLES.items()),
+                _summary_add_sql('msrp', 'new.category', 'new.msrp'),
+            ]),
+            'motorcycles_stats_delete': ('AFTER DELETE ON motorcycles', [
+                *(_count_sql(table, columns, 'old', -1) for table, columns in COUNT_TABLES.items()),
+                _summary_remove_sql('msrp', 'old.category', 'old.msrp'),
+            ]),
+            # 更新按列拆分，只有相关的列变化时才调整对应的统计，避免无关更新把类别标记为stale
+            'motorcycles_stats_update': (
+                'AFTER UPDATE OF brand, year, category ON motorcycles '
+                'WHEN old.brand IS NOT new.brand OR old.year IS NOT new.year OR old.category IS NOT new.category', [
+                    *(_count_sql(table, columns, 'old', -1) for table, columns in COUNT_TABLES.items()),
+                    *(_count_sql(table, columns, 'new', 1) for table, columns in COUNT_TABLES.items()),
+                ]),
+            'motorcycles_msrp_update': (
+                'AFTER UPDATE OF category, msrp ON motorcycles '
+                'WHEN old.category IS NOT new.category OR old.msrp IS NOT new.msrp', [
+                    _summary_remove_sql('msrp', 'old.category', 'old.msrp'),
+                    _summary_add_sql('msrp', 'new.category', 'new.msrp'),
+                ]),
+            # 类别变化时已有的功率数据转到新类别
+            'motorcycles_power_update': (
+                'AFTER UPDATE OF category ON motorcycles WHEN old.category IS NOT new.category', [
+                    _summary_remove_sql('power_hp', 'old.category', power_of.format(row='new')),
+                    _summary_add_sql('power_hp', 'new.category', power_of.format(row='new')),
+                ]),
+            'performance_stats_insert': ('AFTER INSERT ON performance', [
+                _summary_add_sql('power_hp', power_category.format(row='new'), 'new.power_hp'),
+            ]),
+            'performance_stats_delete': ('AFTER DELETE ON performance', [
+                _summary_remove_sql('power_hp', power_category.format(row='old'), 'old.power_hp'),
+            ]),
+            'performance_stats_update': (
+                'AFTER UPDATE OF motorcycle_id, power_hp ON performance '
+                'WHEN old.power_hp IS NOT new.power_hp OR old.motorcycle_id IS NOT new.motorcycle_id', [
+                _summary_remove_sql('power_hp', power_category.format(row='old'), 'old.power_hp'),
+                _summary_add_sql('power_hp', power_category.format(row='new'), 'new.power_hp'),
+            ]),
+        }
+        # 触发器定义可能随版本变化，每次打开时重建
+        for name, (event, statements) in triggers.items():
+            body = '\n'.join(statements)
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN\n{body}\nEND")
+        
+        if not exists:
+            self._rebuild_statistics(cursor)
+    
+    def rebuild_statistics(self):
+        """从数据重新计算全部统计表（统计表与数据不一致时使用，如绕过触发器导入了数据）"""
+        with self._connect() as conn:
+            self._rebuild_statistics(conn.cursor())
+    
+    @staticmethod
+    def _rebuild_statistics(cursor):
+        for table, columns in COUNT_TABLES.items():
+            names = ', '.join(columns)
+            not_null = ' AND '.join(f"{column} IS NOT NULL" for column in columns)
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"""
+                INSERT INTO {table} ({names}, count)
+                SELECT {names}, COUNT(*) FROM motorcycles WHERE {not_null} GROUP BY {names}
+            """)
+        
+        cursor.execute("DELETE FROM spec_summary")
+        for metric in SUMMARY_METRICS:
+            cursor.execute(f"""
+                INSERT INTO spec_summary (category, metric, count, total, min_value, max_value)
+                SELECT category, ?, COUNT(value), SUM(value), MIN(value), MAX(value)
+                FROM ({_metric_values_sql(metric)})
+                WHERE category IS NOT NULL AND value IS NOT NULL
+                GROUP BY category
+            """, (metric,))
+
+    def compact_raw_data(self, sample_size: int = 2000, batch_size: int = 1000,
+                         vacuum: bool = True) -> Dict[str, int]:
+        """用抽样记录训练新的压缩字典，按新字典重写全部raw_data，然后VACUUM回收空间
+
+        之后的写入是否压缩仍由compress_raw_data决定。返回 {'rows', 'dictionary_id', 'bytes_before', 'bytes_after'}
+        """
+        conn = self._connect()
+        size_sql = "SELECT COALESCE(SUM(length(CAST(raw_data AS BLOB))), 0) FROM motorcycles"
+        bytes_before = conn.execute(size_sql).fetchone()[0]
+        samples = [self._decode_raw(raw_data) for raw_data, in conn.execute(
+            "SELECT raw_data FROM motorcycles ORDER BY random() LIMIT ?", (sample_size,))]
+        samples = [sample for sample in samples if sample is not None]
+        if not samples:
+            return {'rows': 0, 'dictionary_id': self.codec.dictionary_id,
+                    'bytes_before': bytes_before, 'bytes_after': bytes_before}
+
+        with conn:
+            dictionary = self.codec.train(samples)
+            dictionary_id = conn.execute(
+                "INSERT INTO raw_dictionaries (compression, data) VALUES (?, ?) RETURNING id",
+                (self.codec.compression.decode('ascii'), dictionary)
+            ).fetchone()[0]
+        self.codec.add_dictionary(dictionary_id, self.codec.compression, dictionary)
+
+        # 按id分批重写，每批一个事务，不长时间持有写锁
+        rows = 0
+        last_id = 0
+        while True:
+            batch = conn.execute(
+                "SELECT id, raw_data FROM motorcycles WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            ).fetchall()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            updates = []
+            indexed = []
+            for motorcycle_id, raw_data in batch:
+                data = self._decode_raw(raw_data)
+                if data is not None:
+                    updates.append((self.codec.encode(data), motorcycle_id))
+                    indexed.append((motorcycle_id, data))
+            with conn:
+                conn.executemany("UPDATE motorcycles SET raw_data = ? WHERE id = ?", updates)
+                self._index_full_text(conn.cursor(), indexed)
+            rows += len(updates)
+
+        if vacuum:
+            conn.execute("VACUUM")
+        return {'rows': rows, 'dictionary_id': dictionary_id,
+                'bytes_before': bytes_before, 'bytes_after': conn.execute(size_sql).fetchone()[0]}
+
     def generate_data_hash(self, data: Dict[str, Any]) -> str:
         """生成数据哈希值用于去重"""
         # 创建用于哈希的关键字段
@@ -426,145 +1142,265 @@ class DataStorage:
         key_string = json.dumps(key_fields, sort_keys=True)
         return hashlib.md5(key_string.encode()).hexdigest()
     
+    @staticmethod
+    def generate_content_hash(data: Dict[str, Any], policy: str = 'overwrite') -> str:
+        """生成内容指纹（不含抓取时间），与已保存的指纹相同时跳过写入
+
+        merge写入的结果是合并后的内容而不是这条记录本身，指纹与其他策略区分，
+        之后用overwrite写入同一记录时不会被误判为未变化
+        """
+        content = {key: value for key, value in data.items() if key not in CONTENT_HASH_EXCLUDED}
+        key_string = json.dumps([policy == 'merge', content], sort_keys=True, default=str)
+        return hashlib.md5(key_string.encode()).hexdigest()
+    
+    def flush_touches(self):
+        """写入尚未写入的last_seen_at"""
+        with self._touches_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+        if touches:
+            with self._connect() as conn:
+                self._write_touches(conn.cursor(), touches)
+    
+    @staticmethod
+    def _write_touches(cursor, touches: Dict[int, str]):
+        cursor.executemany("UPDATE motorcycles SET last_seen_at = ? WHERE id = ?",
+                           [(seen_at, motorcycle_id) for motorcycle_id, seen_at in touches.items()])
+    
     def save_motorcycle(self, data: Dict[str, Any]) -> bool:
         """保存摩托车数据到数据库"""
+        result = self.save_motorcycles([data])[0]
+        if not result['success']:
+            print(f"保存数据失败: {result['error']}")
+        return result['success']
+    
+    def save_motorcycles(self, records: List[Dict[str, Any]], policy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """批量保存摩托车数据
+        
+        先逐条清理，整批一次查出已有记录的id和内容指纹，
+        再在一个事务内逐条执行 INSERT ... ON CONFLICT DO UPDATE ... RETURNING，
+        每条记录一次往返即得到id；同一车型（品牌、型号、年份）已存在时按policy处理，
+        默认使用构造时的conflict_policy。子表和评测用executemany写入。
+        内容指纹与已保存的相同时不重写记录和子表，只在攒够一批后更新last_seen_at。
+        返回与输入一一对应的 {'success': bool, 'id': int, 'error': str, 'unchanged': bool}
+        """
+        policy = policy or self.conflict_policy
+        if policy not in CONFLICT_POLICIES:
+            raise ValueError(f"未知的冲突处理方式: {policy}")
+        upsert_sql = f"""
+            INSERT INTO motorcycles (
+                data_hash, brand, model, year, category, 
+                source_url, scraped_at, updated_at, raw_data, msrp, content_hash, last_seen_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(brand, model, year) DO UPDATE {CONFLICT_POLICIES[policy]}
+            RETURNING id
+        """
+        results = [{'success': False, 'id': None, 'error': None, 'unchanged': False} for _ in records]
+        
+        # (输入下标, 清理后的数据, 内容指纹, 评测)
+        prepared = []
+        for i, data in enumerate(records):
+            try:
+                cleaned_data = DataCleaner.clean_motorcycle_data(data)
+                content_hash = self.generate_content_hash(cleaned_data, policy)  # 包含评测
+                # 评测正文单独存入reviews表，不重复写入raw_data
+                review = cleaned_data.pop('review', None)
+            except Exception as e:
+                results[i]['error'] = f"{type(e).__name__}: {e}"
+                continue
+            prepared.append((i, cleaned_data, content_hash, review))
+        
+        if not prepared:
+            return results
+        
         try:
-            # 清理数据
-            cleaned_data = DataCleaner.clean_motorcycle_data(data)
-            data_hash = self.generate_data_hash(cleaned_data)
-            
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                
-                # 检查是否已存在
-                cursor.execute("SELECT id FROM motorcycles WHERE data_hash = ?", (data_hash,))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # 更新现有记录
-                    motorcycle_id = existing[0]
-                    cursor.execute("""
-                        UPDATE motorcycles 
-                        SET updated_at = CURRENT_TIMESTAMP, raw_data = ?
-                        WHERE id = ?
-                    """, (json.dumps(cleaned_data), motorcycle_id))
-                else:
-                    # 插入新记录
-                    cursor.execute("""
-                        INSERT INTO motorcycles (
-                            data_hash, brand, model, year, category, 
-                            source_url, scraped_at, updated_at, raw_data
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
-                    """, (
-                        data_hash,
-                        cleaned_data.get('brand', ''),
-                        cleaned_data.get('model', ''),
-                        cleaned_data.get('year', 0),
-                        cleaned_data.get('category'),
-                        cleaned_data.get('source_url', ''),
-                        cleaned_data.get('scraped_at'),
-                        json.dumps(cleaned_data)
-                    ))
+                # 摩托车id → 写入子表的数据，同一批内同一车型以最后一次写入的结果为准
+                children: Dict[int, Dict[str, Any]] = {}
+                reviews = []
+                compressed = []  # 写入了压缩raw_data的 (摩托车id, 记录)，全文索引由Python补写
+                touches: Dict[int, str] = {}
+                seen_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')  # 与CURRENT_TIMESTAMP格式相同
+                # (品牌, 型号, 年份) → (id, 内容指纹, raw_data)，整批一次查出，写入后更新供批内重复的车型使用
+                known = self._lookup_existing(cursor, [self._motorcycle_key(data) for _, data, _, _ in prepared],
+                                              with_raw_data=(policy == 'merge'))
+                for i, cleaned_data, content_hash, review in prepared:
+                    # 重新抓取到的内容没有变化：不重写记录和子表，避免整库和WAL随每次重抓翻新
+                    key = self._motorcycle_key(cleaned_data)
+                    existing = known.get(key)
+                    if existing is not None and existing[1] == content_hash:
+                        touches[existing[0]] = seen_at
+                        results[i].update(success=True, id=existing[0], unchanged=True)
+                        continue
                     
-                    motorcycle_id = cursor.lastrowid
-                
-                # 保存相关数据
-                self._save_engine_specs(cursor, motorcycle_id, cleaned_data.get('engine'))
-                self._save_performance(cursor, motorcycle_id, cleaned_data.get('performance'))
-                self._save_dimensions(cursor, motorcycle_id, cleaned_data.get('dimensions'))
+                    data_hash = self.generate_data_hash(cleaned_data)
+                    if policy == 'merge' and existing is not None:
+                        # 已有记录与本条的非空字段合并后整体写入，子表也按合并结果重写
+                        cleaned_data = _merge_patch(self._decode_raw(existing[2]) or {}, _prune_empty(cleaned_data))
+                    try:
+                        raw_data = self._encode_raw(cleaned_data)
+                    except Exception as e:
+                        results[i]['error'] = f"{type(e).__name__}: {e}"
+                        continue
+                    params = self._motorcycle_row(data_hash, cleaned_data, raw_data) + (content_hash,)
+                    try:
+                        row = cursor.execute(upsert_sql, params).fetchone()
+                    except sqlite3.IntegrityError as e:
+                        # 只有这条语句失败，事务继续
+                        results[i]['error'] = f"{type(e).__name__}: {e}"
+                        continue
+                    
+                    if row is None:
+                        # keep_newest：已有记录较新，本条未写入，子表和评测也保持原样
+                        results[i].update(success=True, id=existing[0])
+                        continue
+                    
+                    motorcycle_id = row[0]
+                    known[key] = (motorcycle_id, content_hash, raw_data)
+                    children[motorcycle_id] = cleaned_data
+                    if isinstance(raw_data, bytes):
+                        compressed.append((motorcycle_id, cleaned_data))
+                    results[i].update(success=True, id=motorcycle_id)
+                    reviews.append((motorcycle_id, review))
                 
-                conn.commit()
-                return True
+                self._save_children(cursor, list(children.items()))
+                self._save_reviews(cursor, reviews)
+                self._index_full_text(cursor, compressed)
                 
+                with self._touches_lock:
+                    self._pending_touches.update(touches)
+                    if len(self._pending_touches) < self.touch_batch_size:
+                        touches = {}
+                    else:
+                        touches, self._pending_touches = self._pending_touches, {}
+                self._write_touches(cursor, touches)
+        
         except Exception as e:
-            print(f"保存数据失败: {e}")
-            return False
+            # 整个事务已回滚
+            for i, *_ in prepared:
+                results[i].update(success=False, id=None, error=f"{type(e).__name__}: {e}")
+        return results
     
-    def _save_engine_specs(self, cursor, motorcycle_id: int, engine_data: Optional[Dict]):
-        """保存发动机规格数据"""
-        if not engine_data:
-            return
-        
-        # 删除旧数据
-        cursor.execute("DELETE FROM engine_specs WHERE motorcycle_id = ?", (motorcycle_id,))
-        
-        # 插入新数据
-        cursor.execute("""
-            INSERT INTO engine_specs (
-                motorcycle_id, type, displacement, bore, stroke,
-                compression_ratio, cooling, fuel_system
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            motorcycle_id,
-            engine_data.get('type'),
-            engine_data.get('displacement'),
-            engine_data.get('bore'),
-            engine_data.get('stroke'),
-            engine_data.get('compression_ratio'),
-            engine_data.get('cooling'),
-            engine_data.get('fuel_system')
-        ))
-    
-    def _save_performance(self, cursor, motorcycle_id: int, perf_data: Optional[Dict]):
-        """保存性能数据"""
-        if not perf_data:
-            return
-        
-        cursor.execute("DELETE FROM performance WHERE motorcycle_id = ?", (motorcycle_id,))
-        
-        cursor.execute("""
-            INSERT INTO performance (
-                motorcycle_id, power_hp, power_kw, torque_nm, torque_lbft,
-                top_speed_mph, top_speed_kmh, acceleration_0_60, quarter_mile
+    @staticmethod
+    def _motorcycle_key(cleaned_data: Dict[str, Any]) -> tuple:
+        """车型的唯一键 (品牌, 型号, 年份)"""
+        return cleaned_data.get('brand', ''), cleaned_data.get('model', ''), cleaned_data.get('year', 0)
+    
+    @staticmethod
+    def _lookup_existing(cursor, keys: List[tuple], with_raw_data: bool = False) -> Dict[tuple, tuple]:
+        """查出一批车型已有记录的 (id, 内容指纹, raw_data)，按LOOKUP_CHUNK_SIZE分块与VALUES关联
+
+        不需要raw_data时（非merge）不读取，raw_data位置为None
+        """
+        raw_data = 'm.raw_data' if with_raw_data else 'NULL'
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            values = ', '.join(['(?, ?, ?)'] * len(chunk))
+            rows = cursor.execute(f"""
+                WITH batch (brand, model, year) AS (VALUES {values})
+                SELECT m.brand, m.model, m.year, m.id, m.content_hash, {raw_data}
+                FROM batch JOIN motorcycles m
+                    ON m.brand = batch.brand AND m.model = batch.model AND m.year = batch.year
+            """, [value for key in chunk for value in key])
+            for brand, model, year, *existing in rows:
+                found[(brand, model, year)] = tuple(existing)
+        return found
+    
+    @staticmethod
+    def _motorcycle_row(data_hash: str, cleaned_data: Dict[str, Any], raw_data: Union[bytes, str]) -> tuple:
+        return (
+            data_hash,
+            cleaned_data.get('brand', ''),
+            cleaned_data.get('model', ''),
+            cleaned_data.get('year', 0),
+            cleaned_data.get('category'),
+            cleaned_data.get('source_url', ''),
+            cleaned_data.get('scraped_at'),
+            raw_data,
+            (cleaned_data.get('price') or {}).get('msrp')
+        )
+    
+    def _save_children(self, cursor, items: List[tuple]):
+        """保存发动机、性能和尺寸数据，items为 (摩托车id, 清理后的数据) 列表，先删除这些记录的旧数据"""
+        for table, (key, columns) in CHILD_TABLES.items():
+            # 删除旧数据（按motorcycle_id索引，新记录没有旧数据时只是一次索引查找）
+            cursor.executemany(f"DELETE FROM {table} WHERE motorcycle_id = ?",
+                               [(motorcycle_id,) for motorcycle_id, _ in items])
+            
+            # 插入新数据
+            rows = [
+                (motorcycle_id, *(section.get(column) for column in columns))
+                for motorcycle_id, cleaned_data in items
+                if (section := cleaned_data.get(key))
+            ]
+            placeholders = ', '.join('?' * (len(columns) + 1))
+            cursor.executemany(
+                f"INSERT INTO {table} (motorcycle_id, {', '.join(columns)}) VALUES ({placeholders})", rows)
+    
+    def _save_reviews(self, cursor, items: List[tuple]):
+        """保存评测数据，同一车型同一来源只保留最新一篇"""
+        cursor.executemany("""
+            INSERT OR REPLACE INTO reviews (
+                motorcycle_id, reviewer, review_date, title, content,
+                pros, cons, verdict, source_url
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            motorcycle_id,
-            perf_data.get('power_hp'),
-            perf_data.get('power_kw'),
-            perf_data.get('torque_nm'),
-            perf_data.get('torque_lbft'),
-            perf_data.get('top_speed_mph'),
-            perf_data.get('top_speed_kmh'),
-            perf_data.get('acceleration_0_60'),
-            perf_data.get('quarter_mile')
-        ))
-    
-    def _save_dimensions(self, cursor, motorcycle_id: int, dim_data: Optional[Dict]):
-        """保存尺寸数据"""
-        if not dim_data:
-            return
-        
-        cursor.execute("DELETE FROM dimensions WHERE motorcycle_id = ?", (motorcycle_id,))
+        """, [
+            (
+                motorcycle_id,
+                review.get('reviewer'),
+                review.get('review_date'),
+                review.get('title'),
+                review.get('content'),
+                json.dumps(review.get('pros') or []),
+                json.dumps(review.get('cons') or []),
+                review.get('verdict'),
+                review.get('source_url')
+            )
+            for motorcycle_id, review in items if review
+        ])
+    
+    def get_reviews(self, motorcycle_id: int) -> List[Dict[str, Any]]:
+        """获取摩托车的评测"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            rows = cursor.execute(
+                "SELECT * FROM reviews WHERE motorcycle_id = ? ORDER BY review_date DESC",
+                (motorcycle_id,)
+            ).fetchall()
+        
+        reviews = []
+        for row in rows:
+            review = dict(row)
+            review['pros'] = json.loads(review['pros'] or '[]')
+            review['cons'] = json.loads(review['cons'] or '[]')
+            reviews.append(review)
+        return reviews
+    
+    def save_to_json(self, data: Iterable[Dict[str, Any]], filename: str = None) -> int:
+        """保存数据到JSON文件，返回写入的记录数
         
-        cursor.execute("""
-            INSERT INTO dimensions (
-                motorcycle_id, length, width, height, wheelbase,
-                ground_clearance, seat_height, dry_weight, wet_weight, fuel_capacity
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            motorcycle_id,
-            dim_data.get('length'),
-            dim_data.get('width'),
-            dim_data.get('height'),
-            dim_data.get('wheelbase'),
-            dim_data.get('ground_clearance'),
-            dim_data.get('seat_height'),
-            dim_data.get('dry_weight'),
-            dim_data.get('wet_weight'),
-            dim_data.get('fuel_capacity')
-        ))
-    
-    def save_to_json(self, data: List[Dict[str, Any]], filename: str = None):
-        """保存数据到JSON文件"""
+        data可以是生成器（如iter_motorcycles()），记录逐条写入文件，不在内存中组成完整列表
+        """
         if filename is None:
             filename = f"motorcycles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
         file_path = self.data_dir / "json" / filename
         
+        count = 0
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            f.write('[')
+            for record in data:
+                # 与json.dump(data, indent=2)的输出格式相同
+                f.write(',\n' if count else '\n')
+                f.write(textwrap.indent(json.dumps(record, ensure_ascii=False, indent=2, default=str), '  '))
+                count += 1
+            f.write('\n]' if count else ']')
         
         print(f"数据已保存到: {file_path}")
+        return count
     
     def save_to_csv(self, filename: str = None):
         """导出数据到CSV文件"""
@@ -587,70 +1423,267 @@ class DataStorage:
             LEFT JOIN dimensions d ON m.id = d.motorcycle_id
         """
         
-        with sqlite3.connect(self.db_path) as conn:
-            df = pd.read_sql_query(query, conn)
-            df.to_csv(file_path, index=False, encoding='utf-8')
+        df = self.read_sql(query)
+        df.to_csv(file_path, index=False, encoding='utf-8')
         
         print(f"CSV文件已保存到: {file_path}")
     
     def get_statistics(self) -> Dict[str, Any]:
-        """获取数据统计信息"""
-        with sqlite3.connect(self.db_path) as conn:
+        """获取数据统计信息
+        
+        读取触发器增量维护的统计表，耗时只与品牌、年份、类别的个数有关，与记录数无关；
+        只有最小、最大值被移出的类别需要重新查询一次
+        """
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             stats = {}
             
-            # 总记录数
-            cursor.execute("SELECT COUNT(*) FROM motorcycles")
+            # 总记录数（每条记录恰好计入一个年份）
+            cursor.execute("SELECT COALESCE(SUM(count), 0) FROM stats_by_year")
             stats['total_motorcycles'] = cursor.fetchone()[0]
             
             # 按品牌统计
-            cursor.execute("SELECT brand, COUNT(*) FROM motorcycles GROUP BY brand ORDER BY COUNT(*) DESC")
+            cursor.execute("SELECT brand, count FROM stats_by_brand ORDER BY count DESC")
             stats['by_brand'] = dict(cursor.fetchall())
             
             # 按年份统计
-            cursor.execute("SELECT year, COUNT(*) FROM motorcycles GROUP BY year ORDER BY year DESC")
+            cursor.execute("SELECT year, count FROM stats_by_year ORDER BY year DESC")
             stats['by_year'] = dict(cursor.fetchall())
             
             # 按类别统计
-            cursor.execute("SELECT category, COUNT(*) FROM motorcycles WHERE category IS NOT NULL GROUP BY category ORDER BY COUNT(*) DESC")
+            cursor.execute("SELECT category, count FROM stats_by_category ORDER BY count DESC")
             stats['by_category'] = dict(cursor.fetchall())
             
+            # 按品牌和年份统计
+            stats['by_brand_year'] = {}
+            cursor.execute("SELECT brand, year, count FROM stats_by_brand_year ORDER BY brand, year DESC")
+            for brand, year, count in cursor.fetchall():
+                stats['by_brand_year'].setdefault(brand, {})[year] = count
+            
+            # 各类别的功率、价格汇总，先重新查询过期的最小、最大值（只涉及这些类别，没有过期时不写数据库）
+            stale = {row[0] for row in cursor.execute("SELECT DISTINCT metric FROM spec_summary WHERE stale")}
+            for metric in stale:
+                values = f"SELECT value FROM ({_metric_values_sql(metric)}) WHERE category = spec_summary.category"
+                cursor.execute(f"""
+                    UPDATE spec_summary SET
+                        min_value = (SELECT MIN(value) FROM ({values})),
+                        max_value = (SELECT MAX(value) FROM ({values})),
+                        stale = 0
+                    WHERE stale AND metric = ?
+                """, (metric,))
+            stats['category_specs'] = {}
+            cursor.execute("SELECT category, metric, count, total, min_value, max_value FROM spec_summary")
+            for category, metric, count, total, min_value, max_value in cursor.fetchall():
+                stats['category_specs'].setdefault(category, {})[metric] = {
+                    'count': count, 'min': min_value, 'max': max_value, 'mean': total / count
+                }
+            
             return stats
     
-    def search_motorcycles(self, brand: str = None, model: str = None, 
-                         year: int = None, category: str = None) -> List[Dict[str, Any]]:
-        """搜索摩托车数据"""
-        with sqlite3.connect(self.db_path) as conn:
+    def save_crawl_yield(self, site: str, pages: int, rates: Dict[str, float], paused: bool = False):
+        """保存网站提取命中率快照"""
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO crawl_yield (
+                    site, pages, record_rate, title_rate, specs_rate,
+                    price_rate, rating_rate, images_rate, paused
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                site, pages,
+                rates.get('record'), rates.get('title'), rates.get('specs'),
+                rates.get('price'), rates.get('rating'), rates.get('images'),
+                int(paused)
+            ))
+    
+    def get_crawl_yield(self, site: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """获取提取命中率的历史快照（最新的在前）"""
+        with self._connect() as conn:
             cursor = conn.cursor()
-            
-            query = "SELECT raw_data FROM motorcycles WHERE 1=1"
+            cursor.row_factory = sqlite3.Row
+            query = "SELECT * FROM crawl_yield"
             params = []
-            
-            if brand:
-                query += " AND LOWER(brand) LIKE ?"
-                params.append(f"%{brand.lower()}%")
-            
-            if model:
-                query += " AND LOWER(model) LIKE ?"
-                params.append(f"%{model.lower()}%")
-            
-            if year:
-                query += " AND year = ?"
-                params.append(year)
-            
-            if category:
-                query += " AND LOWER(category) = ?"
-                params.append(category.lower())
-            
+            if site:
+                query += " WHERE site = ?"
+                params.append(site)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(limit)
+            return [dict(row) for row in cursor.execute(query, params)]
+    
+    def load_table(self) -> MotorcycleTable:
+        """把整个目录加载为列式表，用于向量化的过滤、排序和分组统计"""
+        return MotorcycleTable.from_storage(self)
+    
+    def full_text_search(self, query: str, limit: int = 20, prefix: bool = True) -> List[Dict[str, Any]]:
+        """按品牌、型号、类别、描述和特性全文搜索，按bm25相关度排序
+        
+        query中的每个词都必须出现（prefix为True时按前缀匹配，如"pani"匹配Panigale）；
+        返回raw_data记录，附加id和score（越小越相关）。SQLite不支持FTS5时退化为品牌/型号的LIKE查询
+        """
+        terms = SEARCH_TERM_PATTERN.findall(query or '')
+        if not terms:
+            return []
+        
+        with self._connect() as conn:
+            if self.full_text_enabled:
+                # 每个词作为短语加引号，避免AND、NEAR、连字符等被解释为FTS5语法
+                suffix = '*' if prefix else ''
+                match = ' '.join(f'"{term}"{suffix}' for term in terms)
+                weights = ', '.join(str(weight) for _, weight in FULL_TEXT_COLUMNS.values())
+                # 先在索引内排序取前limit条，再关联主表读取raw_data
+                rows = conn.execute(f"""
+                    SELECT m.id, m.raw_data, hits.score
+                    FROM (
+                        SELECT rowid, bm25(motorcycles_fts, {weights}) AS score
+                        FROM motorcycles_fts
+                        WHERE motorcycles_fts MATCH ?
+                        ORDER BY score
+                        LIMIT ?
+                    ) AS hits
+                    JOIN motorcycles m ON m.id = hits.rowid
+                    ORDER BY hits.score
+                """, (match, limit)).fetchall()
+            else:
+                conditions = ' AND '.join(["(LOWER(brand) LIKE ? OR LOWER(model) LIKE ?)"] * len(terms))
+                params = [f"%{term.lower()}%" for term in terms for _ in range(2)]
+                rows = conn.execute(
+                    f"SELECT id, raw_data, 0.0 FROM motorcycles WHERE {conditions} LIMIT ?", (*params, limit)
+                ).fetchall()
+        
+        results = []
+        for motorcycle_id, raw_data, score in rows:
+            data = self._decode_raw(raw_data)
+            if data is None:
+                continue
+            data.update(id=motorcycle_id, score=score)
+            results.append(data)
+        return results
+    
+    def search_by_specs(self, ranges: Optional[Dict[str, tuple]] = None, brand: str = None, category: str = None,
+                        order_by: str = None, descending: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """按规格范围筛选，如 {'power_hp': (100, 150), 'seat_height': (None, 800)}
+        
+        范围为闭区间，None表示不限；字段见SPEC_FILTERS。品牌和类别精确匹配。
+        返回raw_data记录，附加id
+        """
+        query, params = self._spec_query(ranges or {}, brand, category, order_by, descending, limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        results = []
+        for motorcycle_id, raw_data in rows:
+            data = self._decode_raw(raw_data)
+            if data is None:
+                continue
+            data['id'] = motorcycle_id
+            results.append(data)
+        return results
+    
+    @staticmethod
+    def _spec_query(ranges: Dict[str, tuple], brand: Optional[str], category: Optional[str],
+                    order_by: Optional[str], descending: bool, limit: int) -> tuple:
+        """生成规格筛选的SQL和参数"""
+        for name in [*ranges, *([order_by] if order_by else [])]:
+            if name not in SPEC_FILTERS:
+                raise ValueError(f"不支持的规格字段: {name}")
+        
+        def column(name: str) -> str:
+            table, column_name = SPEC_FILTERS[name]
+            return f"{SPEC_TABLE_ALIASES[table]}.{column_name}"
+        
+        # 只保留至少有一端的范围
+        ranges = {name: bounds for name, bounds in ranges.items() if any(bound is not None for bound in bounds)}
+        conditions, params = [], []
+        for name, (min_val, max_val) in ranges.items():
+            if min_val is not None and max_val is not None:
+                conditions.append(f"{column(name)} BETWEEN ? AND ?")
+                params += [min_val, max_val]
+            elif min_val is not None:
+                conditions.append(f"{column(name)} >= ?")
+                params.append(min_val)
+            else:
+                conditions.append(f"{column(name)} <= ?")
+                params.append(max_val)
+        if brand:
+            conditions.append("m.brand = ?")
+            params.append(brand)
+        if category:
+            conditions.append("m.category = ?")
+            params.append(category.lower())
+        
+        # 有筛选条件的子表用内连接，规划器可以从该子表的覆盖索引开始查找；只用于排序的子表用左连接
+        filtered = {SPEC_FILTERS[name][0] for name in ranges}
+        joined = filtered | ({SPEC_FILTERS[order_by][0]} if order_by else set())
+        joins = []
+        for table in CHILD_TABLES:
+            if table in joined:
+                join = 'JOIN' if table in filtered else 'LEFT JOIN'
+                alias = SPEC_TABLE_ALIASES[table]
+                joins.append(f"{join} {table} {alias} ON {alias}.motorcycle_id = m.id")
+        
+        query = f"SELECT m.id, m.raw_data FROM motorcycles m {' '.join(joins)}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if order_by:
+            query += f" ORDER BY {column(order_by)} {'DESC' if descending else 'ASC'}"
+            if order_by not in ranges:
+                query += " NULLS LAST"  # 有范围条件的字段不会为空，不加以便直接按索引顺序读取
+        query += " LIMIT ?"
+        params.append(limit)
+        return query, params
+    
+    def search_motorcycles(self, brand: str = None, model: str = None, 
+                         year: int = None, category: str = None) -> List[Dict[str, Any]]:
+        """搜索摩托车数据（一次返回全部结果，大结果集请用iter_motorcycles）"""
+        return list(self.iter_motorcycles(brand=brand, model=model, year=year, category=category))
+    
+    def iter_motorcycles(self, brand: str = None, model: str = None, year: int = None, category: str = None,
+                         after_id: int = None, limit: int = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """按id顺序逐条产出摩托车数据，附加id
+        
+        结果用fetchmany分批读取，raw_data在产出时才解析，内存占用与结果集大小无关。
+        分页时把上一页最后一条的id作为after_id（键集分页），按主键定位，翻到多深都不变慢
+        """
+        query = "SELECT id, raw_data FROM motorcycles WHERE 1=1"
+        params = []
+        
+        if brand:
+            query += " AND LOWER(brand) LIKE ?"
+            params.append(f"%{brand.lower()}%")
+        
+        if model:
+            query += " AND LOWER(model) LIKE ?"
+            params.append(f"%{model.lower()}%")
+        
+        if year:
+            query += " AND year = ?"
+            params.append(year)
+        
+        if category:
+            query += " AND LOWER(category) = ?"
+            params.append(category.lower())
+        
+        if after_id is not None:
+            query += " AND id > ?"
+            params.append(after_id)
+        
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor = self._connect().cursor()
+        try:
             cursor.execute(query, params)
-            results = []
-            
-            for row in cursor.fetchall():
-                try:
-                    data = json.loads(row[0])
-                    results.append(data)
-                except json.JSONDecodeError:
-                    continue
-            
-            return results
\ No newline at end of file
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for motorcycle_id, raw_data in rows:
+                    data = self._decode_raw(raw_data)
+                    if data is None:
+                        continue
+                    data['id'] = motorcycle_id
+                    yield data
+        finally:
+            cursor.close()
\ No newline at end of file
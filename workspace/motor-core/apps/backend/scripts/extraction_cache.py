@@ -0,0 +1,108 @@
+"""
+提取结果缓存
+
+以(标准化后的页面内容哈希, 爬虫名, 提取器版本)为键持久化提取结果。
+重复抓取时内容未变的页面直接返回缓存，提升某个爬虫的版本号只会使该爬虫的缓存失效
+"""
+
+import hashlib
+import pickle
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+WHITESPACE = re.compile(r'\s+')
+INTER_TAG_WHITESPACE = re.compile(r'>\s+<')
+
+# 区分"缓存未命中"和"缓存的结果为None"
+MISS = object()
+
+
+def content_hash(html: str) -> str:
+    """计算标准化（去掉标签间空白、合并空白）后的页面内容哈希"""
+    normalized = WHITESPACE.sub(' ', INTER_TAG_WHITESPACE.sub('><', html)).strip()
+    return hashlib.sha256(normalized.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class ExtractionCache:
+    """基于SQLite的提取结果缓存"""
+
+    def __init__(self, db_path: str = "data/extraction_cache.db", busy_timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        # 缓存查询非常频繁，复用一个连接，由锁保证线程安全
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=busy_timeout, check_same_thread=False)
+        # 各解析进程各自打开同一个缓存文件：WAL下读写互不阻塞，写入只在提交时短暂持有锁
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._init_table()
+
+    def _init_table(self):
+        """初始化缓存表"""
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    content_hash TEXT NOT NULL,
+                    scraper TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    record BLOB,
+                    created_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (content_hash, scraper, version)
+                ) WITHOUT ROWID
+            ''')
+
+    def get(self, key: str, scraper: str, version: int) -> Any:
+        """查询缓存，未命中时返回MISS"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT record FROM extraction_cache WHERE content_hash = ? AND scraper = ? AND version = ?',
+                (key, scraper, version)
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return MISS
+
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key: str, scraper: str, version: int, record: Optional[Dict[str, Any]]):
+        """写入缓存"""
+        blob = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO extraction_cache VALUES (?, ?, ?, ?, ?)',
+                (key, scraper, version, blob, datetime.now().isoformat())
+            )
+
+    def purge_stale(self, scraper: str, version: int) -> int:
+        """删除某个爬虫旧版本的缓存，返回删除的条数"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM extraction_cache WHERE scraper = ? AND version != ?',
+                (scraper, version)
+            )
+        return cursor.rowcount
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM extraction_cache')
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM extraction_cache').fetchone()[0]
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """关闭连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,183 @@
+"""
+多模式关键词匹配
+
+基于Aho-Corasick自动机，一次线性扫描即可找出文本中的所有品牌、别名和类别关键词
+"""
+
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Iterable, NamedTuple
+
+
+class KeywordMatch(NamedTuple):
+    """单个关键词匹配结果"""
+    start: int  # 起始位置
+    end: int  # 结束位置（不含）
+    keyword: str  # 命中的关键词（小写）
+    label: Any  # 关键词对应的标签
+
+
+class KeywordAutomaton:
+    """Aho-Corasick多模式匹配自动机
+
+    构建完成后只读，可在多个爬虫实例之间共享
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]], word_boundary: bool = True):
+        self.word_boundary = word_boundary
+        # 每个节点: 转移表、失败指针、输出列表
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Any]]] = [[]]
+
+        for keyword, label in patterns:
+            self._add_pattern(keyword.lower(), label)
+        self._build_failure_links()
+
+    def _add_pattern(self, keyword: str, label: Any):
+        """向字典树中添加一个模式"""
+        if not keyword:
+            return
+
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((keyword, label))
+
+    def _build_failure_links(self):
+        """广度优先构建失败指针，并合并输出"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """一次扫描返回所有匹配（按结束位置排序）"""
+        if not text:
+            return []
+
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        node = 0
+
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for keyword, label in output[node]:
+                end = index + 1
+                start = end - len(keyword)
+                if self.word_boundary and not self._at_boundary(text, start, end):
+                    continue
+                matches.append(KeywordMatch(start, end, keyword, label))
+
+        return matches
+
+    @staticmethod
+    def _at_boundary(text: str, start: int, end: int) -> bool:
+        """判断匹配两侧是否为单词边界"""
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            return False
+        return True
+
+
+# 品牌及其常见写法，别名映射到标准品牌名
+MOTORCYCLE_BRANDS = [
+    'Honda', 'Yamaha', 'Kawasaki', 'Suzuki', 'Ducati', 'BMW', 'KTM',
+    'Aprilia', 'Triumph', 'Harley-Davidson', 'Indian', 'MV Agusta',
+    'Benelli', 'CFMoto', 'Royal Enfield', 'Husqvarna', 'Beta',
+    'Sherco', 'GasGas', 'TM Racing', 'Zero', 'Energica', 'Lightning'
+]
+
+BRAND_ALIASES = {
+    'harley davidson': 'Harley-Davidson',
+    'harley': 'Harley-Davidson',
+    'h-d': 'Harley-Davidson',
+    'mv-agusta': 'MV Agusta',
+    'cf moto': 'CFMoto',
+    'cf-moto': 'CFMoto',
+    'royal-enfield': 'Royal Enfield',
+    'gas gas': 'GasGas',
+    'gas-gas': 'GasGas',
+    'zero motorcycles': 'Zero',
+}
+
+# 类别关键词，一个关键词可以同时属于多个类别
+CATEGORY_KEYWORDS = {
+    'sport': ['sport', 'supersport', 'sportbike', 'sport bike', 'superbike', 'racing', 'track', 'racetrack', 'circuit'],
+    'cruiser': ['cruiser', 'touring', 'comfortable', 'highway', 'bagger', 'chopper'],
+    'naked': ['naked', 'streetfighter', 'standard', 'upright', 'street'],
+    'adventure': ['adventure', 'dual-sport', 'dual sport', 'off-road', 'enduro', 'adv', 'travel'],
+    'dirt': ['motocross', 'mx', 'dirt', 'off-road', 'enduro', 'trail'],
+    'scooter': ['scooter', 'automatic', 'cvt', 'twist-and-go'],
+    'electric': ['electric', 'battery', 'zero emissions', 'e-bike']
+}
+
+
+def _brand_patterns() -> List[Tuple[str, str]]:
+    patterns = [(brand, brand) for brand in MOTORCYCLE_BRANDS]
+    patterns.extend(BRAND_ALIASES.items())
+    return patterns
+
+
+def _category_patterns() -> List[Tuple[str, str]]:
+    return [
+        (keyword, category)
+        for category, keywords in CATEGORY_KEYWORDS.items()
+        for keyword in keywords
+    ]
+
+
+# 模块加载时构建一次，所有爬虫共享
+BRAND_AUTOMATON = KeywordAutomaton(_brand_patterns())
+CATEGORY_AUTOMATON = KeywordAutomaton(_category_patterns())
+
+
+def find_brand(text: str) -> Optional[KeywordMatch]:
+    """查找文本中的品牌，优先最早出现且最长的匹配"""
+    matches = BRAND_AUTOMATON.find_all(text)
+    if not matches:
+        return None
+    return min(matches, key=lambda m: (m.start, -(m.end - m.start)))
+
+
+def score_categories(text: str) -> Dict[str, int]:
+    """按命中的不同关键词数量为各类别打分"""
+    seen = set()
+    scores: Dict[str, int] = {}
+
+    for match in CATEGORY_AUTOMATON.find_all(text):
+        key = (match.keyword, match.label)
+        if key in seen:
+            continue
+        seen.add(key)
+        scores[match.label] = scores.get(match.label, 0) + 1
+
+    return scores
+
+
+def infer_category(text: str) -> Optional[str]:
+    """返回得分最高的类别"""
+    scores = score_categories(text)
+    if not scores:
+        return None
+    return max(scores.items(), key=lambda x: x[1])[0]
@@ -0,0 +1,139 @@
+"""
+列表页链接分类
+
+一次遍历页面中所有<a href>，解析为绝对URL并规范化，
+再用各网站预编译的正则把链接分为 详情页 / 列表页 / 翻页 / 忽略 四类
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 规范化时去掉的跟踪参数
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'cmpid'}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+DUPLICATE_SLASHES = re.compile(r'/{2,}')
+
+# 各网站通用的忽略规则
+COMMON_IGNORE_PATTERNS = [
+    r'\.(?:jpe?g|png|gif|webp|svg|pdf|xml|rss|zip|mp4)$',
+    r'/(?:tags?|authors?|newsletter|subscribe|privacy(?:-policy)?|terms(?:-of-use)?|contact(?:-us)?|about(?:-us)?|login|register|shop|search|feed)(?:/|$)',
+]
+COMMON_PAGINATION_PATTERNS = [
+    r'[?&](?:page|pg|p)=\d+',
+    r'/page/\d+/?$',
+]
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """规范化URL：小写协议和域名、去掉默认端口、片段、跟踪参数和多余斜杠，查询参数排序"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port and str(port) != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = DUPLICATE_SLASHES.sub('/', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = ''
+    if parts.query:
+        params = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+@dataclass
+class LinkBuckets:
+    """分类后的链接（均已去重，保持页面中的出现顺序）"""
+    detail: List[str] = field(default_factory=list)  # 摩托车详情页
+    listing: List[str] = field(default_factory=list)  # 列表/分类页
+    pagination: List[str] = field(default_factory=list)  # 当前列表的翻页
+    ignored: int = 0  # 被忽略或不属于本站的链接数
+
+
+class LinkClassifier:
+    """单个网站的链接分类器，构建后只读，可在实例间共享"""
+
+    def __init__(self, domain: str, detail: Iterable[str], listing: Iterable[str] = (),
+                 pagination: Iterable[str] = (), ignore: Iterable[str] = ()):
+        self.domain = domain.lower()
+        self.ignore_pattern = self._compile(list(COMMON_IGNORE_PATTERNS) + list(ignore))
+        self.pagination_pattern = self._compile(list(COMMON_PAGINATION_PATTERNS) + list(pagination))
+        self.detail_pattern = self._compile(detail)
+        self.listing_pattern = self._compile(listing)
+
+    @staticmethod
+    def _compile(patterns: Iterable[str]) -> Optional[re.Pattern]:
+        patterns = list(patterns)
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+    def is_own_domain(self, host: str) -> bool:
+        """判断域名是否属于本站（含子域名）"""
+        host = host.split(':', 1)[0]
+        return host == self.domain or host.endswith('.' + self.domain)
+
+    def classify_url(self, url: str) -> Optional[str]:
+        """对规范化后的URL分类，返回 detail / listing / pagination，忽略时返回None"""
+        parts = urlsplit(url)
+        if not self.is_own_domain(parts.netloc):
+            return None
+
+        target = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        # 按优先级匹配：忽略 > 翻页 > 详情 > 列表
+        if self.ignore_pattern and self.ignore_pattern.search(target):
+            return None
+        if self.pagination_pattern and self.pagination_pattern.search(target):
+            return 'pagination'
+        if self.detail_pattern and self.detail_pattern.search(target):
+            return 'detail'
+        if self.listing_pattern and self.listing_pattern.search(target):
+            return 'listing'
+        return None
+
+    def classify(self, soup, base_url: str) -> LinkBuckets:
+        """一次遍历页面中的所有链接并分类"""
+        buckets = LinkBuckets()
+        seen = set()
+        base_canonical = canonicalize_url(base_url)
+
+        for link in soup.find_all('a', href=True):
+            href = link['href'].strip()
+            if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                buckets.ignored += 1
+                continue
+
+            url = canonicalize_url(urljoin(base_url, href))
+            if url is None or url == base_canonical or url in seen:
+                if url is None:
+                    buckets.ignored += 1
+                continue
+            seen.add(url)
+
+            kind = self.classify_url(url)
+            if kind is None:
+                buckets.ignored += 1
+            else:
+                getattr(buckets, kind).append(url)
+
+        return buckets
@@ -6,15 +6,21 @@
 
 import sys
 import argparse
+import itertools
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import time
+from collections import deque
 
 from scraper_base import ScrapingConfig
 from cycleworld_scraper import CycleWorldScraper
 from motorcycle_com_scraper import MotorcycleDotComScraper
 from data_manager import DataStorage
+from storage_writer import StorageWriter
+from parse_pool import ParsePool, RawPage
+from memory_guard import MemoryGuard
+from yield_monitor import YieldMonitor
 
 
 class MotorcycleScraper:
@@ -22,13 +28,47 @@ class MotorcycleScraper:
     
     def __init__(self, config: ScrapingConfig = None):
         self.config = config or ScrapingConfig()
-        self.storage = DataStorage()
+        self.storage = DataStorage(conflict_policy=self.config.conflict_policy,
+                                   compress_raw_data=self.config.compress_raw_data)
         self.scrapers = {
             'cycleworld': CycleWorldScraper(self.config),
             'motorcycle_com': MotorcycleDotComScraper(self.config)
         }
         
+        # 解析进程池：抓取与HTML解析分离，解析可利用多核
+        self.parse_pool = None
+        if self.config.parse_workers > 0:
+            self.parse_pool = ParsePool(
+                {name: type(scraper) for name, scraper in self.scrapers.items()},
+                self.config,
+                max_workers=self.config.parse_workers,
+                chunk_size=self.config.parse_chunk_size
+            )
+        
         self.setup_logging()
+        
+        # 各网站字段命中率统计，页面结构变化导致产出骤降时暂停该网站
+        self.yield_monitor = YieldMonitor(
+            window=self.config.yield_window,
+            min_pages=min(20, self.config.yield_window),
+            min_yield=self.config.min_yield,
+            storage=self.storage,
+            logger=self.logger
+        )
+        
+        # 后台写入线程：记录按条数或时间窗口合并为事务，抓取线程不等待磁盘写入
+        self.writer = StorageWriter(
+            self.storage,
+            batch_size=self.config.save_batch_size,
+            max_delay=self.config.save_interval,
+            on_result=self._log_save,
+            logger=self.logger
+        )
+        
+        # 长时间爬取时限制主进程内存
+        self.memory_guard = None
+        if self.config.memory_ceiling_mb:
+            self.memory_guard = MemoryGuard(self.config.memory_ceiling_mb, logger=self.logger)
     
     def setup_logging(self):
         """设置日志"""
@@ -45,70 +85,176 @@ class MotorcycleScraper:
     def scrape_website(self, site_name: str, urls: List[str] = None, 
                       categories: List[str] = None) -> List[Dict[str, Any]]:
         """爬取指定网站的数据"""
+        return list(self.iter_website(site_name, urls, categories))
+    
+    def crawl_website(self, site_name: str, urls: List[str] = None) -> int:
+        """长时间爬取模式：结果逐条保存后即丢弃，返回保存的记录数"""
+        count = 0
+        for _ in self.iter_website(site_name, urls):
+            count += 1
+        return count
+    
+    def iter_website(self, site_name: str, urls: List[str] = None,
+                     categories: List[str] = None) -> Iterator[Dict[str, Any]]:
+        """爬取指定网站的数据，逐条产出结果而不在内存中累积"""
         if site_name not in self.scrapers:
             self.logger.error(f"不支持的网站: {site_name}")
-            return []
+            return
+        
+        if self.yield_monitor.should_pause(site_name):
+            self.logger.warning(f"{site_name} 已因产出过低暂停: {self.yield_monitor.paused[site_name]}")
+            return
         
         scraper = self.scrapers[site_name]
-        results = []
+        count = 0
         
         try:
+            if not urls:
+                # 自动发现并爬取摩托车页面
+                urls = self._discover_urls(site_name, scraper)
+            
             if urls:
                 # 爬取指定URL列表
                 self.logger.info(f"开始爬取 {site_name} 的 {len(urls)} 个URL")
                 
-                for i, url in enumerate(urls, 1):
-                    self.logger.info(f"正在爬取 ({i}/{len(urls)}): {url}")
-                    
-                    try:
-                        data = scraper.scrape_page(url)
+                if self.parse_pool is not None:
+                    # 抓取的原始页面交给解析进程池，边抓取边解析
+                    pages = self._fetch_raw_pages(site_name, scraper, urls)
+                    for result in self.parse_pool.extract_many(pages):
+                        if result.error:
+                            self.logger.error(f"解析页面失败 {result.url}: {result.error}")
+                            continue
+                        # 只统计成功抓取并解析的页面，网络故障不计入产出
+                        self.yield_monitor.observe(site_name, result.record)
+                        if result.record:
+                            self._save_record(result.record, result.url)
+                            count += 1
+                            yield result.record
+                        else:
+                            self.logger.warning(f"未能提取数据: {result.url}")
+                        self._check_memory()
+                        if self.yield_monitor.should_pause(site_name):
+                            break
+                else:
+                    for i, url in enumerate(urls, 1):
+                        self.logger.info(f"正在爬取 ({i}/{len(urls)}): {url}")
+                        
+                        try:
+                            response = scraper.get(url)
+                        except Exception as e:
+                            self.logger.error(f"抓取页面失败 {url}: {e}")
+                            continue
+                        if not response:
+                            continue
+                        
+                        try:
+                            data = scraper.extract_from_html(response.text, url)
+                        except Exception as e:
+                            self.logger.error(f"解析页面失败 {url}: {e}")
+                            continue
+                        
+                        # 只统计成功抓取并解析的页面，网络故障不计入产出
+                        self.yield_monitor.observe(site_name, data)
                         if data:
-                            results.append(data)
-                            # 保存到数据库
-                            if self.storage.save_motorcycle(data):
-                                self.logger.info(f"成功保存数据: {data.get('brand')} {data.get('model')}")
-                            else:
-                                self.logger.warning(f"保存数据失败: {url}")
+                            self._save_record(data, url)
+                            count += 1
+                            yield data
                         else:
                             self.logger.warning(f"未能提取数据: {url}")
-                    
-                    except Exception as e:
-                        self.logger.error(f"爬取页面失败 {url}: {e}")
-                        continue
-                        
-            else:
-                # 自动发现并爬取摩托车页面
-                self.logger.info(f"开始自动发现 {site_name} 的摩托车页面")
-                
-                if site_name == 'cycleworld':
-                    listing_urls = scraper.get_motorcycle_list_urls()
-                elif site_name == 'motorcycle_com':
-                    listing_urls = scraper.get_bike_listing_urls()
-                else:
-                    listing_urls = []
-                
-                discovered_urls = []
-                for listing_url in listing_urls[:3]:  # 限制列表页数量
-                    try:
-                        page_urls = scraper.extract_motorcycle_urls_from_listing(listing_url)
-                        discovered_urls.extend(page_urls)
-                        self.logger.info(f"从 {listing_url} 发现了 {len(page_urls)} 个摩托车页面")
-                    except Exception as e:
-                        self.logger.error(f"获取列表页面失败 {listing_url}: {e}")
-                
-                # 去重并限制数量
-                unique_urls = list(set(discovered_urls))[:50]  # 限制最多50个页面
-                self.logger.info(f"总共发现 {len(unique_urls)} 个唯一的摩托车页面")
-                
-                # 递归调用爬取发现的URL
-                if unique_urls:
-                    results = self.scrape_website(site_name, unique_urls)
+                        self._check_memory()
+                        if self.yield_monitor.should_pause(site_name):
+                            break
         
         except Exception as e:
             self.logger.error(f"爬取网站 {site_name} 时发生错误: {e}")
+        finally:
+            # 提前停止迭代时也写入缓冲中的记录
+            self.flush_saves()
+        
+        self.yield_monitor.persist(site_name)
+        self.logger.info(f"从 {site_name} 完成爬取，获得 {count} 条数据")
+        if scraper.extraction_cache is not None:
+            cache_stats = scraper.extraction_cache.get_statistics()
+            self.logger.info(f"提取缓存: 命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次")
+    
+    def _discover_urls(self, site_name: str, scraper, max_listing_pages: int = 10) -> List[str]:
+        """从列表页自动发现摩托车页面"""
+        self.logger.info(f"开始自动发现 {site_name} 的摩托车页面")
+        
+        if site_name == 'cycleworld':
+            listing_urls = scraper.get_motorcycle_list_urls()
+        elif site_name == 'motorcycle_com':
+            listing_urls = scraper.get_bike_listing_urls()
+        else:
+            listing_urls = []
         
-        self.logger.info(f"从 {site_name} 完成爬取，获得 {len(results)} 条数据")
-        return results
+        discovered_urls = []
+        visited = set()
+        queue = deque(listing_urls[:3])  # 限制入口列表页数量
+        while queue and len(visited) < max_listing_pages:
+            listing_url = queue.popleft()
+            if listing_url in visited:
+                continue
+            visited.add(listing_url)
+            
+            try:
+                links = scraper.discover_links(listing_url)
+                discovered_urls.extend(links.detail)
+                # 翻页链接在同一次遍历中得到，直接加入待抓取队列
+                queue.extend(links.pagination)
+                self.logger.info(f"从 {listing_url} 发现了 {len(links.detail)} 个摩托车页面，{len(links.pagination)} 个翻页链接")
+            except Exception as e:
+                self.logger.error(f"获取列表页面失败 {listing_url}: {e}")
+        
+        # 去重并限制数量
+        unique_urls = list(dict.fromkeys(discovered_urls))[:50]  # 限制最多50个页面
+        self.logger.info(f"总共发现 {len(unique_urls)} 个唯一的摩托车页面")
+        return unique_urls
+    
+    def _check_memory(self):
+        """主进程超过内存上限时限流"""
+        if self.memory_guard is not None:
+            self.memory_guard.throttle()
+    
+    def _fetch_raw_pages(self, site_name: str, scraper, urls: List[str]):
+        """逐个抓取URL，产出原始页面"""
+        for i, url in enumerate(urls, 1):
+            self.logger.info(f"正在抓取 ({i}/{len(urls)}): {url}")
+            try:
+                response = scraper.get(url)
+            except Exception as e:
+                self.logger.error(f"抓取页面失败 {url}: {e}")
+                continue
+            if response:
+                yield RawPage(site_name, url, response.content, response.encoding)
+    
+    def _save_record(self, data: Dict[str, Any], url: str):
+        """交给写入线程保存，写入队列满时阻塞"""
+        self.writer.submit(data, url)
+    
+    def flush_saves(self):
+        """等待已提交的记录全部写入数据库"""
+        self.writer.flush()
+    
+    def _log_save(self, data: Dict[str, Any], url: str, result: Dict[str, Any]):
+        """写入结果回调（在写入线程中调用）"""
+        if result['success'] and result['unchanged']:
+            self.logger.debug(f"内容未变化: {data.get('brand')} {data.get('model')}")
+        elif result['success']:
+            self.logger.info(f"成功保存数据: {data.get('brand')} {data.get('model')}")
+        else:
+            self.logger.warning(f"保存数据失败: {url}: {result['error']}")
+    
+    def close(self):
+        """释放解析进程池、爬虫会话和数据库连接"""
+        # 先写完队列中的记录，再关闭写入线程使用的连接
+        self.writer.close()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+            self.parse_pool = None
+        for scraper in self.scrapers.values():
+            scraper.close()
+        self.storage.close()
     
     def scrape_all_sites(self, max_pages_per_site: int = 25) -> Dict[str, List[Dict[str, Any]]]:
         """爬取所有支持的网站"""
@@ -141,11 +287,12 @@ class MotorcycleScraper:
         
         try:
             if format in ['json', 'all']:
-                # 从数据库获取所有数据
-                all_data = self.storage.search_motorcycles()
-                if all_data:
-                    self.storage.save_to_json(all_data)
-                    self.logger.info(f"JSON导出完成，共 {len(all_data)} 条记录")
+                # 从数据库逐条读取并写入文件，不在内存中累积整张表
+                records = self.storage.iter_motorcycles()
+                first = next(records, None)
+                if first is not None:
+                    count = self.storage.save_to_json(itertools.chain([first], records))
+                    self.logger.info(f"JSON导出完成，共 {count} 条记录")
             
             if format in ['csv', 'all']:
                 self.storage.save_to_csv()
@@ -172,6 +319,21 @@ class MotorcycleScraper:
         print(f"\n按类别分布:")
         for category, count in stats['by_category'].items():
             print(f"  {category}: {count}")
+        
+        print(f"\n按类别的功率/价格:")
+        for category, metrics in stats['category_specs'].items():
+            summaries = [
+                f"{metric} {summary['min']:g}-{summary['max']:g} (平均 {summary['mean']:.1f})"
+                for metric, summary in metrics.items()
+            ]
+            print(f"  {category}: {', '.join(summaries)}")
+    
+    def compact_storage(self):
+        """训练压缩字典并压缩已保存的raw_data"""
+        result = self.storage.compact_raw_data()
+        ratio = result['bytes_before'] / result['bytes_after'] if result['bytes_after'] else 1.0
+        print(f"已压缩 {result['rows']} 条记录的raw_data: "
+              f"{result['bytes_before'] / 1024:.1f}KB → {result['bytes_after'] / 1024:.1f}KB ({ratio:.1f}x)")
 
 def main():
     parser = argparse.ArgumentParser(description="摩托车性能数据爬虫")
@@ -195,6 +357,24 @@ def main():
     parser.add_argument('--timeout', type=int, default=15, 
                        help='请求超时时间（秒）')
     
+    parser.add_argument('--cache', metavar='PATH', default=None,
+                       help='提取结果缓存数据库路径（内容未变化的页面不再重复解析）')
+    
+    parser.add_argument('--parse-workers', type=int, default=0,
+                       help='HTML解析进程数（0表示在主进程内解析）')
+    
+    parser.add_argument('--low-memory', action='store_true',
+                       help='长时间爬取模式：拆除解析树、结果流式保存不在内存中累积')
+    
+    parser.add_argument('--memory-ceiling', type=int, default=0, metavar='MB',
+                       help='进程常驻内存上限（MB），超过时限流或回收解析进程')
+    
+    parser.add_argument('--compress', action='store_true',
+                       help='raw_data压缩后写入数据库')
+    
+    parser.add_argument('--compact', action='store_true',
+                       help='训练压缩字典并压缩已保存的raw_data')
+    
     args = parser.parse_args()
     
     # 创建爬虫配置
@@ -202,7 +382,12 @@ def main():
         min_delay=args.delay,
         max_delay=args.delay + 1.0,
         max_retries=args.max_retries,
-        timeout=args.timeout
+        timeout=args.timeout,
+        cache_path=args.cache,
+        parse_workers=args.parse_workers,
+        teardown_trees=args.low_memory,
+        memory_ceiling_mb=args.memory_ceiling,
+        compress_raw_data=args.compress or args.compact
     )
     
     # 初始化爬虫
@@ -213,23 +398,34 @@ def main():
             # 显示统计信息
             scraper.show_statistics()
         
+        elif args.compact:
+            scraper.compact_storage()
+        
         elif args.urls:
             # 爬取指定URL
             if args.site == 'all':
                 print("爬取指定URL时必须指定具体网站")
                 sys.exit(1)
             
-            scraper.scrape_website(args.site, args.urls)
+            if args.low_memory:
+                scraper.crawl_website(args.site, args.urls)
+            else:
+                scraper.scrape_website(args.site, args.urls)
         
         else:
             # 爬取网站
-            if args.site == 'all':
+            if args.site == 'all' and args.low_memory:
+                for site_name in scraper.scrapers:
+                    scraper.crawl_website(site_name)
+            elif args.site == 'all':
                 scraper.scrape_all_sites()
+            elif args.low_memory:
+                scraper.crawl_website(args.site)
             else:
                 scraper.scrape_website(args.site)
         
         # 导出数据
-        if not args.stats:
+        if not (args.stats or args.compact):
             scraper.export_data(args.export)
         
         # 显示最终统计
@@ -237,12 +433,15 @@ def main():
         
     except KeyboardInterrupt:
         print("\n爬取被用户中断")
-        scraper.logger.info("爬取被用户中断")
+        scraper.logger.info(f"爬取被用户中断，正在写入队列中的 {scraper.writer.pending} 条记录")
     
     except Exception as e:
         print(f"程序出现错误: {e}")
         scraper.logger.error(f"程序出现错误: {e}")
         sys.exit(1)
+    
+    finally:
+        scraper.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
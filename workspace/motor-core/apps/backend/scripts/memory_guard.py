@@ -0,0 +1,80 @@
+"""
+内存监控
+
+读取进程常驻内存（RSS），超过上限时先触发垃圾回收，仍然超限则由调用方限流或回收工作进程
+"""
+
+import gc
+import logging
+import os
+import time
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:  # psutil为可选依赖，Linux上直接读取/proc
+    psutil = None
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """返回进程的常驻内存（MB），无法获取时返回None"""
+    pid = pid or os.getpid()
+
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class MemoryGuard:
+    """常驻内存上限检查
+
+    为降低开销，每check_interval次调用才实际读取一次RSS
+    """
+
+    def __init__(self, ceiling_mb: float, check_interval: int = 25, throttle_seconds: float = 1.0,
+                 logger: Optional[logging.Logger] = None):
+        self.ceiling_mb = ceiling_mb
+        self.check_interval = max(1, check_interval)
+        self.throttle_seconds = throttle_seconds
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._calls = 0
+        self.last_rss_mb: Optional[float] = None
+
+    def over_ceiling(self, pid: Optional[int] = None, force: bool = False) -> bool:
+        """判断进程是否超过内存上限，超限时先尝试垃圾回收"""
+        if not force:
+            self._calls += 1
+            if self._calls % self.check_interval:
+                return False
+
+        rss = rss_mb(pid)
+        self.last_rss_mb = rss
+        if rss is None or rss <= self.ceiling_mb:
+            return False
+
+        if pid is None or pid == os.getpid():
+            gc.collect()
+            rss = rss_mb(pid)
+            self.last_rss_mb = rss
+            if rss is None or rss <= self.ceiling_mb:
+                return False
+
+        return True
+
+    def throttle(self):
+        """本进程超限时暂停片刻，让下游（存储等）消化积压的数据"""
+        if not self.over_ceiling():
+            return
+        self.logger.warning(f"内存 {self.last_rss_mb:.0f}MB 超过上限 {self.ceiling_mb}MB，暂停 {self.throttle_seconds} 秒")
+        time.sleep(self.throttle_seconds)
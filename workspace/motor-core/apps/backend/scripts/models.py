@@ -1,8 +1,78 @@
-from dataclasses import dataclass
-from typing import Optional, List
+from dataclasses import dataclass, fields, MISSING
+from typing import Optional, List, Dict, Any, Union, get_args, get_origin, get_type_hints
 from datetime import datetime
 
-@dataclass
+
+def _field_kind(annotation):
+    """按字段类型决定转换方式：嵌套模型 / 时间 / 列表 / 原样"""
+    if get_origin(annotation) is Union:
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if getattr(annotation, '_record_model', False):
+        return 'model', annotation
+    if annotation is datetime:
+        return 'datetime', annotation
+    if get_origin(annotation) is list:
+        return 'list', annotation
+    return 'plain', annotation
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _load_model(model, value):
+    return model.from_dict(value) if isinstance(value, dict) else value
+
+
+def record_model(cls):
+    """把类转换为带__slots__的数据类，并生成to_dict/from_dict
+
+    转换函数按字段类型生成代码后编译，逐字段直接读写，不做dataclasses.asdict那样的递归深拷贝
+    """
+    cls = dataclass(slots=True)(cls)
+    hints = get_type_hints(cls)
+    namespace = {'_parse_datetime': _parse_datetime, '_load_model': _load_model, 'cls': cls}
+    to_items, from_items = [], []
+
+    for f in fields(cls):
+        kind, target = _field_kind(hints[f.name])
+        attr = f"self.{f.name}"
+        if f.default is MISSING:
+            # 必填字段缺失时与直接构造一样抛出KeyError
+            value = f"data[{f.name!r}]"
+        else:
+            namespace[f"_{f.name}_default"] = f.default
+            value = f"data.get({f.name!r}, _{f.name}_default)"
+
+        if kind == 'model':
+            namespace[f"_{f.name}_model"] = target
+            to_items.append(f"{f.name!r}: None if {attr} is None else {attr}.to_dict()")
+            value = f"_load_model(_{f.name}_model, {value})"
+        elif kind == 'datetime':
+            to_items.append(f"{f.name!r}: None if {attr} is None else {attr}.isoformat()")
+            value = f"_parse_datetime({value})"
+        elif kind == 'list':
+            to_items.append(f"{f.name!r}: None if {attr} is None else list({attr})")
+        else:
+            to_items.append(f"{f.name!r}: {attr}")
+        from_items.append(f"{f.name}={value}")
+
+    source = (
+        "def to_dict(self):\n"
+        f"    return {{{', '.join(to_items)}}}\n"
+        "def from_dict(data):\n"
+        f"    return cls({', '.join(from_items)})\n"
+    )
+    exec(compile(source, f"<record_model {cls.__name__}>", 'exec'), namespace)
+
+    cls.to_dict = namespace['to_dict']
+    cls.to_dict.__doc__ = "转换为只含基本类型的字典（嵌套模型转为字典，时间转为ISO字符串）"
+    cls.from_dict = staticmethod(namespace['from_dict'])
+    cls._record_model = True
+    return cls
+
+
+@record_model
 class EngineSpecs:
     """发动机规格"""
     type: Optional[str] = None  # 发动机类型 (V4, Inline-4, Single, etc.)
@@ -13,7 +83,7 @@ class EngineSpecs:
     cooling: Optional[str] = None  # 冷却方式
     fuel_system: Optional[str] = None  # 燃油系统
 
-@dataclass
+@record_model
 class Performance:
     """性能数据"""
     power_hp: Optional[float] = None  # 功率 (hp)
@@ -25,7 +95,7 @@ class Performance:
     acceleration_0_60: Optional[float] = None  # 0-60 mph 加速时间 (秒)
     quarter_mile: Optional[float] = None  # 四分之一英里时间 (秒)
 
-@dataclass
+@record_model
 class Dimensions:
     """尺寸和重量"""
     length: Optional[float] = None  # 长度 (mm)
@@ -38,14 +108,14 @@ class Dimensions:
     wet_weight: Optional[float] = None  # 湿重 (kg)
     fuel_capacity: Optional[float] = None  # 油箱容量 (L)
 
-@dataclass
+@record_model
 class PriceInfo:
     """价格信息"""
     msrp: Optional[float] = None  # 建议零售价
     currency: Optional[str] = "USD"  # 货币单位
     year: Optional[int] = None  # 价格年份
 
-@dataclass
+@record_model
 class Rating:
     """评分信息"""
     overall: Optional[float] = None  # 总体评分
@@ -55,7 +125,7 @@ class Rating:
     value: Optional[float] = None  # 性价比评分
     scale: Optional[int] = 10  # 评分满分
 
-@dataclass
+@record_model
 class Motorcycle:
     """摩托车主数据模型"""
     # 基本信息
@@ -88,7 +158,7 @@ class Motorcycle:
         if self.updated_at is None:
             self.updated_at = datetime.now()
 
-@dataclass
+@record_model
 class ReviewData:
     """评测数据"""
     motorcycle_id: str  # 对应摩托车的唯一标识
@@ -99,4 +169,17 @@ class ReviewData:
     pros: Optional[List[str]] = None
     cons: Optional[List[str]] = None
     verdict: Optional[str] = None
-    source_url: Optional[str] = None
\ No newline at end of file
+    source_url: Optional[str] = None
+
+def to_plain_dict(record: Dict[str, Any]) -> Dict[str, Any]:
+    """把爬虫返回的记录转换为只含基本类型的字典（嵌套模型转为字典，时间转为ISO字符串）"""
+    if getattr(record, '_record_model', False):
+        return record.to_dict()
+    plain = {}
+    for key, value in record.items():
+        if getattr(value, '_record_model', False):
+            value = value.to_dict()
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        plain[key] = value
+    return plain
\ No newline at end of file
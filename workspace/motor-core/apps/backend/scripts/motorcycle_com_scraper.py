@@ -4,11 +4,25 @@ from urllib.parse import urljoin
 from datetime import datetime
 
 from scraper_base import BaseScraper, ScrapingConfig
+from spec_parser import SpecTable
+from link_classifier import LinkClassifier
+from keyword_matcher import find_brand, infer_category
+from quantity import FIELD_CANONICAL_UNITS, NUMBER_PATTERN, parse_measure, parse_number
 from models import Motorcycle, EngineSpecs, Performance, Dimensions, PriceInfo, Rating, ReviewData
 
+# 链接分类规则（根据Motorcycle.com实际网站结构调整）
+MOTORCYCLE_COM_LINKS = LinkClassifier(
+    domain='motorcycle.com',
+    detail=[r'^/(?:reviews?|motorcycles?|bikes?|tests?)/(?:[^/]+/)*[^/]*(?:-[^/]*|\.html)$'],
+    listing=[r'^/(?:reviews|bikes|motorcycles|new-motorcycles)$', r'^/categories/[a-z-]+$'],
+)
+
 class MotorcycleDotComScraper(BaseScraper):
     """Motorcycle.com网站爬虫"""
     
+    EXTRACTOR_VERSION = 4
+    LINK_CLASSIFIER = MOTORCYCLE_COM_LINKS
+    
     def __init__(self, config: Optional[ScrapingConfig] = None):
         super().__init__(config)
         self.base_url = "https://www.motorcycle.com"
@@ -28,30 +42,28 @@ class MotorcycleDotComScraper(BaseScraper):
             'categories': '.bike-category, .type, .segment'
         }
     
-    def scrape_page(self, url: str) -> Optional[Dict[str, Any]]:
-        """爬取单个摩托车页面"""
-        response = self.get(url)
-        if not response:
-            return None
-        
-        soup = self.parse_html(response.text)
+    def extract_page(self, soup, url: str) -> Optional[Dict[str, Any]]:
+        """从单个摩托车页面提取数据"""
+        # 优先使用页面内嵌的结构化数据，DOM提取只补充缺失字段
+        structured = self.extract_structured_data(soup)
         
         # 提取基本信息
-        basic_info = self._extract_basic_info(soup, url)
+        basic_info = self._extract_basic_info(soup, url, structured)
         if not basic_info:
             self.logger.warning(f"无法提取基本信息: {url}")
             return None
         
-        # 提取详细规格
-        engine_specs = self._extract_engine_specs(soup)
-        performance = self._extract_performance(soup)
-        dimensions = self._extract_dimensions(soup)
-        price = self._extract_price(soup)
-        rating = self._extract_rating(soup)
+        # 提取详细规格（规格表只解析一次，字段提取为字典查找）
+        spec_table = self.parse_spec_table(soup)
+        engine_specs = self._extract_engine_specs(soup, spec_table)
+        performance = self._extract_performance(soup, spec_table)
+        dimensions = self._extract_dimensions(soup, spec_table)
+        price = self.price_from_structured(structured) or self._extract_price(soup)
+        rating = self.rating_from_structured(structured) or self._extract_rating(soup)
         
         # 提取附加信息
-        images = self._extract_images(soup, url)
-        description = self._extract_description(soup)
+        images = self.images_from_structured(structured, url) or self._extract_images(soup, url)
+        description = structured.get('description') or self._extract_description(soup)
         features = self._extract_features(soup)
         colors = self._extract_colors(soup)
         
@@ -73,20 +85,36 @@ class MotorcycleDotComScraper(BaseScraper):
             colors=colors
         )
         
-        return motorcycle.__dict__
+        data = motorcycle.to_dict()
+        # 评测正文复用同一棵解析树提取
+        review = self.extract_review(soup, url, motorcycle, structured)
+        data['review'] = review.to_dict() if review else None
+        return data
     
-    def _extract_basic_info(self, soup, url: str) -> Optional[Dict[str, Any]]:
+    def _extract_basic_info(self, soup, url: str, structured: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """提取基本信息"""
-        title_elem = soup.select_one(self.selectors['title'])
-        if not title_elem:
+        structured = structured or {}
+        
+        title = structured.get('title')
+        if not title:
+            title_elem = soup.select_one(self.selectors['title'])
+            title = self.extract_text(title_elem) or structured.get('og_title')
+        if not title:
             self.logger.warning(f"未找到标题元素: {url}")
             return None
         
-        title = self.extract_text(title_elem)
-        
         # 解析标题获取品牌、型号、年份
         brand, model, year = self._parse_motorcycle_title(title)
         
+        # 结构化数据中的品牌、型号、年份更可靠
+        if structured.get('brand'):
+            brand_match = find_brand(structured['brand'])
+            brand = brand_match.label if brand_match else structured['brand']
+        if structured.get('model'):
+            model = structured['model']
+        if structured.get('year'):
+            year = structured['year']
+        
         # 提取类别信息
         category = self._extract_category(soup)
         
@@ -99,14 +127,6 @@ class MotorcycleDotComScraper(BaseScraper):
     
     def _parse_motorcycle_title(self, title: str) -> tuple:
         """解析摩托车标题"""
-        # 扩展的品牌列表，包括更多摩托车制造商
-        brands = [
-            'Honda', 'Yamaha', 'Kawasaki', 'Suzuki', 'Ducati', 'BMW', 'KTM',
-            'Aprilia', 'Triumph', 'Harley-Davidson', 'Indian', 'MV Agusta',
-            'Benelli', 'CFMoto', 'Royal Enfield', 'Husqvarna', 'Beta',
-            'Sherco', 'GasGas', 'TM Racing', 'Zero', 'Energica', 'Lightning'
-        ]
-        
         brand = ""
         model = ""
         year = datetime.now().year
@@ -129,21 +149,13 @@ class MotorcycleDotComScraper(BaseScraper):
                     year = int(year_str)
                 break
         
-        # 查找品牌
-        title_words = title.split()
-        for word in title_words:
-            for b in brands:
-                if word.upper() == b.upper():
-                    brand = b
-                    break
-            if brand:
-                break
-        
-        # 提取型号
+        # 查找品牌（支持多词品牌和别名）
         model_text = title
-        if brand:
+        brand_match = find_brand(title)
+        if brand_match:
+            brand = brand_match.label
             # 移除品牌名
-            model_text = re.sub(rf'\b{re.escape(brand)}\b', '', model_text, flags=re.IGNORECASE)
+            model_text = title[:brand_match.start] + title[brand_match.end:]
         
         # 移除年份
         for pattern in year_patterns:
@@ -201,29 +213,19 @@ class MotorcycleDotComScraper(BaseScraper):
     
     def _infer_category_from_text(self, text: str) -> Optional[str]:
         """从文本内容推断类别"""
-        category_keywords = {
-            'sport': ['supersport', 'sportbike', 'racing', 'track', 'racetrack', 'circuit'],
-            'cruiser': ['cruiser', 'touring', 'comfortable', 'highway', 'bagger', 'chopper'],
-            'naked': ['naked', 'streetfighter', 'standard', 'upright', 'street'],
-            'adventure': ['adventure', 'dual-sport', 'off-road', 'enduro', 'adv', 'travel'],
-            'dirt': ['motocross', 'mx', 'dirt', 'off-road', 'enduro', 'trail'],
-            'scooter': ['scooter', 'automatic', 'cvt', 'twist-and-go'],
-            'electric': ['electric', 'battery', 'zero emissions', 'e-bike']
-        }
-        
-        category_scores = {}
-        for category, keywords in category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                category_scores[category] = score
-        
-        if category_scores:
-            return max(category_scores.items(), key=lambda x: x[1])[0]
-        
-        return None
+        return infer_category(text)
     
-    def _extract_engine_specs(self, soup) -> Optional[EngineSpecs]:
+    def _extract_engine_specs(self, soup, spec_table: Optional[SpecTable] = None) -> Optional[EngineSpecs]:
         """提取发动机规格"""
+        if spec_table is None:
+            spec_table = self.parse_spec_table(soup)
+        
+        # 优先从标签化的规格表中查找
+        values = spec_table.group_values('engine')
+        if values:
+            return EngineSpecs(**values)
+        
+        # 没有可识别的标签时，退回到对区域文本的模式匹配
         specs_section = soup.select_one(self.selectors['specifications'])
         if not specs_section:
             return None
@@ -235,9 +237,9 @@ class MotorcycleDotComScraper(BaseScraper):
         
         # 排量
         displacement_patterns = [
-            r'displacement[:\s]*(\d+(?:\.\d+)?)\s*cc',
-            r'engine[:\s]*(\d+(?:\.\d+)?)\s*cc',
-            r'(\d+(?:\.\d+)?)\s*cc',
+            rf'displacement[:\s]*({NUMBER_PATTERN})\s*cc',
+            rf'engine[:\s]*({NUMBER_PATTERN})\s*cc',
+            rf'({NUMBER_PATTERN})\s*cc',
         ]
         displacement = self._extract_with_patterns(specs_text, displacement_patterns)
         
@@ -250,8 +252,8 @@ class MotorcycleDotComScraper(BaseScraper):
         engine_type = self._extract_text_with_patterns(specs_text, engine_type_patterns)
         
         # 缸径和行程
-        bore_patterns = [r'bore[:\s]*(\d+(?:\.\d+)?)\s*mm']
-        stroke_patterns = [r'stroke[:\s]*(\d+(?:\.\d+)?)\s*mm']
+        bore_patterns = [rf'bore[:\s]*({NUMBER_PATTERN})\s*mm']
+        stroke_patterns = [rf'stroke[:\s]*({NUMBER_PATTERN})\s*mm']
         
         bore = self._extract_with_patterns(specs_text, bore_patterns)
         stroke = self._extract_with_patterns(specs_text, stroke_patterns)
@@ -287,8 +289,17 @@ class MotorcycleDotComScraper(BaseScraper):
         
         return None
     
-    def _extract_performance(self, soup) -> Optional[Performance]:
+    def _extract_performance(self, soup, spec_table: Optional[SpecTable] = None) -> Optional[Performance]:
         """提取性能数据"""
+        if spec_table is None:
+            spec_table = self.parse_spec_table(soup)
+        
+        # 优先从标签化的规格表中查找
+        values = spec_table.group_values('performance')
+        if values:
+            return Performance(**values)
+        
+        # 没有可识别的标签时，退回到对区域文本的模式匹配
         # 尝试多个可能的性能数据位置
         perf_sections = soup.select(self.selectors['performance']) + soup.select(self.selectors['specifications'])
         
@@ -299,42 +310,42 @@ class MotorcycleDotComScraper(BaseScraper):
         
         # 功率
         power_hp_patterns = [
-            r'power[:\s]*(\d+(?:\.\d+)?)\s*hp',
-            r'(\d+(?:\.\d+)?)\s*hp',
-            r'horsepower[:\s]*(\d+(?:\.\d+)?)',
+            rf'power[:\s]*({NUMBER_PATTERN})\s*hp',
+            rf'({NUMBER_PATTERN})\s*hp',
+            rf'horsepower[:\s]*({NUMBER_PATTERN})',
         ]
         power_kw_patterns = [
-            r'power[:\s]*(\d+(?:\.\d+)?)\s*kw',
-            r'(\d+(?:\.\d+)?)\s*kw',
+            rf'power[:\s]*({NUMBER_PATTERN})\s*kw',
+            rf'({NUMBER_PATTERN})\s*kw',
         ]
         
         # 扭矩
         torque_nm_patterns = [
-            r'torque[:\s]*(\d+(?:\.\d+)?)\s*nm',
-            r'(\d+(?:\.\d+)?)\s*nm',
+            rf'torque[:\s]*({NUMBER_PATTERN})\s*nm',
+            rf'({NUMBER_PATTERN})\s*nm',
         ]
         torque_lbft_patterns = [
-            r'torque[:\s]*(\d+(?:\.\d+)?)\s*lb[- ]?ft',
-            r'(\d+(?:\.\d+)?)\s*lb[- ]?ft',
+            rf'torque[:\s]*({NUMBER_PATTERN})\s*lb[- ]?ft',
+            rf'({NUMBER_PATTERN})\s*lb[- ]?ft',
         ]
         
         # 最高速度
         top_speed_patterns = [
-            r'top speed[:\s]*(\d+(?:\.\d+)?)\s*mph',
-            r'max speed[:\s]*(\d+(?:\.\d+)?)\s*mph',
-            r'(\d+(?:\.\d+)?)\s*mph',
+            rf'top speed[:\s]*({NUMBER_PATTERN})\s*mph',
+            rf'max speed[:\s]*({NUMBER_PATTERN})\s*mph',
+            rf'({NUMBER_PATTERN})\s*mph',
         ]
         
         # 加速
         acceleration_patterns = [
-            r'0[- ]?60[:\s]*(\d+(?:\.\d+)?)\s*sec',
-            r'0[- ]?to[- ]?60[:\s]*(\d+(?:\.\d+)?)\s*sec',
+            rf'0[- ]?60[:\s]*({NUMBER_PATTERN})\s*sec',
+            rf'0[- ]?to[- ]?60[:\s]*({NUMBER_PATTERN})\s*sec',
         ]
         
         # 四分之一英里
         quarter_mile_patterns = [
-            r'quarter mile[:\s]*(\d+(?:\.\d+)?)\s*sec',
-            r'1/4 mile[:\s]*(\d+(?:\.\d+)?)\s*sec',
+            rf'quarter mile[:\s]*({NUMBER_PATTERN})\s*sec',
+            rf'1/4 mile[:\s]*({NUMBER_PATTERN})\s*sec',
         ]
         
         power_hp = self._extract_with_patterns(perf_text, power_hp_patterns)
@@ -358,8 +369,17 @@ class MotorcycleDotComScraper(BaseScraper):
         
         return None
     
-    def _extract_dimensions(self, soup) -> Optional[Dimensions]:
+    def _extract_dimensions(self, soup, spec_table: Optional[SpecTable] = None) -> Optional[Dimensions]:
         """提取尺寸数据"""
+        if spec_table is None:
+            spec_table = self.parse_spec_table(soup)
+        
+        # 优先从标签化的规格表中查找
+        values = spec_table.group_values('dimensions')
+        if values:
+            return Dimensions(**values)
+        
+        # 没有可识别的标签时，退回到对区域文本的模式匹配
         specs_section = soup.select_one(self.selectors['specifications'])
         if not specs_section:
             return None
@@ -368,20 +388,20 @@ class MotorcycleDotComScraper(BaseScraper):
         
         # 尺寸数据提取模式
         dimension_patterns = {
-            'length': [r'length[:\s]*(\d+(?:\.\d+)?)\s*mm', r'length[:\s]*(\d+(?:\.\d+)?)\s*in'],
-            'width': [r'width[:\s]*(\d+(?:\.\d+)?)\s*mm', r'width[:\s]*(\d+(?:\.\d+)?)\s*in'],
-            'height': [r'height[:\s]*(\d+(?:\.\d+)?)\s*mm', r'height[:\s]*(\d+(?:\.\d+)?)\s*in'],
-            'wheelbase': [r'wheelbase[:\s]*(\d+(?:\.\d+)?)\s*mm', r'wheelbase[:\s]*(\d+(?:\.\d+)?)\s*in'],
-            'ground_clearance': [r'ground clearance[:\s]*(\d+(?:\.\d+)?)\s*mm'],
-            'seat_height': [r'seat height[:\s]*(\d+(?:\.\d+)?)\s*mm', r'seat height[:\s]*(\d+(?:\.\d+)?)\s*in'],
-            'dry_weight': [r'dry weight[:\s]*(\d+(?:\.\d+)?)\s*kg', r'dry weight[:\s]*(\d+(?:\.\d+)?)\s*lb'],
-            'wet_weight': [r'wet weight[:\s]*(\d+(?:\.\d+)?)\s*kg', r'weight[:\s]*(\d+(?:\.\d+)?)\s*kg'],
-            'fuel_capacity': [r'fuel capacity[:\s]*(\d+(?:\.\d+)?)\s*l', r'tank[:\s]*(\d+(?:\.\d+)?)\s*gal']
+            'length': [rf'length[:\s]*({NUMBER_PATTERN})\s*mm', rf'length[:\s]*({NUMBER_PATTERN})\s*in'],
+            'width': [rf'width[:\s]*({NUMBER_PATTERN})\s*mm', rf'width[:\s]*({NUMBER_PATTERN})\s*in'],
+            'height': [rf'height[:\s]*({NUMBER_PATTERN})\s*mm', rf'height[:\s]*({NUMBER_PATTERN})\s*in'],
+            'wheelbase': [rf'wheelbase[:\s]*({NUMBER_PATTERN})\s*mm', rf'wheelbase[:\s]*({NUMBER_PATTERN})\s*in'],
+            'ground_clearance': [rf'ground clearance[:\s]*({NUMBER_PATTERN})\s*mm'],
+            'seat_height': [rf'seat height[:\s]*({NUMBER_PATTERN})\s*mm', rf'seat height[:\s]*({NUMBER_PATTERN})\s*in'],
+            'dry_weight': [rf'dry weight[:\s]*({NUMBER_PATTERN})\s*kg', rf'dry weight[:\s]*({NUMBER_PATTERN})\s*lb'],
+            'wet_weight': [rf'wet weight[:\s]*({NUMBER_PATTERN})\s*kg', rf'weight[:\s]*({NUMBER_PATTERN})\s*kg'],
+            'fuel_capacity': [rf'fuel capacity[:\s]*({NUMBER_PATTERN})\s*l', rf'tank[:\s]*({NUMBER_PATTERN})\s*gal']
         }
         
         dimensions = {}
         for key, patterns in dimension_patterns.items():
-            value = self._extract_with_patterns(specs_text, patterns)
+            value = self._extract_with_patterns(specs_text, patterns, FIELD_CANONICAL_UNITS[key])
             if value:
                 dimensions[key] = value
         
@@ -395,16 +415,12 @@ class MotorcycleDotComScraper(BaseScraper):
         price_elem = soup.select_one(self.selectors['price'])
         if not price_elem:
             # 尝试在页面中查找价格
-            price_text = soup.get_text()
-            price_match = re.search(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', price_text)
-            if price_match:
-                price_str = price_match.group(1).replace(',', '')
-                price_value = float(price_str)
-            else:
+            price_value = parse_measure(soup.get_text(), 'usd', allow_unitless=False)
+            if price_value is None:
                 return None
         else:
             price_text = self.extract_text(price_elem)
-            price_value = self.extract_number(price_text.replace('$', '').replace(',', ''))
+            price_value = self.extract_number(price_text)
         
         if price_value and price_value > 1000:  # 合理的价格范围
             return PriceInfo(
@@ -421,29 +437,7 @@ class MotorcycleDotComScraper(BaseScraper):
         if not rating_elem:
             return None
         
-        rating_text = self.extract_text(rating_elem)
-        
-        # 尝试提取评分数字
-        rating_patterns = [
-            r'(\d+(?:\.\d+)?)/10',
-            r'(\d+(?:\.\d+)?)/5',
-            r'(\d+(?:\.\d+?))\s*stars?',
-            r'rating[:\s]*(\d+(?:\.\d+)?)',
-        ]
-        
-        for pattern in rating_patterns:
-            match = re.search(pattern, rating_text.lower())
-            if match:
-                score = float(match.group(1))
-                # 根据评分系统确定满分
-                if '/5' in pattern or 'stars' in pattern:
-                    scale = 5
-                else:
-                    scale = 10
-                
-                return Rating(overall=score, scale=scale)
-        
-        return None
+        return self.rating_from_text(self.extract_text(rating_elem))
     
     def _extract_images(self, soup, base_url: str) -> List[str]:
         """提取图片URL"""
@@ -498,7 +492,7 @@ class MotorcycleDotComScraper(BaseScraper):
             if len(features) >= 15:
                 break
         
-        return list(set(features))  # 去重
+        return list(dict.fromkeys(features))  # 按首次出现的顺序去重
     
     def _extract_colors(self, soup) -> List[str]:
         """提取可选颜色"""
@@ -521,15 +515,21 @@ class MotorcycleDotComScraper(BaseScraper):
         
         return colors[:10]  # 限制颜色数量
     
-    def _extract_with_patterns(self, text: str, patterns: List[str]) -> Optional[float]:
-        """使用多个模式提取数值"""
+    def _extract_with_patterns(self, text: str, patterns: List[str], unit: Optional[str] = None) -> Optional[float]:
+        """使用多个模式提取数值，指定单位时换算到该单位"""
         for pattern in patterns:
             match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1))
-                except (ValueError, IndexError):
-                    continue
+            if not match:
+                continue
+            if unit:
+                # 从捕获的数字开始解析到匹配结束，保留模式里的单位
+                value = parse_measure(text[match.start(1):match.end()], unit)
+                if value is not None:
+                    return value
+                continue
+            value = parse_number(match.group(1))
+            if value is not None:
+                return value
         return None
     
     def _extract_text_with_patterns(self, text: str, patterns: List[str]) -> Optional[str]:
@@ -558,33 +558,4 @@ class MotorcycleDotComScraper(BaseScraper):
     
     def extract_bike_urls_from_listing(self, listing_url: str) -> List[str]:
         """从列表页面提取摩托车详情页URL"""
-        response = self.get(listing_url)
-        if not response:
-            return []
-        
-        soup = self.parse_html(response.text)
-        urls = []
-        
-        # 查找摩托车详情页链接
-        link_patterns = [
-            'a[href*="/review/"]',
-            'a[href*="/motorcycle/"]',
-            'a[href*="/bike/"]',
-            'a[href*="/test/"]',
-            '.bike-card a',
-            '.motorcycle-card a',
-            '.review-card a'
-        ]
-        
-        for pattern in link_patterns:
-            links = soup.select(pattern)
-            for link in links:
-                href = link.get('href')
-                if href:
-                    full_url = urljoin(listing_url, href)
-                    if self.is_valid_url(full_url) and full_url not in urls:
-                        # 过滤掉非摩托车页面
-                        if any(keyword in full_url.lower() for keyword in ['/review/', '/motorcycle/', '/bike/', '/test/']):
-                            urls.append(full_url)
-        
-        return urls
\ No newline at end of file
+        return self.extract_motorcycle_urls_from_listing(listing_url)
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""
+列式摩托车目录
+
+把数据库中的摩托车记录按列装入NumPy数组：数值规格为float64数组加有效值掩码，
+品牌、类别、颜色做字典编码（整数编码 + 取值表，颜色为多值列，按CSR偏移存储），
+过滤、排序和分组统计都在整列上向量化完成，不再逐条解析raw_data中的嵌套字典
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# 数值列 → 查询表达式；评分统一换算为10分制
+NUMERIC_COLUMNS = {
+    'year': 'm.year',
+    'displacement': 'e.displacement',
+    'power_hp': 'p.power_hp',
+    'torque_nm': 'p.torque_nm',
+    'top_speed_mph': 'p.top_speed_mph',
+    'seat_height': 'd.seat_height',
+    'dry_weight': 'd.dry_weight',
+    'wet_weight': 'd.wet_weight',
+    'fuel_capacity': 'd.fuel_capacity',
+    'msrp': 'm.msrp',
+    'rating': "json_extract(raw_json(m.raw_data), '$.rating.overall') * 10.0 / "
+              "COALESCE(NULLIF(json_extract(raw_json(m.raw_data), '$.rating.scale'), 0), 10)",
+}
+
+# 字典编码的单值列
+CATEGORICAL_COLUMNS = ('brand', 'category')
+
+# 记录中各数值列的位置（from_records使用）
+RECORD_PATHS = {
+    'year': ('year',),
+    'displacement': ('engine', 'displacement'),
+    'power_hp': ('performance', 'power_hp'),
+    'torque_nm': ('performance', 'torque_nm'),
+    'top_speed_mph': ('performance', 'top_speed_mph'),
+    'seat_height': ('dimensions', 'seat_height'),
+    'dry_weight': ('dimensions', 'dry_weight'),
+    'wet_weight': ('dimensions', 'wet_weight'),
+    'fuel_capacity': ('dimensions', 'fuel_capacity'),
+    'msrp': ('price', 'msrp'),
+}
+
+Condition = Union[str, float, Sequence[Any], Tuple[Optional[float], Optional[float]]]
+
+
+class DictionaryColumn:
+    """字典编码列：codes为int32编码（-1表示空值），categories为排好序的取值表"""
+
+    def __init__(self, codes: np.ndarray, categories: np.ndarray):
+        self.codes = codes
+        self.categories = categories
+        self._lookup = {str(value).lower(): code for code, value in enumerate(categories)}
+
+    @classmethod
+    def encode(cls, values: Iterable[Optional[str]]) -> 'DictionaryColumn':
+        codes, categories = pd.factorize(pd.Series(list(values), dtype=object), sort=True)
+        return cls(codes.astype(np.int32), np.asarray(categories, dtype=object))
+
+    def code_of(self, value: str) -> int:
+        """取值对应的编码（忽略大小写），不存在时返回-2（不会匹配任何行）"""
+        return self._lookup.get(str(value).lower(), -2)
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.categories[code] if code >= 0 else None
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(str(value)) for value in self.categories)
+
+
+class MotorcycleTable:
+    """列式存储的摩托车目录，构建后只读，过滤和排序返回新表"""
+
+    def __init__(self, ids: np.ndarray, models: np.ndarray, numeric: Dict[str, np.ndarray],
+                 categorical: Dict[str, DictionaryColumn], color_offsets: np.ndarray,
+                 color_codes: np.ndarray, color_categories: np.ndarray):
+        self.ids = ids
+        self.models = models
+        self.numeric = numeric  # 列名 → float64数组，空值为NaN
+        self.valid = {name: ~np.isnan(values) for name, values in numeric.items()}  # 有效值掩码
+        self.categorical = categorical
+        # 颜色为多值列：第i行的颜色编码为 color_codes[color_offsets[i]:color_offsets[i + 1]]
+        self.colors = DictionaryColumn(color_codes, color_categories)
+        self.color_offsets = color_offsets
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    def from_storage(cls, storage) -> 'MotorcycleTable':
+        """从DataStorage的数据库加载整个目录"""
+        select = ', '.join(f"{expr} AS {name}" for name, expr in NUMERIC_COLUMNS.items())
+        query = f"""
+            SELECT m.id, m.brand, m.model, m.category, {select}
+            FROM motorcycles m
+            LEFT JOIN engine_specs e ON m.id = e.motorcycle_id
+            LEFT JOIN performance p ON m.id = p.motorcycle_id
+            LEFT JOIN dimensions d ON m.id = d.motorcycle_id
+            ORDER BY m.id
+        """
+        # 颜色用json_each在SQLite中展开为 (id, 颜色) 行，避免在Python里逐条解析JSON
+        colors_query = """
+            SELECT m.id, j.value FROM motorcycles m, json_each(raw_json(m.raw_data), '$.colors') j
+            WHERE json_valid(raw_json(m.raw_data)) ORDER BY m.id, j.key
+        """
+        frame = storage.read_sql(query)
+        colors = storage.read_sql(colors_query)
+
+        ids = frame['id'].to_numpy(np.int64)
+        numeric = {name: frame[name].to_numpy(np.float64, na_value=np.nan) for name in NUMERIC_COLUMNS}
+        categorical = {name: DictionaryColumn.encode(frame[name]) for name in CATEGORICAL_COLUMNS}
+
+        rows = np.searchsorted(ids, colors['id'].to_numpy(np.int64))
+        color_column = DictionaryColumn.encode(colors['value'])
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(ids)), out=offsets[1:])
+
+        return cls(ids, frame['model'].to_numpy(object), numeric, categorical,
+                   offsets, color_column.codes, color_column.categories)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], ids: Optional[Sequence[int]] = None) -> 'MotorcycleTable':
+        """从清理后的记录字典构建（用于内存中的数据）"""
+        count = len(records)
+        numeric = {}
+        for name, path in RECORD_PATHS.items():
+            values = np.full(count, np.nan)
+            for i, record in enumerate(records):
+                value = record
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                if isinstance(value, (int, float)):
+                    values[i] = value
+            numeric[name] = values
+
+        rating = np.full(count, np.nan)
+        for i, record in enumerate(records):
+            overall = (record.get('rating') or {}).get('overall')
+            if isinstance(overall, (int, float)):
+                rating[i] = overall * 10.0 / ((record['rating'].get('scale') or 10))
+        numeric['rating'] = rating
+
+        color_lists = [record.get('colors') or [] for record in records]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum([len(colors) for colors in color_lists], out=offsets[1:])
+        color_column = DictionaryColumn.encode(color for colors in color_lists for color in colors)
+
+        return cls(
+            np.asarray(ids if ids is not None else range(1, count + 1), dtype=np.int64),
+            np.asarray([record.get('model') for record in records], dtype=object),
+            numeric,
+            {name: DictionaryColumn.encode(record.get(name) for record in records) for name in CATEGORICAL_COLUMNS},
+            offsets, color_column.codes, color_column.categories
+        )
+
+    # ---------- 基本属性 ----------
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """各列数组占用的内存（字节）"""
+        total = self.ids.nbytes + self.color_offsets.nbytes + self.colors.nbytes
+        total += sum(values.nbytes for values in self.numeric.values())
+        total += sum(mask.nbytes for mask in self.valid.values())
+        total += sum(column.nbytes for column in self.categorical.values())
+        total += sum(len(model) for model in self.models if model)
+        return total
+
+    def column(self, name: str) -> np.ndarray:
+        """数值列的值（空值为NaN）"""
+        return self.numeric[name]
+
+    def color_rows(self) -> np.ndarray:
+        """颜色编码对应的行号，与colors.codes等长"""
+        return np.repeat(np.arange(len(self)), np.diff(self.color_offsets))
+
+    # ---------- 过滤 ----------
+
+    def _categorical_mask(self, column: DictionaryColumn, codes: np.ndarray, condition: Condition) -> np.ndarray:
+        values = [condition] if isinstance(condition, str) else list(condition)
+        return np.isin(codes, [column.code_of(value) for value in values])
+
+    def mask(self, **conditions: Condition) -> np.ndarray:
+        """按条件生成行掩码
+
+        品牌、类别、颜色接受单个取值或取值列表（忽略大小写）；
+        数值列接受单个值（相等）或 (最小值, 最大值) 闭区间，None表示不限，空值不会匹配
+        """
+        selected = np.ones(len(self), dtype=bool)
+        for name, condition in conditions.items():
+            if name in self.categorical:
+                column = self.categorical[name]
+                selected &= self._categorical_mask(column, column.codes, condition)
+            elif name in ('color', 'colors'):
+                hits = self._categorical_mask(self.colors, self.colors.codes, condition)
+                selected &= np.bincount(self.color_rows()[hits], minlength=len(self)) > 0
+            elif name in self.numeric:
+                values = self.numeric[name]
+                if isinstance(condition, tuple):
+                    low, high = condition
+                    if low is not None:
+                        selected &= values >= low
+                    if high is not None:
+                        selected &= values <= high
+                else:
+                    selected &= values == condition
+            else:
+                raise KeyError(f"未知列: {name}")
+        return selected
+
+    def filter(self, **conditions: Condition) -> 'MotorcycleTable':
+        """返回满足全部条件的行组成的新表"""
+        return self.take(np.flatnonzero(self.mask(**conditions)))
+
+    def take(self, indices: np.ndarray) -> 'MotorcycleTable':
+        """按行号取子表（保持行号顺序）"""
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.color_offsets[indices]
+        lengths = self.color_offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # 每个颜色在原数组中的位置 = 所在行的起点 + 行内序号
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+
+        return MotorcycleTable(
+            self.ids[indices],
+            self.models[indices],
+            {name: values[indices] for name, values in self.numeric.items()},
+            {name: DictionaryColumn(column.codes[indices], column.categories)
+             for name, column in self.categorical.items()},
+            offsets, self.colors.codes[positions], self.colors.categories
+        )
+
+    # ---------- 排序 ----------
+
+    def argsort(self, by: str, descending: bool = False) -> np.ndarray:
+        """按列排序的行号，空值总是排在最后"""
+        if by in self.categorical:
+            # 取值表已排序，编码顺序即字母顺序
+            keys = self.categorical[by].codes.astype(np.float64)
+            keys[keys < 0] = np.nan
+        else:
+            keys = self.numeric[by]
+        # NaN在升序中排最后；降序时对取反后的值升序排列，空值仍在最后
+        return np.argsort(-keys if descending else keys, kind='stable')
+
+    def sort(self, by: str, descending: bool = False) -> 'MotorcycleTable':
+        return self.take(self.argsort(by, descending))
+
+    # ---------- 分组统计 ----------
+
+    def group_by(self, key: str, column: Optional[str] = None, agg: str = 'count') -> Dict[str, float]:
+        """按品牌/类别/颜色分组统计
+
+        agg为count时统计行数（给定column时只统计该列有值的行），
+        也可以是sum / mean / min / max，空值不参与计算
+        """
+        if key in self.categorical:
+            dictionary = self.categorical[key]
+            codes, rows = dictionary.codes, np.arange(len(self))
+        elif key in ('color', 'colors'):
+            dictionary = self.colors
+            codes, rows = self.colors.codes, self.color_rows()
+        else:
+            raise KeyError(f"不能按该列分组: {key}")
+
+        keep = codes >= 0
+        if column is not None:
+            keep &= self.valid[column][rows]
+        codes, rows = codes[keep], rows[keep]
+        groups = len(dictionary.categories)
+        counts = np.bincount(codes, minlength=groups)
+
+        if agg == 'count':
+            result = counts.astype(np.float64)
+        elif column is None:
+            raise ValueError(f"{agg} 统计需要指定列")
+        elif agg in ('sum', 'mean'):
+            sums = np.bincount(codes, weights=self.numeric[column][rows], minlength=groups)
+            result = sums if agg == 'sum' else sums / np.maximum(counts, 1)
+        elif agg in ('min', 'max'):
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            values = self.numeric[column][rows][order]
+            result = np.full(groups, np.nan)
+            if len(values):
+                starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+                reducer = np.minimum if agg == 'min' else np.maximum
+                result[sorted_codes[starts]] = reducer.reduceat(values, starts)
+        else:
+            raise ValueError(f"不支持的统计方式: {agg}")
+
+        return {dictionary.categories[code]: float(result[code]) for code in np.flatnonzero(counts)}
+
+    # ---------- 输出 ----------
+
+    def to_records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """解码为字典列表（用于输出少量结果）"""
+        records = []
+        for i in range(len(self) if limit is None else min(limit, len(self))):
+            record = {'id': int(self.ids[i]), 'model': self.models[i]}
+            for name, column in self.categorical.items():
+                record[name] = column.decode(column.codes[i])
+            for name, values in self.numeric.items():
+                record[name] = float(values[i]) if self.valid[name][i] else None
+            record['year'] = int(record['year']) if record['year'] is not None else None
+            codes = self.colors.codes[self.color_offsets[i]:self.color_offsets[i + 1]]
+            record['colors'] = [self.colors.decode(code) for code in codes]
+            records.append(record)
+        return records
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """转换为DataFrame（品牌和类别为Categorical列）"""
+        frame = pd.DataFrame({'id': self.ids, 'model': self.models})
+        for name, column in self.categorical.items():
+            frame[name] = pd.Categorical.from_codes(column.codes, categories=column.categories)
+        for name, values in self.numeric.items():
+            frame[name] = values
+        return frame
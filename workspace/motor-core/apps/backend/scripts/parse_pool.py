@@ -0,0 +1,182 @@
+"""
+多进程解析
+
+抓取与提取分离：抓取线程只负责下载原始字节，HTML解析和正则提取在进程池中完成。
+每个工作进程启动时初始化一次各网站的爬虫，任务按块提交以降低进程间通信开销
+"""
+
+import logging
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Type
+
+from scraper_base import BaseScraper, ScrapingConfig
+from models import to_plain_dict
+from memory_guard import MemoryGuard
+
+
+class RawPage(NamedTuple):
+    """待解析的原始页面"""
+    site: str  # 网站名，对应爬虫
+    url: str
+    content: bytes  # 原始响应字节
+    encoding: Optional[str] = None  # 响应编码
+
+
+class ParseResult(NamedTuple):
+    """解析结果"""
+    site: str
+    url: str
+    record: Optional[Dict[str, Any]]  # 只含基本类型的记录，未提取到数据时为None
+    error: Optional[str] = None
+
+
+# 自由线程（无GIL）的CPython上线程即可利用多核，不必承担进程间通信开销
+FREE_THREADED = hasattr(sys, '_is_gil_enabled') and not sys._is_gil_enabled()
+
+# 工作进程内的爬虫实例，由_init_worker创建
+_WORKER_SCRAPERS: Dict[str, BaseScraper] = {}
+
+
+def _init_worker(scraper_classes: Dict[str, Type[BaseScraper]], config: ScrapingConfig):
+    """工作进程初始化：每个进程只构建一次爬虫"""
+    logging.getLogger().setLevel(logging.WARNING)
+    for site, scraper_class in scraper_classes.items():
+        scraper = scraper_class(config)
+        scraper.logger.setLevel(logging.WARNING)
+        _WORKER_SCRAPERS[site] = scraper
+
+
+def extract_pages(scrapers: Dict[str, BaseScraper], pages: Iterable[RawPage]) -> List[ParseResult]:
+    """用给定的爬虫提取一批页面"""
+    results = []
+    for page in pages:
+        try:
+            html = page.content.decode(page.encoding or 'utf-8', errors='replace')
+            record = scrapers[page.site].extract_from_html(html, page.url)
+            results.append(ParseResult(page.site, page.url, to_plain_dict(record) if record else None))
+        except Exception as e:
+            results.append(ParseResult(page.site, page.url, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _extract_chunk(chunk: List[RawPage]) -> Tuple[int, List[ParseResult]]:
+    """工作进程入口，同时返回工作进程的pid，供主进程检查其内存"""
+    return os.getpid(), extract_pages(_WORKER_SCRAPERS, chunk)
+
+
+class ParsePool:
+    """提取进程池
+
+    use_threads为True时改用线程池，所有线程共享同一组爬虫实例（爬虫和提取计划均为线程安全）；
+    默认只在自由线程的CPython上使用线程
+    """
+
+    def __init__(self, scraper_classes: Dict[str, Type[BaseScraper]], config: Optional[ScrapingConfig] = None,
+                 max_workers: Optional[int] = None, chunk_size: int = 8, use_threads: Optional[bool] = None):
+        self.scraper_classes = scraper_classes
+        self.config = config or ScrapingConfig()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.use_threads = FREE_THREADED if use_threads is None else use_threads
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.recycle_count = 0
+
+        self._scrapers: Dict[str, BaseScraper] = {}
+        if self.use_threads:
+            self._scrapers = {site: scraper_class(self.config) for site, scraper_class in scraper_classes.items()}
+
+        # 工作进程超过内存上限时回收整个进程池
+        self.memory_guard = None
+        if self.config.memory_ceiling_mb:
+            self.memory_guard = MemoryGuard(self.config.memory_ceiling_mb, check_interval=1, logger=self.logger)
+
+        self._worker_pids: Set[int] = set()  # 返回过结果的工作进程
+        self._executor = self._start_executor()
+
+    def _start_executor(self) -> Executor:
+        if self.use_threads:
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.scraper_classes, self.config)
+        )
+
+    def _workers_over_ceiling(self) -> bool:
+        """检查是否有工作进程超过内存上限"""
+        if self.memory_guard is None or self.use_threads:
+            return False
+        return any(self.memory_guard.over_ceiling(pid, force=True) for pid in self._worker_pids)
+
+    def recycle(self):
+        """关闭并重建进程池，释放工作进程积累的内存"""
+        self._executor.shutdown(wait=True)
+        self._worker_pids.clear()
+        self._executor = self._start_executor()
+        self.recycle_count += 1
+
+    def _chunks(self, pages: Iterable[RawPage]) -> Iterator[List[RawPage]]:
+        chunk = []
+        for page in pages:
+            chunk.append(page)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _submit(self, chunk: List[RawPage]):
+        if self.use_threads:
+            return self._executor.submit(extract_pages, self._scrapers, chunk)
+        return self._executor.submit(_extract_chunk, chunk)
+
+    def _collect(self, future) -> List[ParseResult]:
+        """取出一个块的结果，进程池模式下记录返回结果的工作进程"""
+        if self.use_threads:
+            return future.result()
+        pid, results = future.result()
+        self._worker_pids.add(pid)
+        return results
+
+    def extract_many(self, pages: Iterable[RawPage]) -> Iterator[ParseResult]:
+        """提取页面，按完成顺序产出结果
+
+        pages可以是边抓取边产出的生成器；同时在途的块数有上限，避免原始页面在内存中堆积
+        """
+        max_pending = self.max_workers * 2
+        pending = set()
+
+        for chunk in self._chunks(pages):
+            pending.add(self._submit(chunk))
+            if len(pending) < max_pending:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from self._collect(future)
+
+            if self._workers_over_ceiling():
+                # 先收完在途的块，再重建进程池
+                for future in pending:
+                    yield from self._collect(future)
+                pending = set()
+                self.logger.warning(f"解析进程内存超过上限 {self.config.memory_ceiling_mb}MB，回收进程池")
+                self.recycle()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from self._collect(future)
+
+    def close(self):
+        """关闭进程池"""
+        self._executor.shutdown(wait=True)
+        for scraper in self._scrapers.values():
+            scraper.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
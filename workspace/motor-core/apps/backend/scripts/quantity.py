@@ -0,0 +1,232 @@
+"""
+数量/单位解析
+
+用一个预编译的正则一次扫描文本，产出(数值, 单位, 限定词)三元组。
+爬虫、规格表和DataCleaner都通过这里解析数字，保证单位换算一致
+"""
+
+import re
+from typing import Iterator, List, NamedTuple, Optional
+
+
+class Quantity(NamedTuple):
+    """一个带单位的数值"""
+    value: float
+    unit: Optional[str] = None  # 标准单位符号，如 mm、kg、hp
+    qualifier: Optional[str] = None  # approx / min / max / range / dimension / ratio
+
+
+# 单位写法 → 标准单位
+UNIT_ALIASES = {
+    'mm': 'mm', 'millimeter': 'mm', 'millimeters': 'mm', 'millimetre': 'mm', 'millimetres': 'mm',
+    'cm': 'cm',
+    'in': 'in', 'in.': 'in', 'inch': 'in', 'inches': 'in', '"': 'in', '″': 'in',
+    'ft': 'ft', 'feet': 'ft',
+    'kg': 'kg', 'kgs': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'lb': 'lb', 'lbs': 'lb', 'lb.': 'lb', 'lbs.': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    'l': 'l', 'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l', 'ltr': 'l',
+    'gal': 'gal', 'gal.': 'gal', 'gallon': 'gal', 'gallons': 'gal',
+    'cc': 'cc', 'cm3': 'cc', 'cm³': 'cc', 'ccm': 'cc',
+    'ci': 'ci', 'cu in': 'ci', 'cubic inches': 'ci', 'cubic inch': 'ci',
+    'hp': 'hp', 'bhp': 'hp', 'whp': 'hp', 'horsepower': 'hp',
+    'ps': 'ps', 'cv': 'ps',
+    'kw': 'kw', 'kilowatt': 'kw', 'kilowatts': 'kw',
+    'nm': 'nm', 'n-m': 'nm', 'n·m': 'nm', 'newton-meters': 'nm', 'newton meters': 'nm',
+    'lb-ft': 'lb-ft', 'lb ft': 'lb-ft', 'lbft': 'lb-ft', 'lb.-ft.': 'lb-ft', 'lb.-ft': 'lb-ft',
+    'lb-ft.': 'lb-ft', 'ft-lb': 'lb-ft', 'ft-lbs': 'lb-ft', 'ft lb': 'lb-ft', 'ft lbs': 'lb-ft',
+    'ft.-lb.': 'lb-ft', 'pound-feet': 'lb-ft',
+    'mph': 'mph', 'km/h': 'km/h', 'kmh': 'km/h', 'kph': 'km/h', 'km/hr': 'km/h',
+    's': 's', 'sec': 's', 'sec.': 's', 'secs': 's', 'second': 's', 'seconds': 's',
+    'rpm': 'rpm', 'mi': 'mi', 'mile': 'mi', 'miles': 'mi',
+    '%': '%', 'percent': '%',
+}
+
+CURRENCY_SYMBOLS = {'$': 'usd', '€': 'eur', '£': 'gbp', '¥': 'jpy'}
+
+# 标准单位 → (量纲, 换算到该量纲基准单位的系数)
+UNIT_DIMENSIONS = {
+    'mm': ('length', 1.0), 'cm': ('length', 10.0), 'in': ('length', 25.4), 'ft': ('length', 304.8),
+    'kg': ('mass', 1.0), 'lb': ('mass', 0.45359237),
+    'l': ('volume', 1.0), 'gal': ('volume', 3.785411784), 'cc': ('volume', 0.001), 'ci': ('volume', 0.016387064),
+    'hp': ('power', 1.0), 'ps': ('power', 0.98632), 'kw': ('power', 1.0 / 0.745699872),
+    'nm': ('torque', 1.0), 'lb-ft': ('torque', 1.3558179483),
+    'km/h': ('speed', 1.0), 'mph': ('speed', 1.609344),
+    's': ('time', 1.0),
+    'rpm': ('frequency', 1.0),
+    'mi': ('distance', 1.0),
+}
+
+# 模型中成对存储的单位（hp/kW、Nm/lb-ft、mph/km/h），两者之间提取时不做隐式换算，
+# 由后续的单位归一化补全；其他同量纲单位（如PS）照常换算
+PAIRED_UNITS = {'hp': 'kw', 'kw': 'hp', 'nm': 'lb-ft', 'lb-ft': 'nm', 'mph': 'km/h', 'km/h': 'mph'}
+
+# 各字段的标准单位
+FIELD_CANONICAL_UNITS = {
+    'displacement': 'cc', 'bore': 'mm', 'stroke': 'mm',
+    'power_hp': 'hp', 'power_kw': 'kw',
+    'torque_nm': 'nm', 'torque_lbft': 'lb-ft',
+    'top_speed_mph': 'mph', 'top_speed_kmh': 'km/h',
+    'acceleration_0_60': 's', 'quarter_mile': 's',
+    'length': 'mm', 'width': 'mm', 'height': 'mm', 'wheelbase': 'mm',
+    'ground_clearance': 'mm', 'seat_height': 'mm',
+    'dry_weight': 'kg', 'wet_weight': 'kg', 'fuel_capacity': 'l',
+    'msrp': 'usd',
+}
+
+QUALIFIER_ALIASES = {
+    '~': 'approx', '≈': 'approx', 'approx': 'approx', 'approx.': 'approx', 'approximately': 'approx',
+    'about': 'approx', 'around': 'approx', 'circa': 'approx', 'ca.': 'approx',
+    'up to': 'max', 'under': 'max', 'less than': 'max', '<': 'max', '<=': 'max', '≤': 'max',
+    'over': 'min', 'more than': 'min', 'at least': 'min', '>': 'min', '>=': 'min', '≥': 'min',
+}
+
+FRACTION_DENOMINATORS = {2, 3, 4, 8, 16, 32, 64}
+
+
+def _alternation(words) -> str:
+    """按长度降序生成正则分支，保证最长匹配优先"""
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# 数字的正则（不含捕获组），其他模块在自己的模式中匹配数字时使用，结果交给parse_number解析
+NUMBER_PATTERN = (
+    r'\d+\s+\d+/\d+'                      # 带分数 3 1/2
+    r'|\d+/\d+'                           # a/b，只取分子（如评分 8/10）
+    r'|\d{1,3}(?:,\d{3})+(?:\.\d+)?'      # 英式千分位 12,345.6
+    r'|\d{1,3}(?:\.\d{3})+,\d+'           # 欧式千分位 1.234,5
+    r'|\d+(?:[.,]\d+)?'                   # 普通数字，逗号视为欧式小数 31,5
+)
+
+QUANTITY_PATTERN = re.compile(
+    rf'(?:(?<![a-z])(?P<qual>{_alternation(QUALIFIER_ALIASES)})\s*)?'
+    rf'(?P<cur>[$€£¥])?\s*'
+    rf'(?P<num>{NUMBER_PATTERN})'
+    rf'(?:\s*(?P<sep>x|×|:|–|-|to)\s*(?P<num2>{NUMBER_PATTERN}))?'
+    rf'(?:\s*(?P<unit>{_alternation(UNIT_ALIASES)})(?![a-z]))?',
+    re.IGNORECASE
+)
+
+
+def _parse_number(text: str) -> float:
+    """解析单个数字，支持千分位、欧式小数和分数"""
+    text = text.strip()
+
+    if '/' in text:
+        whole, _, fraction = text.rpartition(' ')
+        numerator, denominator = (int(part) for part in fraction.split('/'))
+        # 只有带分数（3 1/2）按分数计算；单独的 a/b（8/10、4/5 之类的评分）只取分子
+        if whole and denominator in FRACTION_DENOMINATORS and numerator < denominator:
+            return int(whole) + numerator / denominator
+        return float(whole) if whole else float(numerator)
+
+    if ',' in text and '.' in text:
+        # 最后出现的分隔符是小数点
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        if re.fullmatch(r'\d{1,3}(?:,\d{3})+', text):
+            text = text.replace(',', '')
+        else:
+            text = text.replace(',', '.')
+
+    return float(text)
+
+
+def iter_quantities(text: str) -> Iterator[Quantity]:
+    """一次扫描文本，逐个产出Quantity"""
+    if not text:
+        return
+
+    for match in QUANTITY_PATTERN.finditer(text):
+        value = _parse_number(match.group('num'))
+
+        unit = match.group('unit')
+        unit = UNIT_ALIASES.get(unit.lower()) if unit else None
+        if match.group('cur'):
+            unit = CURRENCY_SYMBOLS[match.group('cur')]
+
+        qualifier = match.group('qual')
+        qualifier = QUALIFIER_ALIASES.get(qualifier.lower()) if qualifier else None
+
+        sep = match.group('sep')
+        if sep is None:
+            yield Quantity(value, unit, qualifier)
+            continue
+
+        second = _parse_number(match.group('num2'))
+        sep = sep.lower()
+        if sep == ':':
+            # 压缩比 13.0:1
+            yield Quantity(value / second if second and second != 1 else value, None, 'ratio')
+        elif sep in ('x', '×'):
+            # 尺寸对 80 x 49.7 mm，单位对两个数都有效
+            yield Quantity(value, unit, 'dimension')
+            yield Quantity(second, unit, 'dimension')
+        else:
+            yield Quantity(value, unit, 'range')
+            yield Quantity(second, unit, 'range')
+
+
+def tokenize_quantities(text: str) -> List[Quantity]:
+    """返回文本中的所有Quantity"""
+    return list(iter_quantities(text))
+
+
+def normalize_unit(unit: Optional[str]) -> Optional[str]:
+    """把单位写法转换为标准单位"""
+    if not unit:
+        return None
+    return UNIT_ALIASES.get(unit.lower().strip(), unit.lower().strip())
+
+
+def convert(value: float, from_unit: str, to_unit: str) -> Optional[float]:
+    """在同一量纲内换算单位，无法换算时返回None"""
+    if from_unit == to_unit:
+        return value
+    source = UNIT_DIMENSIONS.get(from_unit)
+    target = UNIT_DIMENSIONS.get(to_unit)
+    if not source or not target or source[0] != target[0]:
+        return None
+    return value * source[1] / target[1]
+
+
+def parse_number(text: str, default: Optional[float] = None) -> Optional[float]:
+    """返回文本中第一个数值（忽略单位）"""
+    for quantity in iter_quantities(text):
+        return quantity.value
+    return default
+
+
+def parse_measure(text: str, unit: str, allow_unitless: bool = True,
+                  convert_paired: bool = False) -> Optional[float]:
+    """返回文本中以指定单位表示的数值
+
+    优先取单位完全一致的数值，其次取可换算的数值，最后取不带单位的数值。
+    成对存储的单位之间（hp与kW等）默认不做换算，由后续的单位归一化补全
+    """
+    if not text:
+        return None
+
+    unit = normalize_unit(unit)
+    convertible = None
+    unitless = None
+
+    for quantity in iter_quantities(text):
+        if quantity.qualifier == 'ratio':
+            continue
+        if quantity.unit == unit:
+            return quantity.value
+        if quantity.unit is None:
+            if unitless is None:
+                unitless = quantity.value
+            continue
+        if convertible is None and (convert_paired or PAIRED_UNITS.get(unit) != quantity.unit):
+            convertible = convert(quantity.value, quantity.unit, unit)
+
+    if convertible is not None:
+        return round(convertible, 2)
+    if allow_unitless:
+        return unitless
+    return None
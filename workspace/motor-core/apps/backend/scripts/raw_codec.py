@@ -0,0 +1,169 @@
+"""
+raw_data编码
+
+记录先序列化为紧凑的二进制（有msgpack时使用msgpack，否则为不带空白的JSON），
+再用在本库记录上训练的字典压缩（有zstandard时用zstd，否则用zlib的预置字典）。
+编码结果以6字节头开始：序列化方式、压缩方式、字典id（大端uint32，0表示无字典），
+不同方式写入的行可以混存；TEXT值是未压缩的JSON文本（早期版本或未启用压缩时写入）
+"""
+
+import json
+import struct
+import threading
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，退化为zlib
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack为可选依赖，退化为紧凑JSON
+    msgpack = None
+
+HEADER = struct.Struct('>ccI')
+
+SERIALIZE_JSON = b'j'
+SERIALIZE_MSGPACK = b'm'
+COMPRESS_ZLIB = b'z'
+COMPRESS_ZSTD = b's'
+
+ZLIB_DICT_SIZE = 32 * 1024  # zlib窗口大小，预置字典超出的部分不起作用
+ZSTD_DICT_SIZE = 64 * 1024
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 9
+
+
+def _json_bytes(record: Any) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class RawDataCodec:
+    """raw_data编解码器
+
+    dictionaries为 字典id → (压缩方式, 字典字节)，编码使用与当前压缩方式相同的最新字典；
+    loader在解码遇到未知字典id时调用（其他进程训练了新字典），返回 (压缩方式, 字典字节) 或None
+    """
+
+    def __init__(self, dictionaries: Optional[Dict[int, tuple]] = None,
+                 loader: Optional[Callable[[int], Optional[tuple]]] = None):
+        self.serialization = SERIALIZE_MSGPACK if msgpack is not None else SERIALIZE_JSON
+        self.compression = COMPRESS_ZSTD if zstandard is not None else COMPRESS_ZLIB
+        self.loader = loader
+        self.dictionaries: Dict[int, tuple] = {}
+        self.dictionary_id = 0
+        # zstd的压缩/解压对象不能被多个线程同时使用，按线程缓存
+        self._local = threading.local()
+        for dictionary_id, (compression, data) in sorted((dictionaries or {}).items()):
+            self.add_dictionary(dictionary_id, compression, data)
+
+    def add_dictionary(self, dictionary_id: int, compression: bytes, data: bytes):
+        """登记字典；与当前压缩方式相同时，之后的编码使用它"""
+        self.dictionaries[dictionary_id] = (compression, data)
+        if compression == self.compression and dictionary_id > self.dictionary_id:
+            self.dictionary_id = dictionary_id
+
+    def train(self, records: Iterable[Dict[str, Any]]) -> bytes:
+        """用样本记录训练当前压缩方式的字典"""
+        samples = [self._serialize(record) for record in records]
+        if self.compression == COMPRESS_ZSTD:
+            return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+
+        # zlib没有训练接口：预置字典直接由样本拼接而成，记录间重复的键名、URL前缀、描述和特性
+        # 都能在字典中找到；越靠后的样本离待压缩数据越近，因此从后向前取满窗口大小
+        return b''.join(samples)[-ZLIB_DICT_SIZE:]
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        """序列化并压缩一条记录"""
+        payload = self._serialize(record)
+        header = HEADER.pack(self.serialization, self.compression, self.dictionary_id)
+        return header + self._compressor()(payload)
+
+    def decode(self, value: Union[bytes, str, None]) -> Optional[Dict[str, Any]]:
+        """解码为记录，TEXT值按JSON解析"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        serialization, payload = self._decompress(value)
+        if serialization == SERIALIZE_MSGPACK:
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload)
+
+    def decode_json(self, value: Union[bytes, str, None]) -> Optional[str]:
+        """解码为JSON文本，供SQL中的json_extract等函数使用"""
+        if value is None or isinstance(value, str):
+            return value
+        serialization, payload = self._decompress(value)
+        if serialization == SERIALIZE_MSGPACK:
+            return _json_bytes(msgpack.unpackb(payload, raw=False)).decode('utf-8')
+        return payload.decode('utf-8')
+
+    def _serialize(self, record: Dict[str, Any]) -> bytes:
+        if self.serialization == SERIALIZE_MSGPACK:
+            return msgpack.packb(record, use_bin_type=True, default=str)
+        return _json_bytes(record)
+
+    def _thread_cache(self, name: str) -> Dict[int, Any]:
+        cache = getattr(self._local, name, None)
+        if cache is None:
+            cache = {}
+            setattr(self._local, name, cache)
+        return cache
+
+    def _dictionary(self, dictionary_id: int) -> tuple:
+        if dictionary_id not in self.dictionaries:
+            found = self.loader(dictionary_id) if self.loader is not None else None
+            if found is None:
+                raise ValueError(f"未知的raw_data压缩字典: {dictionary_id}")
+            self.add_dictionary(dictionary_id, *found)
+        return self.dictionaries[dictionary_id]
+
+    def _compressor(self) -> Callable[[bytes], bytes]:
+        """返回当前字典的压缩函数（按字典缓存）"""
+        compressors = self._thread_cache('compressors')
+        compress = compressors.get(self.dictionary_id)
+        if compress is not None:
+            return compress
+
+        data = self._dictionary(self.dictionary_id)[1] if self.dictionary_id else None
+        if self.compression == COMPRESS_ZSTD:
+            dict_data = zstandard.ZstdCompressionDict(data) if data else None
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+            compress = compressor.compress
+        else:
+            # 加载了预置字典的压缩对象只建一次，每条记录复制一份使用（比每次重新加载字典快）
+            primed = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, -15, **({'zdict': data} if data else {}))
+
+            def compress(payload: bytes) -> bytes:
+                compressor = primed.copy()
+                return compressor.compress(payload) + compressor.flush()
+
+        compressors[self.dictionary_id] = compress
+        return compress
+
+    def _decompress(self, value: bytes) -> tuple:
+        serialization, compression, dictionary_id = HEADER.unpack_from(value)
+        if serialization == SERIALIZE_MSGPACK and msgpack is None:
+            raise RuntimeError("该记录用msgpack序列化，需要安装msgpack")
+        body = memoryview(value)[HEADER.size:]
+        data = None
+        if dictionary_id:
+            dictionary_compression, data = self._dictionary(dictionary_id)
+            if dictionary_compression != compression:
+                raise ValueError(f"raw_data压缩字典 {dictionary_id} 的压缩方式不匹配")
+
+        if compression == COMPRESS_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("该记录用zstd压缩，需要安装zstandard")
+            decompressors = self._thread_cache('decompressors')
+            decompressor = decompressors.get(dictionary_id)
+            if decompressor is None:
+                dict_data = zstandard.ZstdCompressionDict(data) if data else None
+                decompressor = decompressors[dictionary_id] = zstandard.ZstdDecompressor(dict_data=dict_data)
+            return serialization, decompressor.decompress(body)
+
+        decompressor = zlib.decompressobj(-15, **({'zdict': data} if data else {}))
+        return serialization, decompressor.decompress(body) + decompressor.flush()
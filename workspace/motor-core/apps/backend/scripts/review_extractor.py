@@ -0,0 +1,209 @@
+"""
+评测文章提取
+
+对DOM做一次自底向上的遍历，统计每个节点的文本长度和链接文本长度，
+按段落得分和链接密度选出正文区域，再从中提取优缺点和结论，整体与页面大小成线性关系
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bs4 import Comment, NavigableString, Tag
+
+from models import ReviewData
+
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'form', 'button', 'select'}
+CANDIDATE_TAGS = {'article', 'main', 'section', 'div', 'td'}
+PARAGRAPH_TAGS = {'p', 'pre', 'blockquote'}
+HEADING_TAGS = ['h2', 'h3', 'h4', 'h5', 'strong', 'b', 'dt']
+
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|post|story|text|review', re.IGNORECASE)
+NEGATIVE_HINTS = re.compile(
+    r'comment|footer|nav|sidebar|menu|related|share|social|promo|advert|banner|header|widget|newsletter|subscribe',
+    re.IGNORECASE
+)
+
+PROS_HEADING = re.compile(r'^\s*(?:pros|likes|highs|the good|what we like|plus(?:es)?|advantages)\b', re.IGNORECASE)
+CONS_HEADING = re.compile(r'^\s*(?:cons|dislikes|lows|the bad|what we don.t like|minus(?:es)?|disadvantages)\b', re.IGNORECASE)
+VERDICT_HEADING = re.compile(r'^\s*(?:verdict|the verdict|conclusion|bottom line|final thoughts|our take|summary)\b', re.IGNORECASE)
+
+MIN_PARAGRAPH_LENGTH = 25
+MIN_CONTENT_LENGTH = 200
+
+
+def _class_weight(tag: Tag) -> int:
+    """按class/id给候选节点加减分"""
+    hints = ' '.join(tag.get('class') or []) + ' ' + (tag.get('id') or '')
+    if not hints.strip():
+        return 0
+    weight = 0
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    return weight
+
+
+def find_main_content(soup) -> Optional[Tag]:
+    """一次遍历找出正文所在的节点
+
+    先序遍历的逆序保证子节点先于父节点处理，文本长度和链接文本长度逐级向上累加；
+    每个段落按长度打分，分数计入父节点和（减半）祖父节点
+    """
+    # 节点id → [文本长度, 链接文本长度, 段落得分]
+    stats: Dict[int, List[float]] = {}
+    candidates: List[Tag] = []
+
+    for node in reversed(list(soup.descendants)):
+        parent = node.parent
+        if parent is None:
+            continue
+
+        if isinstance(node, NavigableString):
+            if isinstance(node, Comment) or parent.name in SKIP_TAGS:
+                continue
+            length = len(node.strip())
+            if length:
+                parent_stats = stats.setdefault(id(parent), [0, 0, 0.0])
+                parent_stats[0] += length
+            continue
+
+        if node.name in SKIP_TAGS:
+            continue
+
+        node_stats = stats.setdefault(id(node), [0, 0, 0.0])
+        if node.name == 'a':
+            node_stats[1] = node_stats[0]
+
+        if node.name in PARAGRAPH_TAGS and node_stats[0] >= MIN_PARAGRAPH_LENGTH:
+            score = 1 + min(node_stats[0] / 100, 3)
+            parent_stats = stats.setdefault(id(parent), [0, 0, 0.0])
+            parent_stats[2] += score
+            grandparent = parent.parent
+            if grandparent is not None:
+                stats.setdefault(id(grandparent), [0, 0, 0.0])[2] += score / 2
+
+        if node.name in CANDIDATE_TAGS:
+            candidates.append(node)
+
+        parent_stats = stats.setdefault(id(parent), [0, 0, 0.0])
+        parent_stats[0] += node_stats[0]
+        parent_stats[1] += node_stats[1]
+
+    best, best_score = None, 0.0
+    for tag in candidates:
+        text_length, link_length, paragraph_score = stats[id(tag)]
+        if not paragraph_score or text_length < MIN_CONTENT_LENGTH:
+            continue
+        link_density = link_length / text_length
+        score = paragraph_score * (1 - link_density) + _class_weight(tag)
+        if score > best_score:
+            best, best_score = tag, score
+
+    return best
+
+
+def _items_after(heading: Tag) -> List[str]:
+    """取标题后面第一个列表的条目"""
+    container = heading if heading.name in ('ul', 'ol') else heading.find_next(['ul', 'ol'])
+    if container is None:
+        return []
+    return [li.get_text(' ', strip=True) for li in container.find_all('li') if li.get_text(strip=True)]
+
+
+def _paragraphs_after(heading: Tag, limit: int = 3) -> str:
+    """取标题之后、下一个同级标题之前的段落"""
+    paragraphs = []
+    for sibling in heading.find_next_siblings():
+        if sibling.name in HEADING_TAGS[:4]:
+            break
+        if sibling.name == 'p':
+            text = sibling.get_text(' ', strip=True)
+            if text:
+                paragraphs.append(text)
+            if len(paragraphs) >= limit:
+                break
+    return '\n'.join(paragraphs)
+
+
+def _select_items(soup, selector: Optional[str]) -> List[str]:
+    if not selector:
+        return []
+    return [elem.get_text(' ', strip=True) for elem in soup.select(selector) if elem.get_text(strip=True)]
+
+
+def _review_date(soup) -> Optional[datetime]:
+    """从meta或<time>标签读取发布时间"""
+    meta = soup.find('meta', attrs={'property': 'article:published_time'}) or \
+        soup.find('meta', attrs={'itemprop': 'datePublished'})
+    value = meta.get('content') if meta else None
+    if not value:
+        time_tag = soup.find('time', attrs={'datetime': True})
+        value = time_tag['datetime'] if time_tag else None
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def extract_review(soup, url: str, motorcycle_id: str = '', reviewer: str = '',
+                   selectors: Optional[Dict[str, str]] = None,
+                   structured_review: bool = False) -> Optional[ReviewData]:
+    """从页面提取评测文章，不是评测页面时返回None
+
+    structured_review表示页面的结构化数据中含有Review节点
+    """
+    selectors = selectors or {}
+
+    # 网站有明确的正文选择器时直接使用，否则按文本密度查找
+    content_elem = soup.select_one(selectors['review_content']) if selectors.get('review_content') else None
+    from_selector = content_elem is not None
+    if content_elem is None:
+        content_elem = find_main_content(soup)
+    if content_elem is None:
+        return None
+
+    content = '\n'.join(
+        p.get_text(' ', strip=True) for p in content_elem.find_all(['p', 'li'])
+        if p.get_text(strip=True)
+    ) or content_elem.get_text('\n', strip=True)
+    if len(content) < MIN_CONTENT_LENGTH:
+        return None
+
+    pros = _select_items(soup, selectors.get('pros'))
+    cons = _select_items(soup, selectors.get('cons'))
+    verdict = None
+
+    # 一次遍历所有小标题，识别优缺点和结论
+    for heading in soup.find_all(HEADING_TAGS):
+        text = heading.get_text(' ', strip=True)
+        if not text or len(text) > 60:
+            continue
+        if not pros and PROS_HEADING.match(text):
+            pros = _items_after(heading)
+        elif not cons and CONS_HEADING.match(text):
+            cons = _items_after(heading)
+        elif verdict is None and VERDICT_HEADING.match(text):
+            verdict = _paragraphs_after(heading) or None
+
+    # 正文较长的规格页、新闻页不算评测：需要优缺点或结论标题、网站评测选择器或Review结构化数据
+    if not (pros or cons or verdict or from_selector or structured_review):
+        return None
+
+    title_elem = soup.find('h1')
+    author = soup.find('meta', attrs={'name': 'author'})
+
+    return ReviewData(
+        motorcycle_id=motorcycle_id,
+        reviewer=(author.get('content') if author and author.get('content') else reviewer),
+        review_date=_review_date(soup),
+        title=title_elem.get_text(' ', strip=True) if title_elem else None,
+        content=content,
+        pros=pros or None,
+        cons=cons or None,
+        verdict=verdict,
+        source_url=url
+    )
@@ -1,13 +1,35 @@
 import requests
 import time
 import random
+import json
+import re
 from typing import Optional, Dict, Any, List
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import logging
+import sqlite3
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from models import Motorcycle, PriceInfo, Rating, ReviewData
+from spec_parser import SpecTable, parse_spec_sections
+from quantity import NUMBER_PATTERN, parse_number
+from extraction_cache import ExtractionCache, MISS, content_hash
+from link_classifier import LinkBuckets, LinkClassifier
+from review_extractor import extract_review
+
+# 结构化数据中视为摩托车/产品的类型
+STRUCTURED_ITEM_TYPES = {'product', 'vehicle', 'motorcycle', 'car', 'individualproduct', 'productmodel'}
+STRUCTURED_REVIEW_TYPES = {'review', 'criticreview'}
+
+# 前端框架嵌入的应用状态脚本
+APP_STATE_SCRIPT_IDS = ['__NEXT_DATA__', '__NUXT_DATA__', '__APOLLO_STATE__']
+# 评分文本：8.5/10、4,5 / 5、4 stars
+RATING_TEXT_PATTERN = re.compile(rf'(?P<score>{NUMBER_PATTERN})\s*(?:/\s*(?P<scale>\d+)|(?P<stars>stars?)\b)',
+                                 re.IGNORECASE)
+APP_STATE_ASSIGNMENT = re.compile(r'window\.(?:__INITIAL_STATE__|__PRELOADED_STATE__|__NUXT__|__APOLLO_STATE__)\s*=\s*')
+
 @dataclass
 class ScrapingConfig:
     """爬虫配置"""
@@ -17,41 +39,56 @@ class ScrapingConfig:
     timeout: int = 10  # 请求超时时间
     concurrent_requests: int = 1  # 并发请求数
     respect_robots_txt: bool = True  # 遵守robots.txt
+    cache_path: Optional[str] = None  # 提取结果缓存数据库路径，None表示不缓存
+    parse_workers: int = 0  # 解析进程数，0表示在抓取线程内解析
+    parse_chunk_size: int = 8  # 每次提交给解析进程的页面数
+    teardown_trees: bool = False  # 提取后立即拆除解析树（长时间爬取时使用）
+    memory_ceiling_mb: int = 0  # 进程常驻内存上限（MB），0表示不限制
+    yield_window: int = 50  # 产出统计的滑动窗口页面数
+    min_yield: float = 0.2  # 有效记录比例低于该值时暂停该网站，0表示不暂停
+    save_batch_size: int = 500  # 每个写入事务最多包含的记录数
+    save_interval: float = 0.2  # 记录在写入队列中最多等待的秒数，不足一批也写入
+    conflict_policy: str = 'overwrite'  # 不同来源的同一车型：overwrite、keep_newest或merge
+    compress_raw_data: bool = False  # raw_data用训练的字典压缩后写入
     
 class RateLimiter:
-    """请求频率限制器"""
+    """请求频率限制器（线程安全）"""
     
     def __init__(self, min_delay: float = 1.0, max_delay: float = 3.0):
         self.min_delay = min_delay
         self.max_delay = max_delay
         self.last_request_time = 0
+        self._lock = threading.Lock()
     
     def wait_if_needed(self):
         """如果需要，等待适当的时间"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        
         # 随机延迟，避免被检测为机器人
         required_delay = random.uniform(self.min_delay, self.max_delay)
         
-        if elapsed < required_delay:
-            sleep_time = required_delay - elapsed
-            time.sleep(sleep_time)
+        # 在锁内预约下一个请求时间点，锁外等待，多个线程的请求依次错开
+        with self._lock:
+            current_time = time.time()
+            slot = max(current_time, self.last_request_time + required_delay)
+            self.last_request_time = slot
         
-        self.last_request_time = time.time()
+        sleep_time = slot - current_time
+        if sleep_time > 0:
+            time.sleep(sleep_time)
 
 class UserAgentRotator:
-    """用户代理轮换器"""
+    """用户代理轮换器（线程安全）"""
     
     def __init__(self):
-        self.user_agents = [
+        # 不可变元组，可在线程间共享
+        self.user_agents = (
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        ]
+        )
         self.current_index = 0
+        self._lock = threading.Lock()
     
     def get_random_agent(self) -> str:
         """获取随机用户代理"""
@@ -59,22 +96,44 @@ class UserAgentRotator:
     
     def get_next_agent(self) -> str:
         """按顺序获取下一个用户代理"""
-        agent = self.user_agents[self.current_index]
-        self.current_index = (self.current_index + 1) % len(self.user_agents)
+        with self._lock:
+            agent = self.user_agents[self.current_index]
+            self.current_index = (self.current_index + 1) % len(self.user_agents)
         return agent
 
 class BaseScraper:
     """基础爬虫类"""
     
+    # 提取逻辑变化时递增，使该爬虫的缓存失效
+    EXTRACTOR_VERSION = 1
+    
+    # 列表页链接分类器，由子类按网站URL结构提供
+    LINK_CLASSIFIER: Optional[LinkClassifier] = None
+    
     def __init__(self, config: Optional[ScrapingConfig] = None):
         self.config = config or ScrapingConfig()
         self.rate_limiter = RateLimiter(self.config.min_delay, self.config.max_delay)
         self.user_agent_rotator = UserAgentRotator()
-        self.session = requests.Session()
         self.logger = self._setup_logger()
+        self.extraction_cache = ExtractionCache(self.config.cache_path) if self.config.cache_path else None
         
-        # 设置默认头部
-        self._update_session_headers()
+        # requests.Session不是线程安全的，每个线程使用自己的会话
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的会话，首次访问时创建"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+            # 设置默认头部
+            self._update_session_headers()
+        return session
     
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
@@ -152,16 +211,320 @@ class BaseScraper:
         """从文本中提取数字"""
         if not text:
             return default
+        return parse_number(text, default)
+    
+    def parse_spec_table(self, soup) -> SpecTable:
+        """把规格和性能区域解析成标签→数值字典"""
+        sections = []
+        for key in ('specifications', 'performance'):
+            selector = self.selectors.get(key) if hasattr(self, 'selectors') else None
+            if selector:
+                sections.extend(soup.select(selector))
         
-        import re
-        # 查找数字（包括小数）
-        numbers = re.findall(r'\d+\.?\d*', text.replace(',', ''))
-        if numbers:
+        # 嵌套匹配时只保留最外层区域，避免重复遍历
+        section_ids = {id(section) for section in sections}
+        outermost, seen = [], set()
+        for section in sections:
+            if id(section) in seen or any(id(parent) in section_ids for parent in section.parents):
+                continue
+            seen.add(id(section))
+            outermost.append(section)
+        return parse_spec_sections(outermost)
+    
+    def extract_structured_data(self, soup) -> Dict[str, Any]:
+        """从JSON-LD、应用状态JSON、微数据和OpenGraph中提取结构化数据
+        
+        按可靠性依次填充字段，已填充的字段不会被后面的来源覆盖
+        """
+        data: Dict[str, Any] = {}
+        
+        for item in self._iter_json_ld_items(soup):
+            self._merge_structured_item(data, item)
+        
+        for item in self._iter_app_state_items(soup):
+            self._merge_structured_item(data, item)
+        
+        self._merge_microdata(data, soup)
+        self._merge_open_graph(data, soup)
+        
+        return data
+    
+    def _iter_json_ld_items(self, soup):
+        """遍历JSON-LD中的产品/评测节点"""
+        for script in soup.find_all('script', type='application/ld+json'):
+            payload = self._load_json(script.string or script.get_text())
+            if payload is not None:
+                yield from self._find_typed_nodes(payload)
+    
+    def _iter_app_state_items(self, soup):
+        """遍历框架嵌入的应用状态JSON"""
+        for script_id in APP_STATE_SCRIPT_IDS:
+            script = soup.find('script', id=script_id)
+            if script:
+                payload = self._load_json(script.string or script.get_text())
+                if payload is not None:
+                    yield from self._find_typed_nodes(payload, loose=True)
+        
+        for script in soup.find_all('script', src=False):
+            text = script.string
+            if not text or 'window.__' not in text:
+                continue
+            match = APP_STATE_ASSIGNMENT.search(text)
+            if not match:
+                continue
             try:
-                return float(numbers[0])
+                payload, _ = json.JSONDecoder().raw_decode(text, match.end())
             except ValueError:
-                pass
-        return default
+                continue
+            yield from self._find_typed_nodes(payload, loose=True)
+    
+    @staticmethod
+    def _load_json(text: Optional[str]) -> Any:
+        """安全解析JSON文本"""
+        if not text:
+            return None
+        try:
+            return json.loads(text.strip())
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _find_typed_nodes(payload: Any, loose: bool = False, max_nodes: int = 50000):
+        """迭代遍历JSON，产出产品或评测节点
+        
+        loose为True时，同时接受含有品牌和型号字段的普通对象（应用状态JSON常见）
+        """
+        stack = [payload]
+        visited = 0
+        
+        while stack and visited < max_nodes:
+            node = stack.pop()
+            visited += 1
+            
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+                continue
+            if not isinstance(node, dict):
+                continue
+            
+            node_type = node.get('@type')
+            types = node_type if isinstance(node_type, list) else [node_type]
+            types = {str(t).lower() for t in types if t}
+            
+            if types & (STRUCTURED_ITEM_TYPES | STRUCTURED_REVIEW_TYPES):
+                yield node
+            elif loose and ('make' in node or 'brand' in node) and 'model' in node:
+                yield node
+            
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    
+    def _merge_structured_item(self, data: Dict[str, Any], item: Dict[str, Any]):
+        """将一个JSON节点映射为统一字段"""
+        node_type = item.get('@type')
+        types = node_type if isinstance(node_type, list) else [node_type]
+        types = {str(t).lower() for t in types if t}
+        
+        if types & STRUCTURED_REVIEW_TYPES:
+            data['is_review'] = True
+            rating = item.get('reviewRating')
+            if isinstance(rating, dict):
+                self._set_rating(data, rating)
+            reviewed = item.get('itemReviewed')
+            if isinstance(reviewed, dict):
+                self._merge_structured_item(data, reviewed)
+            return
+        
+        self._set_default(data, 'title', self._json_text(item.get('name')))
+        self._set_default(data, 'brand', self._json_text(item.get('brand') or item.get('manufacturer') or item.get('make')))
+        self._set_default(data, 'model', self._json_text(item.get('model')))
+        self._set_default(data, 'description', self._json_text(item.get('description')))
+        self._set_default(data, 'category', self._json_text(item.get('category') or item.get('bodyType')))
+        
+        for key in ('vehicleModelDate', 'modelDate', 'productionDate', 'releaseDate', 'year'):
+            year = self._json_year(item.get(key))
+            if year:
+                self._set_default(data, 'year', year)
+                break
+        
+        offers = item.get('offers')
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        if isinstance(offers, dict):
+            price = offers.get('price') or offers.get('lowPrice')
+            if isinstance(price, dict):
+                price = price.get('value')
+            self._set_default(data, 'price', self.extract_number(str(price)) if price is not None else None)
+            self._set_default(data, 'currency', self._json_text(offers.get('priceCurrency')))
+        elif item.get('price') is not None:
+            self._set_default(data, 'price', self.extract_number(str(item.get('price'))))
+        
+        rating = item.get('aggregateRating') or item.get('reviewRating')
+        if isinstance(rating, dict):
+            self._set_rating(data, rating)
+        
+        images = self._json_images(item.get('image'))
+        if images and not data.get('images'):
+            data['images'] = images
+    
+    def _merge_microdata(self, data: Dict[str, Any], soup):
+        """提取schema.org微数据"""
+        if soup.find(attrs={'itemtype': re.compile(r'schema\.org/(?:Critic)?Review$', re.I)}):
+            data['is_review'] = True
+        for elem in soup.select('[itemprop]'):
+            prop = elem.get('itemprop')
+            value = elem.get('content') or elem.get('src') or elem.get('href') or elem.get_text(strip=True)
+            if not value:
+                continue
+            
+            if prop == 'name' and elem.find_parent(attrs={'itemtype': re.compile('Product|Vehicle|Motorcycle', re.I)}):
+                self._set_default(data, 'title', value)
+            elif prop == 'brand':
+                self._set_default(data, 'brand', value)
+            elif prop == 'model':
+                self._set_default(data, 'model', value)
+            elif prop in ('price', 'lowPrice'):
+                self._set_default(data, 'price', self.extract_number(value))
+            elif prop == 'priceCurrency':
+                self._set_default(data, 'currency', value)
+            elif prop == 'ratingValue':
+                self._set_default(data, 'rating', self.extract_number(value))
+            elif prop == 'bestRating':
+                self._set_default(data, 'rating_scale', self.extract_number(value))
+            elif prop == 'image':
+                if not data.get('images'):
+                    data['images'] = []
+                if value not in data['images']:
+                    data['images'].append(value)
+            elif prop == 'description':
+                self._set_default(data, 'description', value)
+    
+    def _merge_open_graph(self, data: Dict[str, Any], soup):
+        """提取OpenGraph元数据"""
+        og_images = []
+        
+        for meta in soup.find_all('meta', content=True):
+            prop = meta.get('property') or meta.get('name')
+            if not prop:
+                continue
+            value = meta['content'].strip()
+            
+            if prop == 'og:title':
+                # OpenGraph标题常带有站点名后缀，仅在页面没有标题元素时使用
+                self._set_default(data, 'og_title', value)
+            elif prop == 'og:description':
+                self._set_default(data, 'description', value)
+            elif prop in ('og:image', 'og:image:url', 'og:image:secure_url'):
+                if value not in og_images:
+                    og_images.append(value)
+            elif prop in ('product:price:amount', 'og:price:amount'):
+                self._set_default(data, 'price', self.extract_number(value))
+            elif prop in ('product:price:currency', 'og:price:currency'):
+                self._set_default(data, 'currency', value)
+        
+        if og_images and not data.get('images'):
+            data['images'] = og_images
+    
+    def _set_rating(self, data: Dict[str, Any], rating: Dict[str, Any]):
+        """设置评分及满分"""
+        value = rating.get('ratingValue')
+        if value is not None:
+            self._set_default(data, 'rating', self.extract_number(str(value)))
+        best = rating.get('bestRating')
+        if best is not None:
+            self._set_default(data, 'rating_scale', self.extract_number(str(best)))
+    
+    @staticmethod
+    def _set_default(data: Dict[str, Any], key: str, value: Any):
+        """仅在字段缺失时设置"""
+        if value not in (None, '', []) and data.get(key) in (None, '', []):
+            data[key] = value
+    
+    @staticmethod
+    def _json_text(value: Any) -> Optional[str]:
+        """把JSON值（字符串、带name的对象或列表）转成文本"""
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if isinstance(value, dict):
+            value = value.get('name') or value.get('@value')
+        if isinstance(value, (str, int, float)):
+            text = str(value).strip()
+            return text or None
+        return None
+    
+    @staticmethod
+    def _json_year(value: Any) -> Optional[int]:
+        """从日期或年份字段中提取年份"""
+        if value is None:
+            return None
+        match = re.search(r'\b(19\d{2}|20\d{2})\b', str(value))
+        return int(match.group(1)) if match else None
+    
+    @staticmethod
+    def _json_images(value: Any) -> List[str]:
+        """把JSON中的image字段统一为URL列表"""
+        if not value:
+            return []
+        values = value if isinstance(value, list) else [value]
+        images = []
+        for item in values:
+            if isinstance(item, dict):
+                item = item.get('url') or item.get('contentUrl')
+            if isinstance(item, str) and item not in images:
+                images.append(item)
+        return images
+    
+    def price_from_structured(self, data: Dict[str, Any]) -> Optional[PriceInfo]:
+        """由结构化数据构建价格信息"""
+        if not data.get('price'):
+            return None
+        return PriceInfo(
+            msrp=data['price'],
+            currency=data.get('currency') or "USD",
+            year=data.get('year') or datetime.now().year
+        )
+    
+    def rating_from_structured(self, data: Dict[str, Any]) -> Optional[Rating]:
+        """由结构化数据构建评分信息"""
+        if not data.get('rating'):
+            return None
+        scale = data.get('rating_scale') or (5 if data['rating'] <= 5 else 10)
+        return Rating(overall=data['rating'], scale=int(scale))
+    
+    def rating_from_text(self, text: str) -> Optional[Rating]:
+        """从评分文本解析评分，没有写明满分时按数值推断"""
+        if not text:
+            return None
+        match = RATING_TEXT_PATTERN.search(text)
+        if match:
+            overall = parse_number(match.group('score'))
+            scale = int(match.group('scale')) if match.group('scale') else 5
+        else:
+            overall = parse_number(text)
+            scale = 5 if overall is not None and overall <= 5 else 10
+        if not overall or not scale:
+            return None
+        return Rating(overall=overall, scale=scale)
+    
+    def images_from_structured(self, data: Dict[str, Any], base_url: str) -> List[str]:
+        """由结构化数据构建图片URL列表"""
+        images = []
+        for src in data.get('images', []):
+            full_url = urljoin(base_url, src)
+            if self.is_valid_url(full_url) and full_url not in images:
+                images.append(full_url)
+        return images
+    
+    def extract_review(self, soup, url: str, motorcycle: Motorcycle,
+                       structured: Optional[Dict[str, Any]] = None) -> Optional[ReviewData]:
+        """提取评测文章，正文选择器和优缺点选择器取自子类的selectors"""
+        selectors = getattr(self, 'selectors', {})
+        return extract_review(
+            soup, url,
+            motorcycle_id=f"{motorcycle.brand} {motorcycle.model} {motorcycle.year}".strip(),
+            reviewer=self.get_domain(url),
+            selectors={key: selectors.get(key) for key in ('review_content', 'pros', 'cons')},
+            structured_review=bool(structured and structured.get('is_review'))
+        )
     
     def build_absolute_url(self, base_url: str, relative_url: str) -> str:
         """构建绝对URL"""
@@ -180,9 +543,88 @@ class BaseScraper:
         return urlparse(url).netloc
     
     def scrape_page(self, url: str) -> Optional[Dict[str, Any]]:
-        """爬取单个页面的抽象方法，子类需要实现"""
+        """爬取单个页面"""
+        response = self.get(url)
+        if not response:
+            return None
+        
+        return self.extract_from_html(response.text, url)
+    
+    def extract_from_html(self, html: str, url: str) -> Optional[Dict[str, Any]]:
+        """从页面HTML提取数据，内容未变化时直接返回缓存结果"""
+        if self.extraction_cache is None:
+            return self._parse_and_extract(html, url)
+        
+        key = content_hash(html)
+        scraper_name = self.__class__.__name__
+        cached = self.extraction_cache.get(key, scraper_name, self.EXTRACTOR_VERSION)
+        if cached is not MISS:
+            self.logger.debug(f"命中提取缓存: {url}")
+            if cached:
+                self._refresh_cached(cached, url)
+            return cached
+        
+        data = self._parse_and_extract(html, url)
+        try:
+            self.extraction_cache.put(key, scraper_name, self.EXTRACTOR_VERSION, data)
+        except sqlite3.Error as e:
+            # 缓存只是加速手段，写入失败（如数据库被其他进程锁住）不能丢掉已经提取的记录
+            self.logger.warning(f"写入提取缓存失败: {url}: {e}")
+        return data
+    
+    @staticmethod
+    def _refresh_cached(data: Dict[str, Any], url: str):
+        """缓存结果按本次请求更新：来源为本次URL、抓取时间为现在，
+        与首次抓取页面同源的链接（由相对链接解析而来）改为相对本次URL解析
+        """
+        previous = urlparse(data.get('source_url') or '')
+        
+        def rebase(link: str) -> str:
+            parsed = urlparse(link)
+            if not previous.netloc or (parsed.scheme, parsed.netloc) != (previous.scheme, previous.netloc):
+                return link
+            return urljoin(url, parsed._replace(scheme='', netloc='').geturl())
+        
+        now = datetime.now().isoformat()
+        data.update(source_url=url, scraped_at=now, updated_at=now)
+        data['images'] = [rebase(image) for image in data.get('images') or []]
+        if data.get('review'):
+            data['review']['source_url'] = url
+    
+    def _parse_and_extract(self, html: str, url: str) -> Optional[Dict[str, Any]]:
+        """解析HTML并提取数据，长时间爬取模式下提取完成后立即拆除解析树"""
+        soup = self.parse_html(html)
+        try:
+            return self.extract_page(soup, url)
+        finally:
+            if self.config.teardown_trees:
+                # 主动断开父子节点间的循环引用，不必等待循环垃圾回收
+                soup.decompose()
+    
+    def extract_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
+        """从解析后的页面提取数据的抽象方法，子类需要实现"""
         raise NotImplementedError("子类必须实现此方法")
     
+    def discover_links(self, listing_url: str) -> LinkBuckets:
+        """抓取列表页，一次遍历把链接分为详情页、列表页和翻页"""
+        if self.LINK_CLASSIFIER is None:
+            raise NotImplementedError("子类必须提供LINK_CLASSIFIER")
+        
+        response = self.get(listing_url)
+        if not response:
+            return LinkBuckets()
+        
+        soup = self.parse_html(response.text)
+        try:
+            return self.LINK_CLASSIFIER.classify(soup, listing_url)
+        finally:
+            if self.config.teardown_trees:
+                soup.decompose()
+    
+    def extract_motorcycle_urls_from_listing(self, listing_url: str) -> List[str]:
+        """从列表页面提取摩托车详情页URL"""
+        return self.discover_links(listing_url).detail
+    
     def scrape_multiple(self, urls: List[str]) -> List[Dict[str, Any]]:
         """爬取多个页面"""
         results = []
@@ -201,5 +643,16 @@ class BaseScraper:
     def __enter__(self):
         return self
     
+    def close(self):
+        """关闭所有线程的会话和缓存连接"""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+        if self.extraction_cache is not None:
+            self.extraction_cache.close()
+            self.extraction_cache = None
+    
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.session.close()
\ No newline at end of file
+        self.close()
\ No newline at end of file
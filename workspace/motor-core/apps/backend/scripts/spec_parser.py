@@ -0,0 +1,192 @@
+"""
+规格表解析
+
+把<table>、<dl>以及"标签: 数值"形式的列表一次性解析成 标签→数值 字典，
+再通过同义词表把各网站的标签映射到EngineSpecs、Performance、Dimensions字段
+"""
+
+import re
+from typing import Dict, Any, Optional, Iterable, Tuple
+
+from quantity import FIELD_CANONICAL_UNITS, parse_measure, tokenize_quantities
+
+# 字段 → 网站上常见的标签写法（按优先级排列，均为标准化后的形式）
+SPEC_FIELD_SYNONYMS = {
+    'engine': {
+        'type': ['engine type', 'engine configuration', 'configuration', 'engine'],
+        'displacement': ['displacement', 'engine displacement', 'capacity', 'engine capacity', 'engine size', 'engine'],
+        'bore': ['bore', 'bore x stroke'],
+        'stroke': ['stroke', 'bore x stroke'],
+        'compression_ratio': ['compression ratio', 'compression'],
+        'cooling': ['cooling', 'cooling system'],
+        'fuel_system': ['fuel system', 'fuel delivery', 'fuel injection', 'induction'],
+    },
+    'performance': {
+        'power_hp': ['horsepower', 'claimed horsepower', 'measured horsepower', 'max power', 'maximum power', 'peak power', 'power'],
+        'power_kw': ['max power', 'maximum power', 'peak power', 'power'],
+        'torque_nm': ['torque', 'claimed torque', 'measured torque', 'max torque', 'maximum torque', 'peak torque'],
+        'torque_lbft': ['torque', 'claimed torque', 'measured torque', 'max torque', 'maximum torque', 'peak torque'],
+        'top_speed_mph': ['top speed', 'max speed', 'maximum speed'],
+        'top_speed_kmh': ['top speed', 'max speed', 'maximum speed'],
+        'acceleration_0_60': ['0-60 mph', '0-60', '0 to 60', '0-60 time', 'acceleration'],
+        'quarter_mile': ['quarter mile', '1/4 mile', 'quarter-mile'],
+    },
+    'dimensions': {
+        'length': ['length', 'overall length'],
+        'width': ['width', 'overall width'],
+        'height': ['height', 'overall height'],
+        'wheelbase': ['wheelbase'],
+        'ground_clearance': ['ground clearance', 'clearance'],
+        'seat_height': ['seat height'],
+        'dry_weight': ['dry weight', 'claimed dry weight'],
+        'wet_weight': ['wet weight', 'curb weight', 'claimed curb weight', 'measured wet weight', 'weight'],
+        'fuel_capacity': ['fuel capacity', 'fuel tank capacity', 'tank capacity', 'fuel tank'],
+    },
+}
+
+# 文本型字段，其余字段都按数值解析
+TEXT_FIELDS = {'type', 'compression_ratio', 'cooling', 'fuel_system'}
+
+LABEL_VALUE_LINE = re.compile(r'^\s*([A-Za-z0-9][^:：]{0,60}?)\s*[:：]\s*(.+?)\s*$')
+PARENTHETICAL = re.compile(r'\(([^)]*)\)')
+NON_LABEL_CHARS = re.compile(r'[^a-z0-9/\-\s]')
+WHITESPACE = re.compile(r'\s+')
+BARE_VALUE_LETTERS = re.compile(r'[a-wyz]')
+BLOCK_TAGS = {'div', 'p', 'li', 'ul', 'ol', 'dl', 'table', 'section'}
+
+
+def normalize_label(label: str) -> Tuple[str, Optional[str]]:
+    """标准化标签，返回(标签, 括号内的单位提示)"""
+    label = label.lower().strip()
+    unit_hint = None
+
+    match = PARENTHETICAL.search(label)
+    if match:
+        unit_hint = match.group(1).strip(' .') or None
+        label = PARENTHETICAL.sub(' ', label)
+
+    label = NON_LABEL_CHARS.sub(' ', label)
+    label = WHITESPACE.sub(' ', label).strip(' -')
+    return label, unit_hint
+
+
+class SpecTable:
+    """标准化后的规格表"""
+
+    def __init__(self, rows: Optional[Dict[str, str]] = None):
+        self.rows: Dict[str, str] = rows or {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def add(self, label: str, value: str):
+        """添加一行，同一标签保留第一次出现的数值"""
+        label, unit_hint = normalize_label(label)
+        value = WHITESPACE.sub(' ', value).strip()
+        if not label or not value or label in self.rows:
+            return
+
+        # 标签里的单位提示（如"Seat Height (in.)"）补到纯数字数值后面
+        if unit_hint and not re.search(r'[a-zA-Z]', value):
+            value = f"{value} {unit_hint}"
+        self.rows[label] = value
+
+    def get(self, label: str) -> Optional[str]:
+        """按标准化标签获取原始数值"""
+        return self.rows.get(label)
+
+    def field_text(self, group: str, field: str) -> Optional[str]:
+        """按同义词表查找字段的原始文本"""
+        for label in SPEC_FIELD_SYNONYMS[group][field]:
+            value = self.rows.get(label)
+            if value:
+                return value
+        return None
+
+    def field_number(self, group: str, field: str) -> Optional[float]:
+        """按同义词表查找字段数值，并换算到字段的标准单位"""
+        unit = FIELD_CANONICAL_UNITS[field]
+        for label in SPEC_FIELD_SYNONYMS[group][field]:
+            value = self.rows.get(label)
+            if not value:
+                continue
+
+            if label == 'bore x stroke':
+                number = self._bore_stroke(value, field)
+            else:
+                # 数值带有文字时（如"Inline-4"）只接受带单位的数字
+                bare = not BARE_VALUE_LETTERS.search(value.lower())
+                number = parse_measure(value, unit, allow_unitless=bare)
+            if number is not None:
+                return number
+        return None
+
+    def group_values(self, group: str) -> Dict[str, Any]:
+        """返回一个分组中所有能找到的字段"""
+        values = {}
+        for field in SPEC_FIELD_SYNONYMS[group]:
+            if field in TEXT_FIELDS:
+                value = self.field_text(group, field)
+            else:
+                value = self.field_number(group, field)
+            if value is not None:
+                values[field] = value
+        return values
+
+    @staticmethod
+    def _bore_stroke(value: str, field: str) -> Optional[float]:
+        """解析"81.0 x 48.5 mm"形式的缸径×行程"""
+        quantities = [q for q in tokenize_quantities(value) if q.unit in (None, 'mm')]
+        if len(quantities) < 2:
+            return None
+        return quantities[0 if field == 'bore' else 1].value
+
+
+def parse_spec_sections(sections: Iterable[Any]) -> SpecTable:
+    """遍历一次DOM，把规格区域解析成SpecTable"""
+    table = SpecTable()
+
+    for section in sections:
+        if section is None:
+            continue
+        elements = section.find_all(['tr', 'dt', 'li', 'p', 'div'])
+        if section.name in ('li', 'p', 'div'):
+            elements.insert(0, section)
+        for elem in elements:
+            name = elem.name
+
+            if name == 'tr':
+                cells = elem.find_all(['th', 'td'], recursive=False)
+                if len(cells) >= 2:
+                    table.add(cells[0].get_text(' ', strip=True), cells[1].get_text(' ', strip=True))
+                continue
+
+            if name == 'dt':
+                dd = elem.find_next_sibling('dd')
+                if dd:
+                    table.add(elem.get_text(' ', strip=True), dd.get_text(' ', strip=True))
+                continue
+
+            # 只处理不含块级子元素的叶子节点，避免父子节点重复解析
+            children = elem.find_all(True, recursive=False)
+            if any(child.name in BLOCK_TAGS for child in children):
+                continue
+
+            # <div><span>标签</span><span>数值</span></div> 形式
+            own_text = any(text.strip() for text in elem.find_all(string=True, recursive=False))
+            if len(children) == 2 and not own_text:
+                label = children[0].get_text(' ', strip=True)
+                value = children[1].get_text(' ', strip=True)
+                if label and value and not label.endswith(('.', '!', '?')):
+                    table.add(label.rstrip(':：'), value)
+                    continue
+
+            for line in elem.get_text('\n').split('\n'):
+                match = LABEL_VALUE_LINE.match(line)
+                if match:
+                    table.add(match.group(1), match.group(2))
+
+    return table
@@ -0,0 +1,130 @@
+"""
+后台批量写入
+
+抓取线程只把记录放入有界队列，由单独的写入线程持有数据库连接，
+按条数或时间窗口把记录合并成一个事务写入。队列满时put阻塞，抓取速度不会超过写入速度
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from data_manager import DataStorage
+
+# 队列中的控制标记
+_FLUSH = object()  # 立即写入当前批次
+_STOP = object()  # 写入剩余记录后退出
+
+
+class StorageWriter:
+    """后台写入线程
+
+    on_result(record, url, result)在写入线程中调用，result为save_motorcycles返回的单条结果
+    """
+
+    def __init__(self, storage: DataStorage, batch_size: int = 500, max_delay: float = 0.2,
+                 max_queue: Optional[int] = None,
+                 on_result: Optional[Callable[[Dict[str, Any], Optional[str], Dict[str, Any]], None]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.storage = storage
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.on_result = on_result
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.written = 0  # 写入成功的记录数
+        self.failed = 0
+        self.batches = 0  # 提交的事务数
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or self.batch_size * 4)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='StorageWriter', daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict[str, Any], url: Optional[str] = None, timeout: Optional[float] = None):
+        """把记录放入写入队列，队列满时阻塞（超过timeout抛出queue.Full）"""
+        if self._closed:
+            raise RuntimeError("写入线程已关闭")
+        self._queue.put((record, url), timeout=timeout)
+
+    @property
+    def pending(self) -> int:
+        """队列中尚未写入的记录数（近似值）"""
+        return self._queue.qsize()
+
+    def flush(self):
+        """立即写入已提交的记录，等待写入完成"""
+        if self._closed:
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """写入剩余记录并结束写入线程，可重复调用"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            taken = 1  # 取出的队列项数，包括控制标记
+            if item is _STOP:
+                stopping = True
+            elif item is not _FLUSH:
+                batch.append(item)
+                # 攒批：达到条数、时间窗口结束或遇到控制标记时写入
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    if item is _FLUSH:
+                        break
+                    batch.append(item)
+
+            if batch:
+                self._write(batch)
+            # 写完后才标记完成，flush()中的join据此返回
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _write(self, batch):
+        try:
+            results = self.storage.save_motorcycles([record for record, _ in batch])
+        except Exception as e:
+            # 写入线程不能退出，否则提交记录的线程会一直阻塞
+            self.logger.error(f"批量写入失败: {e}")
+            error = f"{type(e).__name__}: {e}"
+            results = [{'success': False, 'id': None, 'error': error, 'unchanged': False} for _ in batch]
+
+        self.batches += 1
+        for (record, url), result in zip(batch, results):
+            if result['success']:
+                self.written += 1
+            else:
+                self.failed += 1
+            if self.on_result is not None:
+                try:
+                    self.on_result(record, url, result)
+                except Exception as e:
+                    self.logger.error(f"处理写入结果失败: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -7,15 +7,37 @@
 import unittest
 from unittest.mock import Mock, patch
 import json
+import logging
 import os
+import queue
+import sqlite3
+import subprocess
+import sys
 import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 from scraper_base import BaseScraper, ScrapingConfig, RateLimiter, UserAgentRotator
 from cycleworld_scraper import CycleWorldScraper
 from motorcycle_com_scraper import MotorcycleDotComScraper
-from data_manager import DataCleaner, DataStorage
-from models import Motorcycle, EngineSpecs, Performance
+from data_manager import DataCleaner, DataStorage, DURABLE_PROFILE
+from models import Motorcycle, EngineSpecs, Performance, ReviewData, to_plain_dict
+from spec_parser import parse_spec_sections
+from quantity import NUMBER_PATTERN, Quantity, tokenize_quantities, parse_measure
+from parse_pool import ParsePool, RawPage
+from memory_guard import MemoryGuard, rss_mb
+from link_classifier import canonicalize_url
+from yield_monitor import YieldMonitor
+from motorcycle_table import MotorcycleTable
+from storage_writer import StorageWriter
+from main_scraper import MotorcycleScraper
+from keyword_matcher import KeywordAutomaton, find_brand, score_categories, infer_category
 
 
 class TestBaseScraper(unittest.TestCase):
@@ -64,6 +86,39 @@ class TestBaseScraper(unittest.TestCase):
             result = self.scraper.extract_number(text)
             self.assertEqual(result, expected)
     
+    def test_extract_structured_data(self):
+        """测试结构化数据提取"""
+        html = """
+        <html><head>
+            <meta property="og:title" content="Ducati Panigale V4 | Example Site">
+            <meta property="og:image" content="https://example.com/og.jpg">
+            <script type="application/ld+json">
+            {"@context": "https://schema.org", "@graph": [
+                {"@type": "WebPage", "name": "Review page"},
+                {"@type": "Review",
+                 "reviewRating": {"@type": "Rating", "ratingValue": "9.1", "bestRating": "10"},
+                 "itemReviewed": {"@type": "Product", "name": "2024 Ducati Panigale V4 S",
+                                  "brand": {"@type": "Brand", "name": "Ducati"},
+                                  "offers": {"@type": "Offer", "price": "31,995", "priceCurrency": "USD"}}}
+            ]}
+            </script>
+        </head><body>
+            <script id="__NEXT_DATA__" type="application/json">
+            {"props": {"pageProps": {"bike": {"make": "Ducati", "model": "Panigale V4 S", "year": 2024}}}}
+            </script>
+        </body></html>
+        """
+        data = self.scraper.extract_structured_data(self.scraper.parse_html(html))
+        
+        self.assertEqual(data['title'], "2024 Ducati Panigale V4 S")
+        self.assertEqual(data['brand'], "Ducati")
+        self.assertEqual(data['model'], "Panigale V4 S")
+        self.assertEqual(data['year'], 2024)
+        self.assertEqual(data['price'], 31995.0)
+        self.assertEqual(data['rating'], 9.1)
+        self.assertEqual(data['rating_scale'], 10.0)
+        self.assertEqual(data['images'], ["https://example.com/og.jpg"])
+    
     def test_url_validation(self):
         """测试URL验证"""
         valid_urls = [
@@ -85,6 +140,163 @@ class TestBaseScraper(unittest.TestCase):
             self.assertFalse(self.scraper.is_valid_url(url))
 
 
+class TestKeywordMatcher(unittest.TestCase):
+    """测试多模式关键词匹配"""
+    
+    def test_automaton_word_boundary(self):
+        """测试单词边界处理"""
+        automaton = KeywordAutomaton([('mx', 'dirt'), ('sport', 'sport'), ('sportbike', 'sport')])
+        
+        keywords = [m.keyword for m in automaton.find_all('The MX bike is a sportbike, not mxgp')]
+        self.assertEqual(keywords, ['mx', 'sportbike'])
+    
+    def test_multi_word_brands(self):
+        """测试多词品牌和别名识别"""
+        test_cases = [
+            ("2023 Harley-Davidson Road Glide", "Harley-Davidson"),
+            ("2022 MV Agusta Brutale 800", "MV Agusta"),
+            ("Royal Enfield Himalayan 2021", "Royal Enfield"),
+            ("2024 Harley Davidson Fat Boy", "Harley-Davidson"),
+            ("Generic Scooter 50", None),
+        ]
+        
+        for title, expected in test_cases:
+            match = find_brand(title)
+            self.assertEqual(match.label if match else None, expected)
+    
+    def test_category_scoring(self):
+        """测试类别打分"""
+        text = "A comfortable cruiser for the highway, with a bagger option. Not for the track."
+        scores = score_categories(text)
+        
+        self.assertEqual(scores['cruiser'], 4)
+        self.assertEqual(scores['sport'], 1)
+        self.assertEqual(infer_category(text), 'cruiser')
+        self.assertIsNone(infer_category("nothing relevant here"))
+    
+    def test_title_parsing(self):
+        """测试标题解析使用多词品牌"""
+        scraper = MotorcycleDotComScraper(ScrapingConfig(min_delay=0.1, max_delay=0.2))
+        brand, model, year = scraper._parse_motorcycle_title("2023 MV Agusta Brutale 1000 RS Review")
+        
+        self.assertEqual(brand, "MV Agusta")
+        self.assertEqual(model, "Brutale 1000 RS Review")
+        self.assertEqual(year, 2023)
+
+
+class TestSpecParser(unittest.TestCase):
+    """测试规格表解析"""
+    
+    def setUp(self):
+        self.scraper = BaseScraper(ScrapingConfig(min_delay=0.1, max_delay=0.2))
+    
+    def test_parse_table_dl_and_lines(self):
+        """测试表格、定义列表和"标签: 数值"行"""
+        html = """
+        <div class="specs">
+            <table>
+                <tr><th>Engine Type</th><td>Liquid-cooled Inline-4</td></tr>
+                <tr><th>Displacement</th><td>998cc</td></tr>
+                <tr><th>Bore x Stroke</th><td>79.0 x 50.9 mm</td></tr>
+            </table>
+            <dl><dt>Seat Height (mm)</dt><dd>855</dd><dt>Wheelbase</dt><dd>1,405 mm</dd></dl>
+            <ul><li>Claimed Horsepower: 200 hp @ 13,500 rpm</li><li>Max Power: 147 kW</li></ul>
+            <p>Length: 2055 mm<br>Curb Weight: 201 kg</p>
+        </div>
+        """
+        table = parse_spec_sections([self.scraper.parse_html(html)])
+        
+        self.assertEqual(table.get('displacement'), '998cc')
+        self.assertEqual(table.get('seat height'), '855 mm')
+        self.assertEqual(table.group_values('engine'), {
+            'type': 'Liquid-cooled Inline-4',
+            'displacement': 998.0,
+            'bore': 79.0,
+            'stroke': 50.9,
+        })
+        self.assertEqual(table.field_number('performance', 'power_hp'), 200.0)
+        self.assertEqual(table.field_number('performance', 'power_kw'), 147.0)
+        self.assertEqual(table.group_values('dimensions'), {
+            'length': 2055.0,
+            'wheelbase': 1405.0,
+            'seat_height': 855.0,
+            'wet_weight': 201.0,
+        })
+    
+    def test_rows_do_not_bleed(self):
+        """测试数值不会跨行匹配"""
+        html = '<table class="specs"><tr><td>Length</td><td>N/A</td></tr><tr><td>Width</td><td>790 mm</td></tr></table>'
+        table = parse_spec_sections([self.scraper.parse_html(html)])
+        
+        self.assertIsNone(table.field_number('dimensions', 'length'))
+        self.assertEqual(table.field_number('dimensions', 'width'), 790.0)
+
+
+class TestQuantity(unittest.TestCase):
+    """测试数量/单位解析"""
+    
+    def test_tokenize(self):
+        """测试数字、单位和限定词的识别"""
+        self.assertEqual(tokenize_quantities('$12,345'), [Quantity(12345.0, 'usd')])
+        self.assertEqual(tokenize_quantities('approx. 31,5 in'), [Quantity(31.5, 'in', 'approx')])
+        self.assertEqual(tokenize_quantities('1.234,5 kg'), [Quantity(1234.5, 'kg')])
+        self.assertEqual(tokenize_quantities('3 1/2 gal'), [Quantity(3.5, 'gal')])
+        # 单独的 a/b 不是分数，只取分子
+        self.assertEqual([q.value for q in tokenize_quantities('3/4 and 8/10')], [3.0, 8.0])
+        self.assertEqual(tokenize_quantities('13.0:1'), [Quantity(13.0, None, 'ratio')])
+        self.assertEqual(tokenize_quantities('80 x 49.7 mm'), [
+            Quantity(80.0, 'mm', 'dimension'),
+            Quantity(49.7, 'mm', 'dimension'),
+        ])
+        self.assertEqual(tokenize_quantities('up to 120 hp'), [Quantity(120.0, 'hp', 'max')])
+    
+    def test_parse_measure(self):
+        """测试单位换算和成对字段"""
+        self.assertEqual(parse_measure('31.5 in', 'mm'), 800.1)
+        self.assertEqual(parse_measure('5.3 gal', 'l'), 20.06)
+        self.assertEqual(parse_measure('441 lb', 'kg'), 200.03)
+        self.assertEqual(parse_measure('147 kW (200 hp)', 'hp'), 200.0)
+        # 功率等成对字段不做隐式换算，PS等其他功率单位照常换算
+        self.assertIsNone(parse_measure('200 hp', 'kw'))
+        self.assertEqual(parse_measure('200 PS', 'hp'), 197.26)
+        self.assertEqual(parse_measure('200 CV', 'kw'), 147.1)
+        self.assertEqual(parse_measure('855', 'mm'), 855.0)
+        self.assertIsNone(parse_measure('855', 'mm', allow_unitless=False))
+
+
+class TestModels(unittest.TestCase):
+    """测试数据模型"""
+    
+    def test_slots_and_dict_round_trip(self):
+        """测试模型无__dict__，且to_dict/from_dict可往返转换"""
+        motorcycle = Motorcycle(
+            brand='Honda', model='CBR1000RR', year=2023,
+            engine=EngineSpecs(displacement=999.0),
+            performance=Performance(power_hp=217.0),
+            images=['https://example.com/a.jpg']
+        )
+        self.assertFalse(hasattr(motorcycle, '__dict__'))
+        
+        data = motorcycle.to_dict()
+        self.assertEqual(data['engine']['displacement'], 999.0)
+        self.assertIsNone(data['dimensions'])
+        self.assertIsInstance(data['scraped_at'], str)
+        json.dumps(data)
+        # 列表被复制，修改字典不影响原对象
+        data['images'].append('https://example.com/b.jpg')
+        self.assertEqual(len(motorcycle.images), 1)
+        
+        restored = Motorcycle.from_dict(motorcycle.to_dict())
+        self.assertEqual(restored, motorcycle)
+        self.assertIsInstance(restored.engine, EngineSpecs)
+        self.assertIsInstance(restored.scraped_at, datetime)
+        
+        review = ReviewData.from_dict({'motorcycle_id': 'honda cbr 2023', 'reviewer': 'cycleworld.com'})
+        self.assertIsNone(review.review_date)
+        with self.assertRaises(KeyError):
+            Motorcycle.from_dict({'brand': 'Honda'})
+
+
 class TestDataCleaner(unittest.TestCase):
     """测试数据清理器"""
     
@@ -164,6 +376,66 @@ class TestDataCleaner(unittest.TestCase):
         self.assertEqual(cleaned['engine']['displacement'], 999.9)
         self.assertEqual(len(cleaned['images']), 2)  # 无效URL被过滤
         self.assertEqual(len(cleaned['features']), 1)  # 空值和过长文本被过滤
+    
+    def test_clean_batch_matches_per_record(self):
+        """测试批量清理与逐条清理结果一致"""
+        records = [
+            {'brand': '  Honda\t ', 'model': 'CBR600RR®', 'year': '2023 model', 'category': 'Supersport',
+             'engine': {'displacement': '599cc', 'bore': 67, 'type': 'Inline-4', 'compression_ratio': 12.2},
+             'performance': {'power_hp': '118 hp', 'torque_lbft': '48 lb-ft', 'top_speed_mph': 400},
+             'dimensions': {'seat_height': '32.3 in', 'wet_weight': '430 lbs'},
+             'price': {'msrp': '$11,999', 'year': 2023}, 'rating': {'overall': 4.5, 'scale': 5},
+             'colors': ['Red', 'Red', 'X'], 'images': ['https://example.com/a.jpg', 'bad']},
+            {'brand': 'Yamaha', 'model': 'MT-09', 'year': 1850, 'category': '  Naked ',
+             'engine': {'displacement': 890.0}, 'performance': {'power_hp': 0, 'power_kw': '87 kW'},
+             'price': {'msrp': 500}, 'rating': {'overall': 11, 'value': '8.5'}},
+            {'brand': None, 'model': 'Zero SR/F', 'year': 2024.0, 'category': None, 'description': ' Fast  & quiet '},
+        ]
+        
+        batch = DataCleaner.clean_batch(records)
+        expected = pd.json_normalize([DataCleaner.clean_motorcycle_data(record) for record in records])
+        
+        for name in expected.columns:
+            for row, (want, got) in enumerate(zip(expected[name], batch[name])):
+                if isinstance(want, list):
+                    self.assertEqual(sorted(want), sorted(got), f"{name}[{row}]")
+                elif pd.isna(want):
+                    self.assertTrue(got is None or pd.isna(got), f"{name}[{row}]: {got!r}")
+                else:
+                    self.assertEqual(want, got, f"{name}[{row}]")
+        
+        self.assertEqual(batch['category'].tolist(), ['sport', 'naked', None])
+        self.assertEqual(batch.loc[0, 'engine.compression_ratio'], '12.2')
+        
+        # 也接受列数组
+        columns = DataCleaner.clean_batch({'brand': ['a ', 'b'], 'engine.displacement': ['1,000 cc', 3000]})
+        self.assertEqual(columns['engine.displacement'].iloc[0], 1000.0)
+        self.assertTrue(np.isnan(columns['engine.displacement'].iloc[1]))
+
+    
+    def test_unit_normalization_and_pairs(self):
+        """测试无单位数值换算和成对字段补全/核对"""
+        records = [
+            {'brand': 'Harley-Davidson', 'model': 'Street Glide', 'year': 2023,
+             'dimensions': {'seat_height': 26.1, 'fuel_capacity': '4.2', 'wet_weight': 380},
+             'performance': {'torque_lbft': '111 lb-ft', 'top_speed_kmh': 180}},
+            {'brand': 'BMW', 'model': 'S1000RR', 'year': 2023,
+             'performance': {'power_hp': 205, 'power_kw': 100}},
+        ]
+        
+        cleaned = [DataCleaner.clean_motorcycle_data(record) for record in records]
+        self.assertEqual(cleaned[0]['dimensions']['seat_height'], 662.94)  # 26.1 in
+        self.assertEqual(cleaned[0]['dimensions']['fuel_capacity'], 15.9)  # 4.2 gal
+        self.assertEqual(cleaned[0]['dimensions']['wet_weight'], 380)  # 在合理范围内，不换算
+        self.assertEqual(cleaned[0]['performance']['torque_nm'], 150.5)
+        self.assertEqual(cleaned[0]['performance']['top_speed_mph'], 111.85)
+        self.assertEqual(cleaned[0]['unit_flags'], [])
+        self.assertEqual(cleaned[1]['unit_flags'], ['power_hp/power_kw'])
+        
+        batch = DataCleaner.clean_batch(records)
+        self.assertEqual(batch['dimensions.seat_height'].tolist()[0], 662.94)
+        self.assertEqual(batch['performance.torque_nm'].tolist()[0], 150.5)
+        self.assertEqual(batch['unit_flags'].tolist(), [[], ['power_hp/power_kw']])
 
 
 class TestDataStorage(unittest.TestCase):
@@ -177,6 +449,7 @@ class TestDataStorage(unittest.TestCase):
     def tearDown(self):
         # 清理临时文件
         import shutil
+        self.storage.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     def test_database_initialization(self):
@@ -240,6 +513,400 @@ class TestDataStorage(unittest.TestCase):
         self.assertEqual(hash1, hash2)  # 相同数据应该产生相同哈希
         self.assertNotEqual(hash1, hash3)  # 不同数据应该产生不同哈希
     
+    def test_yield_monitor_pauses_and_persists(self):
+        """测试产出过低时暂停网站并持久化命中率"""
+        monitor = YieldMonitor(window=10, min_pages=5, min_yield=0.5, storage=self.storage, persist_every=5)
+        good = {'brand': 'Honda', 'model': 'CBR600RR', 'engine': {'displacement': 599.0}, 'images': ['a.jpg']}
+        
+        for _ in range(10):
+            monitor.observe('site_a', good)
+        self.assertFalse(monitor.should_pause('site_a'))
+        self.assertEqual(monitor.hit_rates('site_a')['specs'], 1.0)
+        self.assertEqual(monitor.hit_rates('site_a')['price'], 0.0)
+        
+        # 页面结构变化后只剩空记录，窗口内有效比例降到阈值以下
+        for _ in range(6):
+            monitor.observe('site_a', None)
+        self.assertTrue(monitor.should_pause('site_a'))
+        self.assertAlmostEqual(monitor.hit_rates('site_a')['title'], 0.4)
+        
+        history = self.storage.get_crawl_yield('site_a')
+        self.assertEqual(history[0]['paused'], 1)
+        self.assertAlmostEqual(history[0]['title_rate'], 0.4)
+        self.assertEqual(len(history), 4)
+    
+    def test_save_motorcycles_batch(self):
+        """测试批量保存：一次事务写入，逐条报告结果"""
+        self.assertTrue(self.storage.save_motorcycle({
+            'brand': 'Honda', 'model': 'CB500F', 'year': 2023, 'source_url': 'https://a.example.com/cb500f'}))
+        
+        batch = [
+            {'brand': 'Yamaha', 'model': f'MT-0{i}', 'year': 2023, 'source_url': f'https://a.example.com/mt-0{i}',
+             'engine': {'displacement': i * 100}, 'performance': {'power_hp': i * 10}}
+            for i in range(3, 8)
+        ]
+        batch.append({'brand': 'Honda', 'model': 'CB500F', 'year': 2023, 'source_url': 'https://a.example.com/cb500f',
+                      'engine': {'displacement': 471}})  # 已存在，更新
+        batch.append(None)  # 无法清理
+        batch.append(dict(batch[0], performance={'power_hp': 40}))  # 批内重复，以最后一条为准
+        
+        results = self.storage.save_motorcycles(batch)
+        self.assertEqual(len(results), len(batch))
+        self.assertEqual([r['success'] for r in results], [True] * 6 + [False, True])
+        self.assertIsNotNone(results[6]['error'])
+        self.assertEqual(results[0]['id'], results[7]['id'])
+        self.assertEqual(results[5]['id'], 1)
+        
+        with self.storage._connect() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM motorcycles").fetchone()[0], 6)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM engine_specs").fetchone()[0], 6)
+            power = conn.execute("SELECT power_hp FROM performance WHERE motorcycle_id = ?", (results[0]['id'],)).fetchone()
+            self.assertEqual(power[0], 40)
+        
+        # 整批只查一次已有记录；批内重复的同一内容看到前一条写入的指纹，只更新last_seen_at
+        statements = []
+        self.storage._connect().set_trace_callback(statements.append)
+        try:
+            again = self.storage.save_motorcycles([dict(batch[0], year=2024), dict(batch[0], year=2024), batch[1]])
+        finally:
+            self.storage._connect().set_trace_callback(None)
+        self.assertEqual([r['unchanged'] for r in again], [False, True, True])
+        self.assertEqual(again[0]['id'], again[1]['id'])
+        self.assertEqual(sum('FROM batch JOIN motorcycles' in sql for sql in statements), 1)
+        self.assertFalse(any('SELECT id, content_hash' in sql for sql in statements))
+
+    def test_upsert_conflict_policies(self):
+        """测试不同来源的同一车型按冲突策略更新，而不是被丢弃"""
+        first = {'brand': 'Honda', 'model': 'CB500F', 'year': 2023, 'category': 'naked',
+                 'source_url': 'https://a.example.com/cb500f', 'scraped_at': '2024-05-01T00:00:00',
+                 'engine': {'displacement': 471}, 'performance': {'power_hp': 47}}
+        second = {'brand': 'Honda', 'model': 'CB500F', 'year': 2023,
+                  'source_url': 'https://b.example.com/cb500f', 'scraped_at': '2024-04-01T00:00:00',
+                  'performance': {'torque_nm': 43}}
+
+        def stored(motorcycle_id):
+            with self.storage._connect() as conn:
+                row = conn.execute("SELECT source_url, category, raw_data FROM motorcycles WHERE id = ?",
+                                   (motorcycle_id,)).fetchone()
+                performance = conn.execute("SELECT power_hp, torque_nm FROM performance WHERE motorcycle_id = ?",
+                                           (motorcycle_id,)).fetchall()
+            return row[0], row[1], json.loads(row[2]), performance
+
+        motorcycle_id = self.storage.save_motorcycles([first])[0]['id']
+
+        # 较旧的记录不覆盖，子表和评测也不写入
+        older = dict(second, review={'content': 'An older review of the CB500F', 'title': 'Old test'})
+        result = self.storage.save_motorcycles([older], policy='keep_newest')[0]
+        self.assertEqual((result['success'], result['id']), (True, motorcycle_id))
+        self.assertEqual(stored(motorcycle_id)[0], 'https://a.example.com/cb500f')
+        self.assertEqual(stored(motorcycle_id)[3], [(47, None)])
+        self.assertEqual(self.storage.get_reviews(motorcycle_id), [])
+
+        # 合并：新记录的非空字段覆盖，其余保留
+        result = self.storage.save_motorcycles([second], policy='merge')[0]
+        self.assertEqual(result['id'], motorcycle_id)
+        source_url, category, raw_data, performance = stored(motorcycle_id)
+        self.assertEqual((source_url, category), ('https://b.example.com/cb500f', 'naked'))
+        self.assertEqual(raw_data['engine']['displacement'], 471)
+        self.assertEqual(performance, [(47, 43)])
+
+        # 默认覆盖
+        self.assertTrue(self.storage.save_motorcycle(second))
+        source_url, category, raw_data, performance = stored(motorcycle_id)
+        self.assertEqual((category, raw_data.get('engine')), (None, None))
+        self.assertEqual(performance, [(None, 43)])
+
+        with self.storage._connect() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM motorcycles").fetchone()[0], 1)
+        with self.assertRaises(ValueError):
+            self.storage.save_motorcycles([first], policy='ignore')
+
+    def test_unchanged_records_skip_writes(self):
+        """测试重新抓取到的内容未变化时不重写记录和子表，只批量更新last_seen_at"""
+        storage = DataStorage(self.temp_dir, touch_batch_size=3)
+        self.addCleanup(storage.close)
+        bikes = [{'brand': 'Honda', 'model': f'CB{i}', 'year': 2023, 'scraped_at': '2024-05-01T00:00:00',
+                  'engine': {'displacement': 300 + i}, 'performance': {'power_hp': 40 + i}} for i in range(4)]
+        ids = [r['id'] for r in storage.save_motorcycles(bikes)]
+        conn = storage._connect()
+        conn.execute("UPDATE motorcycles SET last_seen_at = NULL")
+        conn.commit()
+
+        def snapshot():
+            return conn.execute("SELECT m.updated_at, m.raw_data, p.rowid FROM motorcycles m "
+                                "JOIN performance p ON p.motorcycle_id = m.id ORDER BY m.id").fetchall()
+
+        before, changes = snapshot(), conn.total_changes
+        rescraped = [dict(bike, scraped_at='2024-06-01T00:00:00') for bike in bikes[:2]]
+        results = storage.save_motorcycles(rescraped)
+        self.assertEqual([(r['success'], r['id'], r['unchanged']) for r in results],
+                         [(True, ids[0], True), (True, ids[1], True)])
+        self.assertEqual((snapshot(), conn.total_changes), (before, changes))  # 未满一批，没有任何写入
+
+        # 攒够一批时一起更新last_seen_at；内容变化的记录照常写入
+        changed = dict(bikes[3], performance={'power_hp': 99})
+        results = storage.save_motorcycles([bikes[2], changed])
+        self.assertEqual([r['unchanged'] for r in results], [True, False])
+        seen = conn.execute("SELECT id FROM motorcycles WHERE last_seen_at IS NOT NULL ORDER BY id").fetchall()
+        self.assertEqual([row[0] for row in seen], ids)
+        self.assertEqual(snapshot()[:3], before[:3])
+        self.assertEqual(conn.execute("SELECT power_hp FROM performance WHERE motorcycle_id = ?",
+                                      (ids[3],)).fetchone()[0], 99)
+
+        # 关闭时写入剩余的last_seen_at
+        conn.execute("UPDATE motorcycles SET last_seen_at = NULL")
+        conn.commit()
+        storage.save_motorcycle(bikes[0])
+        storage.close()
+        with sqlite3.connect(storage.db_path) as check:
+            self.assertIsNotNone(check.execute("SELECT last_seen_at FROM motorcycles WHERE id = ?",
+                                               (ids[0],)).fetchone()[0])
+
+        # merge结果的指纹与记录本身不同，之后用overwrite写入同一记录不会被跳过
+        storage = DataStorage(self.temp_dir)
+        self.addCleanup(storage.close)
+        partial = {'brand': 'Honda', 'model': 'CB0', 'year': 2023, 'performance': {'power_hp': 40}}
+        storage.save_motorcycles([partial], policy='merge')
+        self.assertEqual(storage.search_motorcycles(model='CB0')[0]['engine']['displacement'], 300)
+        self.assertFalse(storage.save_motorcycles([partial])[0]['unchanged'])
+        self.assertNotIn('engine', storage.search_motorcycles(model='CB0')[0])
+
+    def test_content_hash_independent_of_hash_seed(self):
+        """测试内容指纹在不同进程（不同哈希种子）中一致，每天新进程重抓时也能跳过未变化的记录"""
+        record = {'brand': 'Honda', 'model': 'CB500F', 'year': 2023, 'scraped_at': '2024-05-01T00:00:00',
+                  'images': [f'https://example.com/cb500f-{i}.jpg' for i in range(6)],
+                  'features': ['Assist slipper clutch', 'LED lighting all round', 'Showa SFF-BP fork',
+                               'Assist slipper clutch', 'Five-step adjustable brake lever'],
+                  'colors': ['Grand Prix Red', 'Matte Black', 'Pearl White', 'Matte Gunpowder'],
+                  'review': {'content': 'A friendly middleweight', 'pros': ['Light clutch', 'Smooth engine',
+                                                                           'Comfortable seat', 'Easy to ride']}}
+        script = ("import json, sys\n"
+                  "from data_manager import DataCleaner, DataStorage\n"
+                  "print(DataStorage.generate_content_hash(DataCleaner.clean_motorcycle_data(json.loads(sys.argv[1]))))")
+        hashes = set()
+        for seed in range(1, 5):
+            output = subprocess.run(
+                [sys.executable, '-c', script, json.dumps(record)], capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)), env={**os.environ, 'PYTHONHASHSEED': str(seed)})
+            hashes.add(output.stdout.strip())
+        self.assertEqual(hashes, {DataStorage.generate_content_hash(DataCleaner.clean_motorcycle_data(record))})
+
+    def test_full_text_search(self):
+        """测试全文索引随写入同步，支持前缀匹配和相关度排序"""
+        self.storage.save_motorcycles([
+            {'brand': 'Ducati', 'model': 'Panigale V4', 'year': 2024, 'category': 'sport',
+             'description': 'A track weapon with a V4 engine'},
+            {'brand': 'Yamaha', 'model': 'MT-09', 'year': 2023, 'category': 'naked',
+             'description': 'Comfortable enough for the Ducati owners club ride', 'features': ['Quickshifter']},
+            {'brand': 'Honda', 'model': 'Gold Wing', 'year': 2023, 'category': 'touring'},
+        ])
+
+        self.assertTrue(self.storage.full_text_enabled)
+        results = self.storage.full_text_search('ducati')
+        self.assertEqual([r['model'] for r in results], ['Panigale V4', 'MT-09'])  # 品牌命中优先于描述
+        self.assertEqual([r['model'] for r in self.storage.full_text_search('pani')], ['Panigale V4'])
+        self.assertEqual(self.storage.full_text_search('pani', prefix=False), [])
+        self.assertEqual([r['model'] for r in self.storage.full_text_search('mt-09')], ['MT-09'])
+        self.assertEqual([r['model'] for r in self.storage.full_text_search('quickshift')], ['MT-09'])
+        self.assertEqual(self.storage.full_text_search('"AND" NEAR('), [])
+
+        # 更新和删除同步到索引
+        self.storage.save_motorcycle({'brand': 'Honda', 'model': 'Gold Wing', 'year': 2023,
+                                      'description': 'The ultimate tourer'})
+        self.assertEqual(len(self.storage.full_text_search('ultimate tour')), 1)
+        with self.storage._connect() as conn:
+            conn.execute("DELETE FROM motorcycles WHERE model = 'Gold Wing'")
+        self.assertEqual(self.storage.full_text_search('ultimate'), [])
+
+        # 已有数据库首次创建索引时从已有数据填充
+        with self.storage._connect() as conn:
+            conn.execute("DROP TABLE motorcycles_fts")
+        self.storage.init_database()
+        self.assertEqual(len(self.storage.full_text_search('ducati')), 2)
+
+    def test_search_by_specs(self):
+        """测试规格范围筛选和排序，并确认查询计划使用索引"""
+        bikes = [
+            ('Honda', 'CBR600RR', 599, 118, 820, 11999),
+            ('Honda', 'Rebel 500', 471, 46, 690, 6899),
+            ('Yamaha', 'MT-09', 890, 117, 825, None),
+            ('Ducati', 'Panigale V4', 1103, 214, 850, 24995),
+        ]
+        self.storage.save_motorcycles([
+            {'brand': brand, 'model': model, 'year': 2024, 'engine': {'displacement': displacement},
+             'performance': {'power_hp': power}, 'dimensions': {'seat_height': seat_height},
+             'price': {'msrp': msrp} if msrp else None}
+            for brand, model, displacement, power, seat_height, msrp in bikes
+        ])
+
+        def models(**kwargs):
+            return [r['model'] for r in self.storage.search_by_specs(**kwargs)]
+
+        self.assertEqual(models(ranges={'power_hp': (100, 150)}, order_by='power_hp'), ['MT-09', 'CBR600RR'])
+        self.assertEqual(models(ranges={'displacement': (None, 900), 'seat_height': (None, 822)},
+                                order_by='displacement', descending=True), ['CBR600RR', 'Rebel 500'])
+        self.assertEqual(models(ranges={'msrp': (None, 20000)}, brand='Honda', order_by='msrp'),
+                         ['Rebel 500', 'CBR600RR'])
+        self.assertEqual(models(order_by='msrp', descending=True)[-1], 'MT-09')  # 空值排在最后
+        with self.assertRaises(ValueError):
+            self.storage.search_by_specs({'raw_data': (1, 2)})
+
+        with self.storage._connect() as conn:
+            for ranges, index in [({'power_hp': (100, 150)}, 'idx_performance_power_hp'),
+                                  ({'dry_weight': (None, 200)}, 'idx_dimensions_dry_weight'),
+                                  ({'msrp': (None, 10000)}, 'idx_msrp')]:
+                name = next(iter(ranges))
+                query, params = self.storage._spec_query(ranges, None, None, name, True, 20)
+                plan = ' | '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+                self.assertIn(index, plan)
+                self.assertNotIn('SCAN', plan.replace(f'SCAN {index}', ''))  # 不全表扫描
+                self.assertNotIn('TEMP B-TREE', plan)  # 按索引顺序读取，不额外排序
+
+    def test_incremental_statistics(self):
+        """测试统计表随写入、更新和删除增量维护，与重新计算的结果一致"""
+        self.storage.save_motorcycles([
+            {'brand': 'Honda', 'model': 'CBR600RR', 'year': 2024, 'category': 'sport',
+             'performance': {'power_hp': 118}, 'price': {'msrp': 11999}},
+            {'brand': 'Honda', 'model': 'Rebel 500', 'year': 2023, 'category': 'cruiser',
+             'performance': {'power_hp': 46}, 'price': {'msrp': 6899}},
+            {'brand': 'Ducati', 'model': 'Panigale V4', 'year': 2024, 'category': 'sport',
+             'performance': {'power_hp': 214}, 'price': {'msrp': 24995}},
+            {'brand': 'Yamaha', 'model': 'MT-09', 'year': 2024},
+        ])
+
+        stats = self.storage.get_statistics()
+        self.assertEqual(stats['total_motorcycles'], 4)
+        self.assertEqual(stats['by_brand'], {'Honda': 2, 'Ducati': 1, 'Yamaha': 1})
+        self.assertEqual(stats['by_category'], {'sport': 2, 'cruiser': 1})
+        self.assertEqual(stats['by_brand_year']['Honda'], {2024: 1, 2023: 1})
+        self.assertEqual(stats['category_specs']['sport']['power_hp'],
+                         {'count': 2, 'min': 118, 'max': 214, 'mean': 166})
+
+        # 只有价格变化时不调整功率汇总，不会把它标记为需要重新查询
+        with self.storage._connect() as conn:
+            conn.execute("UPDATE motorcycles SET msrp = 12499 WHERE model = 'CBR600RR'")
+            stale = dict(conn.execute("SELECT metric, stale FROM spec_summary WHERE category = 'sport'"))
+        self.assertEqual(stale['power_hp'], 0)
+        self.assertEqual(self.storage.get_statistics()['category_specs']['sport']['msrp']['min'], 12499)
+
+        # 类别变化：数量和功率汇总一起转移，移出的最小值所在类别重新得到最小值
+        self.storage.save_motorcycle({'brand': 'Honda', 'model': 'CBR600RR', 'year': 2024, 'category': 'naked',
+                                      'performance': {'power_hp': 118}, 'price': {'msrp': 11999}})
+        with self.storage._connect() as conn:
+            conn.execute("DELETE FROM motorcycles WHERE model = 'Rebel 500'")
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM performance").fetchone()[0], 2)  # 子表一起删除
+
+        stats = self.storage.get_statistics()
+        self.assertEqual(stats['by_brand'], {'Ducati': 1, 'Honda': 1, 'Yamaha': 1})
+        self.assertEqual(stats['by_category'], {'naked': 1, 'sport': 1})
+        self.assertEqual(stats['category_specs']['sport']['power_hp'], {'count': 1, 'min': 214, 'max': 214, 'mean': 214})
+        self.assertEqual(stats['category_specs']['naked']['msrp']['mean'], 11999)
+        self.assertNotIn('cruiser', stats['category_specs'])
+
+        self.storage.rebuild_statistics()
+        self.assertEqual(self.storage.get_statistics(), stats)
+
+    def test_storage_writer(self):
+        """测试后台写入：按批提交事务，队列满时阻塞，关闭时写完剩余记录"""
+        results = []
+        writer = StorageWriter(self.storage, batch_size=100, max_delay=5.0,
+                               on_result=lambda record, url, result: results.append(result['success']))
+        for i in range(250):
+            writer.submit({'brand': 'Yamaha', 'model': f'M{i}', 'year': 2023}, f'https://a.example.com/{i}')
+        writer.flush()  # 不等待时间窗口
+        self.assertEqual((writer.written, len(results)), (250, 250))
+        self.assertLessEqual(writer.batches, 4)
+
+        # 数据库被其他连接锁住时写入线程阻塞，队列满后submit也阻塞
+        blocked = StorageWriter(self.storage, batch_size=1, max_queue=1)
+        self.addCleanup(blocked.close)
+        conn = self.storage._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            blocked.submit({'brand': 'Honda', 'model': 'A', 'year': 2023})
+            time.sleep(0.1)  # 写入线程取走第一条后等待写锁
+            blocked.submit({'brand': 'Honda', 'model': 'B', 'year': 2023})
+            with self.assertRaises(queue.Full):
+                blocked.submit({'brand': 'Honda', 'model': 'C', 'year': 2023}, timeout=0.1)
+        finally:
+            conn.rollback()
+        blocked.close()
+        self.assertEqual(blocked.written, 2)
+
+        writer.submit({'brand': 'Honda', 'model': 'D', 'year': 2023})
+        writer.close()
+        self.assertEqual(writer.written, 251)
+        with self.assertRaises(RuntimeError):
+            writer.submit({'brand': 'Honda', 'model': 'E', 'year': 2023})
+
+    def test_sqlite_profile(self):
+        """测试连接参数，以及WAL模式下写事务未提交时读不被阻塞"""
+        conn = self.storage._connect()
+        self.assertIs(conn, self.storage._connect())
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+        
+        self.storage.save_motorcycle({'brand': 'Honda', 'model': 'CB500F', 'year': 2023})
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE motorcycles SET category = 'naked'")
+        try:
+            # 其他线程使用自己的连接读取
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                stats = executor.submit(self.storage.get_statistics).result(timeout=5)
+            self.assertEqual(stats['total_motorcycles'], 1)
+            self.assertEqual(stats['by_category'], {})
+        finally:
+            conn.rollback()
+        
+        # 切换日志模式需要独占数据库，使用单独的目录
+        durable = DataStorage(os.path.join(self.temp_dir, 'durable'), profile=DURABLE_PROFILE)
+        self.addCleanup(durable.close)
+        self.assertEqual(durable._connect().execute("PRAGMA synchronous").fetchone()[0], 2)  # FULL
+    
+    def test_motorcycle_table(self):
+        """测试列式目录的过滤、排序和分组统计"""
+        bikes = [
+            ('Honda', 'CBR600RR', 'sport', 599, 118, 11999, ['Red', 'Black']),
+            ('Honda', 'Rebel 500', 'cruiser', 471, 46, 6899, ['Black']),
+            ('Yamaha', 'MT-09', 'naked', 890, 117, None, ['Blue', 'Black']),
+            ('Ducati', 'Panigale V4', 'sport', 1103, 214, 24995, []),
+        ]
+        for brand, model, category, displacement, power, msrp, colors in bikes:
+            self.storage.save_motorcycle({
+                'brand': brand, 'model': model, 'year': 2023, 'category': category,
+                'engine': {'displacement': displacement}, 'performance': {'power_hp': power},
+                'price': {'msrp': msrp} if msrp else None,
+                'rating': {'overall': 4.5, 'scale': 5}, 'colors': colors,
+            })
+        
+        table = self.storage.load_table()
+        self.assertEqual(len(table), 4)
+        frame = self.storage.read_sql("SELECT model FROM motorcycles WHERE category = ? ORDER BY model", ('sport',))
+        self.assertEqual(list(frame['model']), sorted(table.filter(category='Sport').models))
+        self.assertEqual(int(table.valid['msrp'].sum()), 3)
+        self.assertEqual(table.column('rating')[0], 9.0)
+        
+        sport = table.filter(category='Sport', displacement=(None, 1000))
+        self.assertEqual(list(sport.models), ['CBR600RR'])
+        black = table.filter(color='black', brand=['Honda', 'Yamaha'])
+        self.assertEqual(sorted(black.models), ['CBR600RR', 'MT-09', 'Rebel 500'])
+        self.assertEqual(sorted(black.to_records()[0]['colors']), ['Black', 'Red'])
+        
+        by_price = table.sort('msrp', descending=True)
+        self.assertEqual(list(by_price.models), ['Panigale V4', 'CBR600RR', 'Rebel 500', 'MT-09'])
+        
+        self.assertEqual(table.group_by('brand'), {'Ducati': 1, 'Honda': 2, 'Yamaha': 1})
+        self.assertEqual(table.group_by('brand', 'power_hp', 'max')['Honda'], 118)
+        self.assertEqual(table.group_by('color', 'displacement', 'min')['Black'], 471)
+        self.assertEqual(table.group_by('brand', 'msrp', 'mean'), {'Ducati': 24995, 'Honda': 9449})
+        
+        # 从内存中的记录构建，结果与数据库一致
+        records = self.storage.search_motorcycles()
+        in_memory = MotorcycleTable.from_records(records)
+        self.assertEqual(in_memory.group_by('color'), table.group_by('color'))
+        np.testing.assert_array_equal(in_memory.column('msrp'), table.column('msrp'))
+    
     def test_search_motorcycles(self):
         """测试摩托车搜索功能"""
         # 先保存一些测试数据
@@ -264,6 +931,116 @@ class TestDataStorage(unittest.TestCase):
         honda_sport = self.storage.search_motorcycles(brand='Honda', category='sport')
         self.assertEqual(len(honda_sport), 1)
 
+    def test_iter_motorcycles_pagination(self):
+        """测试流式读取和键集分页"""
+        self.storage.save_motorcycles([
+            {'brand': 'Yamaha' if i % 2 else 'Honda', 'model': f'M{i}', 'year': 2023} for i in range(25)
+        ])
+
+        # 逐页读取，每页从上一页最后一条的id之后开始
+        pages, after_id = [], None
+        while True:
+            page = list(self.storage.iter_motorcycles(brand='Honda', after_id=after_id, limit=5, batch_size=2))
+            if not page:
+                break
+            pages.append([r['model'] for r in page])
+            after_id = page[-1]['id']
+        self.assertEqual([len(page) for page in pages], [5, 5, 3])
+        self.assertEqual(sum(pages, []), [f'M{i}' for i in range(0, 25, 2)])
+
+        # 生成器按需解析，提前停止不影响后续查询
+        records = self.storage.iter_motorcycles(batch_size=3)
+        self.assertEqual(next(records)['model'], 'M0')
+        records.close()
+        self.assertEqual(len(self.storage.search_motorcycles()), 25)
+
+        # 流式写出的JSON与一次性json.dump的格式相同
+        count = self.storage.save_to_json(self.storage.iter_motorcycles(), 'stream.json')
+        data = self.storage.search_motorcycles()
+        with open(os.path.join(self.temp_dir, 'json', 'stream.json'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(data, ensure_ascii=False, indent=2))
+        self.assertEqual(count, 25)
+        self.assertEqual(self.storage.save_to_json(iter([]), 'empty.json'), 0)
+        with open(os.path.join(self.temp_dir, 'json', 'empty.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [])
+
+    def test_plain_connection_writes(self):
+        """测试触发器只用SQLite内置函数，未注册自定义函数的连接也能增删改摩托车记录"""
+        self.storage.save_motorcycle({'brand': 'Honda', 'model': 'CB500F', 'year': 2023, 'category': 'naked',
+                                      'description': 'An easygoing parallel twin'})
+        conn = sqlite3.connect(self.storage.db_path)
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO motorcycles (brand, model, year, category, raw_data, msrp)
+                    VALUES ('Kawasaki', 'Z650', 2023, 'naked', ?, 8000)
+                """, (json.dumps({'brand': 'Kawasaki', 'model': 'Z650', 'description': 'A light inline twin',
+                                  'features': ['Slipper Clutch']}),))
+                conn.execute("UPDATE motorcycles SET category = 'standard' WHERE model = 'CB500F'")
+                conn.execute("DELETE FROM motorcycles WHERE model = 'CB500F'")
+        finally:
+            conn.close()
+        
+        self.assertEqual([r['model'] for r in self.storage.full_text_search('slipper')], ['Z650'])
+        self.assertEqual(self.storage.full_text_search('easygoing'), [])
+        stats = self.storage.get_statistics()
+        self.assertEqual(stats['total_motorcycles'], 1)
+    
+    def test_compressed_raw_data(self):
+        """测试raw_data压缩存储：所有读取路径透明解码，压缩与未压缩的行混存"""
+        def bike(i):
+            return {'brand': ['Honda', 'Yamaha', 'Ducati'][i % 3], 'model': f'Model {i}', 'year': 2020 + i % 4,
+                    'category': 'sport', 'source_url': f'https://www.cycleworld.com/bikes/model-{i}/',
+                    'description': f'Model {i} has a liquid-cooled parallel-twin engine and a steel frame',
+                    'features': ['ABS', 'Traction Control', 'LED Lighting'], 'colors': ['Red', 'Black'],
+                    'engine': {'displacement': 400 + i}, 'performance': {'power_hp': 40 + i},
+                    'price': {'msrp': 7000 + i}}
+
+        self.storage.save_motorcycles([bike(i) for i in range(60)])  # 未压缩写入
+        self.storage.compress_raw_data = True
+        self.storage.save_motorcycles([bike(i) for i in range(60, 80)])
+        with self.storage._connect() as conn:
+            types = dict(conn.execute("SELECT typeof(raw_data), COUNT(*) FROM motorcycles GROUP BY 1"))
+        self.assertEqual(types, {'text': 60, 'blob': 20})
+
+        result = self.storage.compact_raw_data()
+        self.assertEqual(result['rows'], 80)
+        self.assertLess(result['bytes_after'] * 4, result['bytes_before'])
+
+        # 其他进程打开数据库时从raw_dictionaries读取字典
+        reopened = DataStorage(self.temp_dir)
+        try:
+            records = reopened.search_motorcycles()
+            self.assertEqual(records[5]['engine']['displacement'], 405)
+            self.assertIn('Traction Control', records[70]['features'])
+            self.assertEqual(len(reopened.search_by_specs({'power_hp': (100, None)})), 20)
+            self.assertEqual([r['model'] for r in reopened.full_text_search('model 7 steel', prefix=False)], ['Model 7'])
+            self.assertEqual(reopened.load_table().group_by('color')['Red'], 80)
+        finally:
+            reopened.close()
+
+        # merge在Python中解码、合并后重新压缩，压缩记录的描述由Python写入全文索引
+        self.storage.save_motorcycles([{'brand': 'Honda', 'model': 'Model 0', 'year': 2020,
+                                        'description': 'Reworked with a quickshifter'}], policy='merge')
+        merged = self.storage.search_motorcycles(model='Model 0')[0]
+        self.assertEqual((merged['description'], merged['engine']['displacement']),
+                         ('Reworked with a quickshifter', 400))
+        self.assertEqual([r['model'] for r in self.storage.full_text_search('reworked')], ['Model 0'])
+        with self.storage._connect() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM motorcycles WHERE typeof(raw_data) = 'text'"
+                                          ).fetchone()[0], 0)
+            self.assertEqual(conn.execute("SELECT power_hp FROM performance p JOIN motorcycles m "
+                                          "ON m.id = p.motorcycle_id WHERE m.model = 'Model 0'").fetchone()[0], 40)
+
+        # 没有注册任何自定义函数的连接也能写入；压缩记录改类别后全文索引仍保留描述
+        conn = sqlite3.connect(self.storage.db_path)
+        try:
+            with conn:
+                conn.execute("UPDATE motorcycles SET category = 'naked' WHERE model = 'Model 0'")
+        finally:
+            conn.close()
+        self.assertEqual([r['model'] for r in self.storage.full_text_search('reworked naked')], ['Model 0'])
+
 
 class TestScraperIntegration(unittest.TestCase):
     """测试爬虫集成功能"""
@@ -302,6 +1079,9 @@ class TestScraperIntegration(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertIn('brand', result)
         self.assertIn('model', result)
+        self.assertEqual(result['engine']['displacement'], 999.0)
+        self.assertEqual(result['performance']['power_hp'], 217.0)
+        self.assertEqual(result['performance']['torque_nm'], 113.0)
         
     @patch('requests.Session.get')
     def test_motorcycle_com_scraper(self, mock_get):
@@ -328,6 +1108,324 @@ class TestScraperIntegration(unittest.TestCase):
         result = scraper.scrape_page("https://example.com/yamaha-r1")
         
         self.assertIsNotNone(result)
+    
+    def test_pattern_numbers_use_tokenizer(self):
+        """测试正则兜底提取和评分文本中的千分位、欧式小数"""
+        scraper = MotorcycleDotComScraper(self.config)
+        patterns = [rf'displacement[:\s]*({NUMBER_PATTERN})\s*cc', rf'torque[:\s]*({NUMBER_PATTERN})\s*nm',
+                    rf'({NUMBER_PATTERN})\s*mph']
+        self.assertEqual(scraper._extract_with_patterns('Displacement: 1,299 cc', patterns), 1299)
+        self.assertEqual(scraper._extract_with_patterns('Torque: 31,5 Nm', patterns), 31.5)
+        self.assertEqual(scraper._extract_with_patterns('Top speed 1.234,5 mph', patterns), 1234.5)
+
+        ratings = [('Rating: 8,5/10', (8.5, 10)), ('4,5 stars', (4.5, 5)), ('Score 4 / 5', (4, 5)), ('9.1', (9.1, 10))]
+        for text, expected in ratings:
+            rating = scraper.rating_from_text(text)
+            self.assertEqual((rating.overall, rating.scale), expected)
+        self.assertIsNone(CycleWorldScraper(self.config).rating_from_text('no rating yet'))
+
+    @patch('requests.Session.get')
+    def test_structured_data_fast_path(self, mock_get):
+        """测试结构化数据优先于DOM提取"""
+        mock_response = Mock()
+        mock_response.text = """
+        <html>
+            <head>
+                <script type="application/ld+json">
+                {"@type": "Product", "name": "2023 Royal Enfield Himalayan",
+                 "offers": {"price": 5449, "priceCurrency": "USD"},
+                 "aggregateRating": {"ratingValue": 4.5, "bestRating": 5}}
+                </script>
+            </head>
+            <body>
+                <h1>Royal Enfield Himalayan First Ride</h1>
+                <div class="price">$9,999</div>
+            </body>
+        </html>
+        """
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        scraper = MotorcycleDotComScraper(self.config)
+        result = scraper.scrape_page("https://example.com/himalayan")
+        
+        self.assertEqual(result['brand'], 'Royal Enfield')
+        self.assertEqual(result['model'], 'Himalayan')
+        self.assertEqual(result['year'], 2023)
+        self.assertEqual(result['price']['msrp'], 5449.0)
+        self.assertEqual(result['rating']['overall'], 4.5)
+        self.assertEqual(result['rating']['scale'], 5)
+
+    def test_extraction_cache(self):
+        """测试提取结果缓存按内容和版本命中"""
+        import shutil
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+
+        config = ScrapingConfig(min_delay=0.1, max_delay=0.2,
+                                cache_path=os.path.join(temp_dir, 'cache.db'))
+        html = ("<html><body><h1>2023 Yamaha YZF-R1</h1><div class='gallery'><img src='/img/r1.jpg'>"
+                "<img src='https://cdn.example.net/r1-side.jpg'></div><p>Power: 200 hp</p></body></html>")
+
+        with MotorcycleDotComScraper(config) as scraper:
+            first = scraper.extract_from_html(html, "https://example.com/r1")
+            self.assertIn("https://example.com/img/r1.jpg", first['images'])
+            # 只有空白不同的镜像页面命中缓存，来源URL、抓取时间和相对链接以本次请求为准
+            mirrored = scraper.extract_from_html(html.replace('<p>', '\n  <p>'), "https://mirror.example.com/r1")
+            self.assertEqual(mirrored['model'], first['model'])
+            self.assertEqual(mirrored['source_url'], "https://mirror.example.com/r1")
+            self.assertGreater(mirrored['scraped_at'], first['scraped_at'])
+            self.assertEqual(sorted(mirrored['images']),
+                             ["https://cdn.example.net/r1-side.jpg", "https://mirror.example.com/img/r1.jpg"])
+            self.assertEqual(scraper.extraction_cache.get_statistics()['hits'], 1)
+
+            self.assertEqual(scraper.extraction_cache._conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+            # 缓存写入失败时仍返回提取结果
+            with patch.object(scraper.extraction_cache, 'put', side_effect=sqlite3.OperationalError('database is locked')):
+                locked = scraper.extract_from_html(html.replace('R1', 'R7'), "https://example.com/r7")
+            self.assertEqual(locked['model'], 'YZF-R7')
+
+            # 提升版本后旧缓存失效
+            scraper.EXTRACTOR_VERSION += 1
+            scraper.extract_from_html(html, "https://example.com/r1")
+            self.assertEqual(scraper.extraction_cache.get_statistics()['misses'], 3)
+            self.assertEqual(scraper.extraction_cache.purge_stale('MotorcycleDotComScraper', scraper.EXTRACTOR_VERSION), 1)
+
+    @patch('requests.Session.get')
+    def test_listing_link_classification(self, mock_get):
+        """测试列表页链接一次遍历分类"""
+        mock_response = Mock()
+        mock_response.text = """
+        <html><body>
+            <a href="/reviews/2023-yamaha-yzf-r1-review-44112345.html">R1</a>
+            <a href="https://www.motorcycle.com/reviews/2023-yamaha-yzf-r1-review-44112345.html?utm_source=x#top">R1 again</a>
+            <div class="bike-card"><a href="/bikes/kawasaki-ninja-zx-10r">ZX-10R</a></div>
+            <a href="/categories/cruisers">Cruisers</a>
+            <a href="/reviews?page=2">Next</a>
+            <a href="/tags/yamaha">Tag</a>
+            <a href="https://other.com/reviews/2023-honda">Elsewhere</a>
+            <a href="#comments">Comments</a>
+        </body></html>
+        """
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        scraper = MotorcycleDotComScraper(self.config)
+        links = scraper.discover_links("https://www.motorcycle.com/reviews")
+        
+        self.assertEqual(links.detail, [
+            "https://www.motorcycle.com/reviews/2023-yamaha-yzf-r1-review-44112345.html",
+            "https://www.motorcycle.com/bikes/kawasaki-ninja-zx-10r",
+        ])
+        self.assertEqual(links.listing, ["https://www.motorcycle.com/categories/cruisers"])
+        self.assertEqual(links.pagination, ["https://www.motorcycle.com/reviews?page=2"])
+        self.assertEqual(links.ignored, 3)
+        self.assertEqual(scraper.extract_bike_urls_from_listing("https://www.motorcycle.com/reviews"), links.detail)
+        self.assertEqual(canonicalize_url("HTTPS://Example.com:443//a/b/?b=2&a=1&utm_medium=x#frag"),
+                         "https://example.com/a/b?a=1&b=2")
+    
+    def test_review_extraction(self):
+        """测试评测正文、优缺点和结论提取，并存入reviews表"""
+        paragraph = "The new Street Triple sharpens everything riders loved about the old one, with more midrange and a calmer chassis. "
+        html = f"""
+        <html><head><meta property="article:published_time" content="2023-05-02T08:00:00Z"></head><body>
+            <h1>2023 Triumph Street Triple 765 RS Review</h1>
+            <nav class="main-nav">{''.join(f'<a href="/section-{i}">Section {i} link text</a>' for i in range(30))}</nav>
+            <div class="sidebar"><p>Subscribe to our newsletter for the latest motorcycle news and deals today.</p></div>
+            <div class="article-body">
+                <p>{paragraph * 2}</p>
+                <p>{paragraph}</p>
+                <h3>Pros</h3><ul><li>Strong midrange engine</li><li>Excellent brakes</li></ul>
+                <h3>Cons</h3><ul><li>Firm seat on long rides</li></ul>
+                <h3>Verdict</h3>
+                <p>The best middleweight naked bike you can buy right now.</p>
+            </div>
+        </body></html>
+        """
+        scraper = CycleWorldScraper(self.config)
+        result = scraper.extract_from_html(html, "https://www.cycleworld.com/reviews/2023-triumph-street-triple")
+        review = result['review']
+        
+        self.assertIn("calmer chassis", review['content'])
+        self.assertNotIn("Section 1 link text", review['content'])
+        self.assertNotIn("newsletter", review['content'])
+        self.assertEqual(review['pros'], ["Strong midrange engine", "Excellent brakes"])
+        self.assertEqual(review['cons'], ["Firm seat on long rides"])
+        self.assertEqual(review['verdict'], "The best middleweight naked bike you can buy right now.")
+        self.assertTrue(review['review_date'].startswith('2023-05-02'))
+        
+        # 正文很长但没有优缺点、结论标题或Review结构化数据的规格页不算评测
+        spec_page = f"""
+        <html><body>
+            <h1>2023 Triumph Street Triple 765 RS</h1>
+            <div class="article-body"><p>{paragraph * 2}</p><p>{paragraph}</p><p>{paragraph}</p></div>
+        </body></html>
+        """
+        spec = scraper.extract_from_html(spec_page, "https://www.cycleworld.com/bikes/2023-triumph-street-triple")
+        self.assertIsNone(spec['review'])
+        
+        structured_page = spec_page.replace('<body>', '<body><script type="application/ld+json">'
+                                            '{"@type": "Review", "reviewRating": {"ratingValue": 9, "bestRating": 10}}</script>')
+        structured = scraper.extract_from_html(structured_page, "https://www.cycleworld.com/reviews/street-triple")
+        self.assertIn("calmer chassis", structured['review']['content'])
+        self.assertIsNone(structured['review']['verdict'])
+        
+        import shutil
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        storage = DataStorage(temp_dir)
+        self.assertTrue(storage.save_motorcycle(result))
+        
+        reviews = storage.get_reviews(1)
+        self.assertEqual(len(reviews), 1)
+        self.assertEqual(reviews[0]['cons'], ["Firm seat on long rides"])
+        self.assertNotIn('review', storage.search_motorcycles()[0])
+    
+    def test_low_memory_mode(self):
+        """测试拆除解析树后记录仍然完整，以及内存上限检查"""
+        config = ScrapingConfig(min_delay=0.1, max_delay=0.2, teardown_trees=True)
+        scraper = CycleWorldScraper(config)
+        html = """
+        <html><body>
+            <h1>2023 Honda CBR1000RR-R Fireblade SP Review</h1>
+            <div class="specifications"><p>Engine: 999cc Inline-4</p><p>Power: 217 hp</p></div>
+        </body></html>
+        """
+        result = scraper.extract_from_html(html, "https://example.com/honda-cbr")
+        self.assertEqual(result['brand'], 'Honda')
+        self.assertEqual(result['engine']['displacement'], 999.0)
+        self.assertIsInstance(result['model'], str)
+
+        rss = rss_mb()
+        self.assertIsNotNone(rss)
+        self.assertTrue(MemoryGuard(ceiling_mb=1).over_ceiling(force=True))
+        self.assertFalse(MemoryGuard(ceiling_mb=rss * 100).over_ceiling(force=True))
+
+    def test_yield_ignores_fetch_failures(self):
+        """测试抓取失败的页面不计入产出，网络故障不会被当成页面结构变化"""
+        config = ScrapingConfig(min_delay=0.1, max_delay=0.2, parse_workers=0, yield_window=4, min_yield=0.5)
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                patch('main_scraper.DataStorage', side_effect=lambda **kwargs: DataStorage(temp_dir, **kwargs)), \
+                patch.object(MotorcycleScraper, 'setup_logging',
+                             lambda self: setattr(self, 'logger', logging.getLogger('test_main_scraper'))):
+            main = MotorcycleScraper(config)
+            scraper = main.scrapers['cycleworld']
+            page = Mock(text="<html><body><h1>2023 Honda CB500F</h1><p>Engine: 471cc</p></body></html>")
+            urls = [f"https://www.cycleworld.com/bike-{i}" for i in range(6)]
+            try:
+                with patch.object(scraper, 'get', side_effect=[None] * 5 + [page]):
+                    records = list(main.iter_website('cycleworld', urls))
+                self.assertEqual(len(records), 1)
+                self.assertEqual(main.yield_monitor.sites['cycleworld'].total_pages, 1)
+                self.assertFalse(main.yield_monitor.should_pause('cycleworld'))
+            finally:
+                main.close()
+
+    def test_parse_pool(self):
+        """测试进程池解析返回只含基本类型的记录"""
+        pages = [
+            RawPage('motorcycle_com', f"https://example.com/bike-{i}",
+                    f"<html><body><h1>2023 Yamaha MT-0{i}</h1><div class='bike-specs'><p>Displacement: {i}00cc</p></div></body></html>".encode('utf-8'))
+            for i in range(3, 10)
+        ]
+        pages.append(RawPage('motorcycle_com', "https://example.com/empty", b"<html></html>"))
+
+        with ParsePool({'motorcycle_com': MotorcycleDotComScraper}, self.config, max_workers=2, chunk_size=3) as pool:
+            results = {result.url: result for result in pool.extract_many(iter(pages))}
+            # 工作进程随结果返回pid，内存检查不依赖进程池的内部属性
+            self.assertTrue(pool._worker_pids)
+            self.assertNotIn(os.getpid(), pool._worker_pids)
+            pool.recycle()
+            self.assertEqual(pool._worker_pids, set())
+
+        self.assertEqual(len(results), len(pages))
+        self.assertIsNone(results["https://example.com/empty"].record)
+        record = results["https://example.com/bike-7"].record
+        self.assertEqual(record['model'], 'MT-07')
+        self.assertEqual(record['engine']['displacement'], 700.0)
+        self.assertIsInstance(record['scraped_at'], str)
+
+    def test_thread_safety_stress(self):
+        """测试多线程共享爬虫、限速器和存储"""
+        scraper = MotorcycleDotComScraper(self.config)
+        temp_dir = tempfile.mkdtemp()
+        storage = DataStorage(temp_dir)
+        pages = {
+            i: f"<html><body><h1>2023 Yamaha MT-{i:02d}</h1><div class='bike-specs'><p>Displacement: {i}00cc</p></div></body></html>"
+            for i in range(1, 41)
+        }
+
+        def work(i):
+            record = scraper.extract_from_html(pages[i], f"https://example.com/bike-{i}")
+            data = to_plain_dict(record)
+            self.assertEqual(data['model'], f"MT-{i:02d}")
+            self.assertEqual(data['engine']['displacement'], float(i * 100))
+            return storage.save_motorcycle(data), threading.get_ident(), scraper.session
+
+        def sessions_after_barrier(barrier):
+            first = scraper.session
+            barrier.wait()
+            return first, scraper.session
+
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(work, pages))
+            self.assertTrue(all(success for success, _, _ in results))
+            self.assertEqual(storage.get_statistics()['total_motorcycles'], len(pages))
+            # 同一线程始终复用同一个会话，不同线程的会话互不相同
+            sessions_by_thread = {}
+            for _, thread_id, session in results:
+                sessions_by_thread.setdefault(thread_id, set()).add(id(session))
+            self.assertTrue(all(len(sessions) == 1 for sessions in sessions_by_thread.values()))
+            self.assertEqual(len(set.union(*sessions_by_thread.values())), len(sessions_by_thread))
+
+            # 两个线程同时存活时各自取到不同的会话
+            barrier = threading.Barrier(2)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                pairs = list(executor.map(sessions_after_barrier, [barrier, barrier]))
+            for first, again in pairs:
+                self.assertIs(first, again)
+            self.assertIsNot(pairs[0][0], pairs[1][0])
+        finally:
+            scraper.close()
+            storage.close()
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        # 多线程轮换用户代理时每个代理被取到的次数相同
+        rotator = UserAgentRotator()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            agents = Counter(executor.map(lambda _: rotator.get_next_agent(), range(50)))
+        self.assertEqual(set(agents.values()), {10})
+
+        # 并发请求按预约的时间点依次错开
+        limiter = RateLimiter(0.02, 0.02)
+        stamps = []
+        stamps_lock = threading.Lock()
+
+        def wait_and_stamp(_):
+            limiter.wait_if_needed()
+            with stamps_lock:
+                stamps.append(datetime.now().timestamp())
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(wait_and_stamp, range(8)))
+        stamps.sort()
+        self.assertGreaterEqual(stamps[-1] - stamps[0], 0.02 * 6)
+
+    def test_parse_pool_threads(self):
+        """测试线程模式的解析池"""
+        pages = [
+            RawPage('motorcycle_com', f"https://example.com/bike-{i}",
+                    f"<html><body><h1>2023 Yamaha MT-0{i}</h1></body></html>".encode('utf-8'))
+            for i in range(1, 10)
+        ]
+        with ParsePool({'motorcycle_com': MotorcycleDotComScraper}, self.config, max_workers=4,
+                       chunk_size=2, use_threads=True) as pool:
+            results = list(pool.extract_many(pages))
+
+        self.assertEqual(sorted(result.record['model'] for result in results), [f"MT-0{i}" for i in range(1, 10)])
 
 
 def run_performance_test():
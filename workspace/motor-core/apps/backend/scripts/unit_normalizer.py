@@ -0,0 +1,132 @@
+"""
+单位规范化与成对字段核对
+
+在整列NumPy数组上完成：
+1. 没有标注单位、按标准单位明显不合理的尺寸/重量/容积（如座高32.3、油箱4.5），按该字段常见的英制单位换算；
+2. hp/kW、Nm/lb-ft、mph/km/h 成对字段互相补全，两者都有时相差超过容差即标记为不一致。
+批量清理使用数组版本，逐条清理使用逻辑相同的标量版本（避免为单个值构造数组），两者结果一致
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from quantity import FIELD_CANONICAL_UNITS, convert
+
+# 成对存储的字段：(第一个字段, 第二个字段)，换算系数由quantity的单位表得出
+PAIRED_FIELDS = (
+    ('power_hp', 'power_kw'),
+    ('torque_nm', 'torque_lbft'),
+    ('top_speed_mph', 'top_speed_kmh'),
+)
+
+# 两个字段换算后相对差超过该比例时标记为不一致
+PAIR_TOLERANCE = 0.05
+
+# 未标注单位的数值在标准单位下超出范围时，尝试按这些单位理解
+UNITLESS_SOURCE_UNITS = {
+    'length': 'in', 'width': 'in', 'height': 'in', 'wheelbase': 'in',
+    'ground_clearance': 'in', 'seat_height': 'in',
+    'dry_weight': 'lb', 'wet_weight': 'lb',
+    'fuel_capacity': 'gal',
+}
+
+
+def pair_name(first: str, second: str) -> str:
+    return f"{first}/{second}"
+
+
+# 第一个字段换算到第二个字段的系数
+PAIR_FACTORS = {
+    (first, second): convert(1.0, FIELD_CANONICAL_UNITS[first], FIELD_CANONICAL_UNITS[second])
+    for first, second in PAIRED_FIELDS
+}
+UNITLESS_FACTORS = {
+    field: convert(1.0, source, FIELD_CANONICAL_UNITS[field]) for field, source in UNITLESS_SOURCE_UNITS.items()
+}
+
+
+def rescue_unitless(values, field: str, min_val: float, max_val: float):
+    """超出标准单位合理范围、但按常见英制单位换算后落入范围的值，换算为标准单位
+
+    values可以是标量或数组，NaN保持不变
+    """
+    factor = UNITLESS_FACTORS.get(field)
+    if factor is None:
+        return values
+
+    values = np.asarray(values, dtype=np.float64)
+    converted = np.round(values * factor, 2)
+    outside = (values < min_val) | (values > max_val)
+    fits = (converted >= min_val) & (converted <= max_val)
+    return np.where(outside & fits, converted, values)
+
+
+def reconcile_pairs(columns: Dict[str, np.ndarray],
+                    ranges: Dict[str, Tuple[str, float, float]]) -> Dict[str, np.ndarray]:
+    """成对字段互相补全并核对
+
+    columns为 字段名 → float64数组（空值为NaN），补全结果直接写回；
+    补全的值仍需落在ranges给出的合理范围内。返回 字段对名称 → 不一致行的掩码
+    """
+    flags = {}
+    for first, second in PAIRED_FIELDS:
+        if first not in columns or second not in columns:
+            continue
+        a = np.asarray(columns[first], dtype=np.float64)
+        b = np.asarray(columns[second], dtype=np.float64)
+        factor = PAIR_FACTORS[first, second]
+
+        a_from_b = np.round(b / factor, 2)
+        b_from_a = np.round(a * factor, 2)
+        _, a_min, a_max = ranges[first]
+        _, b_min, b_max = ranges[second]
+        fill_a = np.isnan(a) & (a_from_b >= a_min) & (a_from_b <= a_max)
+        fill_b = np.isnan(b) & (b_from_a >= b_min) & (b_from_a <= b_max)
+
+        both = ~np.isnan(a) & ~np.isnan(b)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            difference = np.abs(b_from_a - b) / np.maximum(np.abs(b), np.abs(b_from_a))
+        flags[pair_name(first, second)] = both & (difference > PAIR_TOLERANCE)
+
+        columns[first] = np.where(fill_a, a_from_b, a)
+        columns[second] = np.where(fill_b, b_from_a, b)
+
+    return flags
+
+
+def _round(value: float) -> float:
+    # 与np.round(x, 2)的算法相同（乘100、四舍六入五成双、除100），保证标量和数组结果一致
+    return round(value * 100.0) / 100.0
+
+
+def rescue_unitless_value(value: float, field: str, min_val: float, max_val: float) -> float:
+    """rescue_unitless的标量版本，逐条清理时使用，避免为单个值构造数组"""
+    factor = UNITLESS_FACTORS.get(field)
+    if factor is None or min_val <= value <= max_val:
+        return value
+    converted = _round(value * factor)
+    return converted if min_val <= converted <= max_val else value
+
+
+def reconcile_values(values: Dict[str, Optional[float]],
+                     ranges: Dict[str, Tuple[str, float, float]]) -> List[str]:
+    """reconcile_pairs的标量版本：就地补全一条记录的成对字段，返回不一致的字段对"""
+    flags = []
+    for (first, second), factor in PAIR_FACTORS.items():
+        a, b = values.get(first), values.get(second)
+        if a is not None and b is not None:
+            b_from_a = _round(a * factor)
+            if abs(b_from_a - b) / max(abs(b), abs(b_from_a)) > PAIR_TOLERANCE:
+                flags.append(pair_name(first, second))
+        elif a is not None:
+            b_from_a = _round(a * factor)
+            _, b_min, b_max = ranges[second]
+            if b_min <= b_from_a <= b_max:
+                values[second] = b_from_a
+        elif b is not None:
+            a_from_b = _round(b / factor)
+            _, a_min, a_max = ranges[first]
+            if a_min <= a_from_b <= a_max:
+                values[first] = a_from_b
+    return flags
@@ -0,0 +1,138 @@
+"""
+提取产出监控
+
+按网站统计最近若干页面中各字段（标题、规格、价格、评分、图片）的命中率。
+网站改版导致选择器失效时产出骤降，命中率低于阈值即暂停该网站的爬取，
+统计快照定期写入数据库用于趋势分析
+"""
+
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# 统计的字段，'record' 表示页面是否提取出了记录
+TRACKED_FIELDS = ('record', 'title', 'specs', 'price', 'rating', 'images')
+
+
+def _has_value(value: Any) -> bool:
+    """判断字段是否有实际内容（数据类或字典中至少有一个非空值）"""
+    if not value:
+        return False
+    if isinstance(value, dict):
+        return any(v is not None for v in value.values())
+    if getattr(value, '_record_model', False):
+        return any(v is not None for v in value.to_dict().values())
+    return True
+
+
+def field_hits(record: Optional[Dict[str, Any]]) -> Tuple[bool, ...]:
+    """返回一条记录在各统计字段上是否命中，顺序与TRACKED_FIELDS一致"""
+    if not record:
+        return (False,) * len(TRACKED_FIELDS)
+
+    return (
+        True,
+        bool(record.get('brand') and record.get('model')),
+        any(_has_value(record.get(key)) for key in ('engine', 'performance', 'dimensions')),
+        _has_value(record.get('price')),
+        _has_value(record.get('rating')),
+        bool(record.get('images')),
+    )
+
+
+class SiteYield:
+    """单个网站的滑动窗口计数"""
+
+    def __init__(self, window: int):
+        self.window: Deque[Tuple[bool, ...]] = deque(maxlen=window)
+        self.counts = [0] * len(TRACKED_FIELDS)
+        self.total_pages = 0
+
+    def add(self, hits: Tuple[bool, ...]):
+        # 窗口已满时先减去即将被挤出的一页，保持计数为O(1)更新
+        if len(self.window) == self.window.maxlen:
+            for i, hit in enumerate(self.window[0]):
+                self.counts[i] -= hit
+        self.window.append(hits)
+        for i, hit in enumerate(hits):
+            self.counts[i] += hit
+        self.total_pages += 1
+
+    def rates(self) -> Dict[str, float]:
+        pages = len(self.window)
+        if not pages:
+            return {field: 0.0 for field in TRACKED_FIELDS}
+        return {field: count / pages for field, count in zip(TRACKED_FIELDS, self.counts)}
+
+
+class YieldMonitor:
+    """各网站的提取产出监控与暂停策略"""
+
+    def __init__(self, window: int = 50, min_pages: int = 20, min_yield: float = 0.2,
+                 storage=None, persist_every: int = 50, logger: Optional[logging.Logger] = None):
+        self.window = window
+        self.min_pages = min_pages  # 窗口内页面数达到该值后才会判断是否暂停
+        self.min_yield = min_yield  # 有效记录（含品牌和型号）比例低于该值时暂停
+        self.storage = storage
+        self.persist_every = persist_every
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.sites: Dict[str, SiteYield] = {}
+        self.paused: Dict[str, str] = {}  # 网站 → 暂停原因
+
+    def observe(self, site: str, record: Optional[Dict[str, Any]]):
+        """记录一个页面的提取结果"""
+        stats = self.sites.get(site)
+        if stats is None:
+            stats = self.sites[site] = SiteYield(self.window)
+        stats.add(field_hits(record))
+
+        if self.storage is not None and stats.total_pages % self.persist_every == 0:
+            self.persist(site)
+
+        self._apply_policy(site, stats)
+
+    def _apply_policy(self, site: str, stats: SiteYield):
+        if site in self.paused or len(stats.window) < self.min_pages:
+            return
+
+        rates = stats.rates()
+        if rates['title'] < self.min_yield:
+            reason = (f"最近 {len(stats.window)} 个页面中有效记录比例 {rates['title']:.0%} "
+                      f"低于阈值 {self.min_yield:.0%}，页面结构可能已变化")
+            self.paused[site] = reason
+            self.logger.warning(f"暂停爬取 {site}: {reason}")
+            if self.storage is not None:
+                self.persist(site)
+
+    def should_pause(self, site: str) -> bool:
+        """网站是否已被暂停"""
+        return site in self.paused
+
+    def resume(self, site: str):
+        """恢复网站爬取并清空其窗口"""
+        self.paused.pop(site, None)
+        self.sites.pop(site, None)
+
+    def hit_rates(self, site: str) -> Dict[str, float]:
+        """网站在当前窗口内各字段的命中率"""
+        stats = self.sites.get(site)
+        return stats.rates() if stats else {field: 0.0 for field in TRACKED_FIELDS}
+
+    def persist(self, site: str):
+        """把网站当前窗口的命中率写入数据库"""
+        stats = self.sites.get(site)
+        if stats is None or self.storage is None:
+            return
+        self.storage.save_crawl_yield(site, len(stats.window), stats.rates(), paused=site in self.paused)
+
+    def persist_all(self):
+        """写入所有网站的快照（爬取结束时调用）"""
+        for site in self.sites:
+            self.persist(site)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """各网站的当前统计"""
+        return [
+            {'site': site, 'pages': stats.total_pages, 'paused': site in self.paused, **stats.rates()}
+            for site, stats in self.sites.items()
+        ]